@@ -0,0 +1 @@
+"""Benchmark scripts, run from the `src` directory with `python -m`."""
@@ -0,0 +1,109 @@
+"""
+Benchmark load time and memory of the pickle and flat `.npy` artifacts.
+
+Starts N worker processes per format. Each one loads the model, touches
+every node by predicting a batch, then reports its load time, the growth
+of its resident set (RSS) and its proportional set size (PSS, shared pages
+divided among the processes sharing them). Workers wait on a barrier so
+they are all alive while memory is measured. sklearn is imported before
+the pickle is timed, so only deserialization is measured; the flat format
+does not need sklearn at all.
+
+Usage (from the src directory):
+    python -m benchmarks.artifact_load --workers 4
+"""
+
+import argparse
+import multiprocessing as mp
+import pickle as pk
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import model_setting
+from models.flat_forest import FlatForest
+
+
+def _memory_kb() -> tuple[int, int]:
+    """Return the (RSS, PSS) of the current process in kB (Linux only)."""
+    rss = pss = 0
+    with open("/proc/self/smaps_rollup") as smaps:
+        for line in smaps:
+            if line.startswith("Rss:"):
+                rss = int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    return rss, pss
+
+
+def _worker(model_format: str, path: str, barrier, results) -> None:
+    """Load the model in one format and report timings and memory."""
+    features = np.random.default_rng(0).uniform(0, 2000, (1_000, 9))
+    if model_format == "pickle":
+        # measure deserialization only, not the sklearn import
+        import sklearn.ensemble  # noqa: F401
+    rss_before, _ = _memory_kb()
+
+    start = time.perf_counter()
+    if model_format == "pickle":
+        with open(path, "rb") as model_file:
+            model = pk.load(model_file)
+    else:
+        model = FlatForest.load(path, mmap_mode="r")
+    load_time = time.perf_counter() - start
+
+    model.predict(features)
+    barrier.wait()
+    rss_after, pss = _memory_kb()
+    results.put((load_time, rss_after - rss_before, pss))
+    barrier.wait()
+
+
+def run(model_format: str, path: str, workers: int) -> list[tuple]:
+    """
+    Start `workers` processes loading one artifact format.
+
+    Returns:
+        list[tuple]: (load time, RSS growth kB, PSS kB) of every worker.
+    """
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(model_format, path, barrier, results))
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    stats = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return stats
+
+
+def main() -> None:
+    """Run both formats and print the per-worker medians."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    pickle_path = Path(model_setting.model_path) / model_setting.model_name
+    with open(pickle_path, "rb") as model_file:
+        forest = pk.load(model_file)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        FlatForest.from_estimator(forest).save(tmp)
+        artifacts = {"pickle": str(pickle_path), "npy": tmp}
+        print(f"{args.workers} workers, {model_setting.model_name}")
+        print(f"{'format':8s} {'load ms':>9s} {'RSS +kB':>9s} {'PSS kB':>9s}")
+        for model_format, path in artifacts.items():
+            stats = run(model_format, path, args.workers)
+            load, rss, pss = (statistics.median(col) for col in zip(*stats))
+            print(f"{model_format:8s} {load * 1e3:9.1f} {rss:9.0f} {pss:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
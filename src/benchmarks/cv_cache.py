@@ -0,0 +1,79 @@
+"""
+Benchmark the cross-validation result store across grid search runs.
+
+Runs the memoized grid search three times on the training split of the
+SQLite table with an empty temporary store: cold, again with the same
+grid (every candidate cached) and with a grid grown by one max_depth
+(only the new candidates fitted). Reports the wall time, the candidates
+fitted and the best score of every run.
+
+Usage (from the src directory):
+    python -m benchmarks.cv_cache --executor joblib
+"""
+
+import argparse
+import tempfile
+import time
+
+from loguru import logger
+from sklearn.ensemble import RandomForestRegressor
+
+from config import model_setting
+from models.pipe.data_preparation import RentFeatureTransformer, prepare_data
+from models.pipe.model import _get_X_y, _split_train_test
+from models.pipe.search import make_search
+
+GRID = {
+    "n_estimators": [20, 40],
+    "criterion": ["squared_error", "poisson"],
+    "max_depth": [6, 8],
+}
+
+
+def main() -> None:
+    """Print the timings of the cold, warm and grown grid runs."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--executor",
+        choices=["joblib", "process_pool"],
+        default="joblib",
+    )
+    args = parser.parse_args()
+
+    logger.disable("models")
+    transformer = RentFeatureTransformer()
+    data = prepare_data(transformer=transformer)
+    X, y = _get_X_y(data, col_x=list(transformer.get_feature_names_out()))
+    X_train, _, y_train, _ = _split_train_test(X, y)
+
+    model_setting.train_executor = args.executor
+    model_setting.cv_cache_enabled = True
+    runs = (
+        ("cold", GRID),
+        ("same grid", GRID),
+        ("grown grid", {**GRID, "max_depth": [6, 8, 10]}),
+    )
+    print(f"{'run':12s} {'time':>8s} {'cands':>6s} {'fitted':>7s} {'cv best':>8s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        model_setting.cv_cache_path = tmp
+        fitted_before = set()
+        for label, grid in runs:
+            search = make_search(
+                RandomForestRegressor(random_state=0),
+                param_grid=grid,
+                strategy="grid",
+            )
+            start = time.perf_counter()
+            search.fit(X_train, y_train)
+            elapsed = time.perf_counter() - start
+            params = [tuple(sorted(p.items())) for p in search.cv_results_["params"]]
+            fitted = len(set(params) - fitted_before)
+            fitted_before.update(params)
+            print(
+                f"{label:12s} {elapsed:7.2f}s {len(params):6d} {fitted:7d} "
+                f"{search.best_score_:8.4f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark extracting rows from a large SQLite RentApartments table.
+
+Writes synthetic listings to a temporary database, then times three
+reads, first with a bare engine (SQLite default pragmas, read-write
+URI, no secondary index), then with the configured engines (pragmas,
+read-only URI) before and after `create_indexes`:
+    - full: the whole table, as the training extraction,
+    - filtered: the rows of a few zip codes (about 1% of the table),
+    - incremental: the last 1% of the rows, by rowid.
+
+Usage (from the src directory):
+    python -m benchmarks.db_extraction --rows 3000000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from benchmarks.synthetic import make_listings
+from config import db_settings, get_engine
+from config.db import dispose_engines
+from models.pipe.data_collection import (
+    create_indexes,
+    load_data_from_db,
+    max_rowid,
+)
+
+# settings of the bare engine, as before the engine tuning
+UNTUNED = {
+    "db_read_only_reads": False,
+    "sqlite_journal_mode": None,
+    "sqlite_synchronous": None,
+    "sqlite_cache_size": None,
+    "sqlite_mmap_size": None,
+}
+WRITE_CHUNK_ROWS = 500_000
+
+
+def timed_reads(zips: list[str], after_rowid: int) -> dict:
+    """Time the full, filtered and incremental reads, in seconds."""
+    reads = (
+        ("full", lambda: load_data_from_db()),
+        ("filtered", lambda: load_data_from_db(filters={"zip": zips})),
+        ("incremental", lambda: load_data_from_db(after_rowid=after_rowid)),
+    )
+    timings = {}
+    for label, read in reads:
+        start = time.perf_counter()
+        rows = len(read())
+        timings[label] = (time.perf_counter() - start, rows)
+    return timings
+
+
+def main() -> None:
+    """Print the read timings of every engine setup."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    args = parser.parse_args()
+
+    logger.disable("models")
+    tuned = {name: getattr(db_settings, name) for name in UNTUNED}
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_settings.db_conn_str = f"sqlite:///{Path(tmp) / 'db.sqlite'}"
+        for seed, start in enumerate(range(0, args.rows, WRITE_CHUNK_ROWS)):
+            make_listings(min(WRITE_CHUNK_ROWS, args.rows - start), seed).to_sql(
+                db_settings.rent_apart_table_name,
+                get_engine(),
+                if_exists="append",
+                index=False,
+                chunksize=50_000,
+            )
+        # ~1% of the rows: the synthetic zip codes are uniform over 98 codes
+        zips = ["1011 AB"]
+        after_rowid = max_rowid() - args.rows // 100
+
+        for label, settings in (("untuned", UNTUNED), ("tuned", tuned)):
+            dispose_engines()
+            for name, value in settings.items():
+                setattr(db_settings, name, value)
+            results[label] = timed_reads(zips, after_rowid)
+
+        start = time.perf_counter()
+        create_indexes()
+        build = time.perf_counter() - start
+        results["tuned+indexes"] = timed_reads(zips, after_rowid)
+        dispose_engines()
+
+    print(f"{args.rows} rows, index build {build:.1f} s")
+    print(f"{'engine':14s} {'read':12s} {'rows':>9s} {'ms':>10s}")
+    for label, timings in results.items():
+        for read, (elapsed, rows) in timings.items():
+            print(f"{label:14s} {read:12s} {rows:9d} {elapsed * 1e3:10.1f}")
+    for read in ("full", "filtered", "incremental"):
+        speedup = results["untuned"][read][0] / results["tuned+indexes"][read][0]
+        print(f"speedup {read:12s} {speedup:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark TreeSHAP explanations against plain predictions.
+
+Loads the configured model with each inference engine (the tree paths
+are summarized at load time), then for batches of 1, 100 and 1000 rows
+times `ModelInferenceService.explain` and `ModelInferenceService.predict_batch`,
+checks that the contributions of every row add up to its prediction
+minus the base value, and reports explanations/sec, predictions/sec and
+the cost of an explanation relative to a prediction.
+
+Usage (from the src directory):
+    python -m benchmarks.explanations --repeat 20
+"""
+
+import argparse
+import time
+
+import numpy as np
+from loguru import logger
+
+from benchmarks.predict_batch import make_features
+from benchmarks.predict_latency import latencies
+from config import model_setting
+from models.model_inference import ModelInferenceService
+
+BATCH_SIZES = (1, 100, 1_000)
+
+
+def main() -> None:
+    """Print the explanation and prediction throughput for every batch size."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logger.disable("models")
+
+    print(
+        f"{'rows':>6s} {'engine':8s} {'explain/s':>10s} {'predict/s':>10s} "
+        f"{'cost':>7s}",
+    )
+    for engine in ("sklearn", "flat"):
+        model_setting.inference_engine = engine
+        service = ModelInferenceService()
+        start = time.perf_counter()
+        service.load_model()
+        load_ms = (time.perf_counter() - start) * 1e3
+        explainer = service.explainer
+        for batch_size in BATCH_SIZES:
+            features = make_features(batch_size).astype(np.float32)
+            explanation = service.explain(features)
+            np.testing.assert_allclose(
+                explanation.values.sum(axis=1) + explanation.base_value,
+                explanation.prediction,
+                rtol=1e-9,
+            )
+            repeat = max(3, args.repeat // (1 + batch_size // 100))
+            explain, predict = (
+                np.percentile(latencies(call, features, repeat), 50)
+                for call in (service.explain, service.predict_batch)
+            )
+            print(
+                f"{batch_size:6d} {engine:8s} {batch_size / explain * 1e3:10.0f} "
+                f"{batch_size / predict * 1e3:10.0f} {explain / predict:6.1f}x",
+            )
+        print(
+            f"{'':6s} {engine:8s} {explainer.n_paths} tree paths, "
+            f"model loaded in {load_ms:.0f} ms",
+        )
+
+
+if __name__ == "__main__":
+    main()
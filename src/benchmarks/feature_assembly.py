@@ -0,0 +1,59 @@
+"""
+Benchmark building the feature matrix of named request rows.
+
+Compares the former row-wise assembly (one list per row, assigned into
+the matrix) with `FeatureSchema.assemble`, which fills the preallocated
+float32 buffer block by block and validates it, on the same dicts.
+
+Usage (from the src directory):
+    python -m benchmarks.feature_assembly --rows 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.predict_batch import make_features
+from config import model_setting
+from models.feature_schema import FeatureSchema
+
+
+def rowwise_assemble(rows: list[dict], names: list[str]) -> np.ndarray:
+    """Assemble the matrix one row list at a time, without validation."""
+    features = np.empty((len(rows), len(names)), dtype=np.float32)
+    for i, row in enumerate(rows):
+        features[i] = [row[name] for name in names]
+    return features
+
+
+def main() -> None:
+    """Time both assemblies and check they build the same matrix."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    schema = FeatureSchema.load(
+        f"{model_setting.model_path}/{model_setting.feature_schema_name}",
+    )
+    values = make_features(args.rows)
+    rows = [dict(zip(schema.names, row.tolist())) for row in values]
+
+    timings = {}
+    for label, assemble in (
+        ("row-wise", lambda: rowwise_assemble(rows, schema.names)),
+        ("schema", lambda: schema.assemble(rows)),
+    ):
+        start = time.perf_counter()
+        features = assemble()
+        timings[label] = time.perf_counter() - start
+        np.testing.assert_array_equal(features, values.astype(np.float32))
+
+    print(f"{args.rows} rows, {schema.n_features} features")
+    for label, elapsed in timings.items():
+        print(f"{label:9s} {elapsed * 1e3:9.1f} ms")
+    print(f"speedup   {timings['row-wise'] / timings['schema']:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
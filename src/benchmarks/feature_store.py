@@ -0,0 +1,60 @@
+"""
+Benchmark a feature store hit against preparing the data from the table.
+
+Writes synthetic listings to a temporary SQLite database, then times
+`load_prepared_data` on a miss (stream, transform and write the entry),
+on a memory-mapped hit, and the fingerprint alone.
+
+Usage (from the src directory):
+    python -m benchmarks.feature_store --rows 1000000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from benchmarks.synthetic import make_listings
+from config import db_settings, get_engine, model_setting
+from models.pipe.data_collection import max_rowid
+from models.pipe.feature_store import load_prepared_data, table_fingerprint
+
+
+def main() -> None:
+    """Time a miss, a hit and the fingerprint on a synthetic table."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    logger.disable("models")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_settings.db_conn_str = f"sqlite:///{Path(tmp) / 'db.sqlite'}"
+        model_setting.feature_store_path = str(Path(tmp) / "feature_store")
+        make_listings(args.rows).to_sql(
+            db_settings.rent_apart_table_name,
+            get_engine(),
+            index=False,
+            chunksize=50_000,
+        )
+        watermark = max_rowid()
+
+        timings = {}
+        for label in ("miss", "hit"):
+            start = time.perf_counter()
+            _, y, _ = load_prepared_data(watermark)
+            y.sum()
+            timings[label] = time.perf_counter() - start
+        start = time.perf_counter()
+        table_fingerprint(watermark)
+        timings["fingerprint"] = time.perf_counter() - start
+
+    print(f"{args.rows} rows")
+    for label, elapsed in timings.items():
+        print(f"{label:12s} {elapsed * 1e3:10.1f} ms")
+    print(f"speedup      {timings['miss'] / timings['hit']:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
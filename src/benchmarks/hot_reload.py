@@ -0,0 +1,105 @@
+"""
+Benchmark single-row predict latency while the model is hot-reloaded.
+
+Copies the model artifacts to a temporary directory and predicts single
+rows in a loop, first undisturbed, then while a background watcher picks
+up the model file being replaced every `--every` seconds, loads and warms
+the new version and swaps it in. Reports p50/p99/max latency of both
+phases, the number of swaps and their load time, and the cold load time
+a restart would cost instead.
+
+Usage (from the src directory):
+    python -m benchmarks.hot_reload --seconds 10 --engine flat
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from benchmarks.predict_batch import make_features
+from config import model_setting
+from models.model_inference import ModelInferenceService
+
+
+def latencies(service: ModelInferenceService, rows: list, seconds: float):
+    """Predict rows in a loop for `seconds`, return latencies in us."""
+    timings = []
+    stop = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        service.predict(rows[i % len(rows)])
+        timings.append(time.perf_counter() - start)
+        i += 1
+    return np.array(timings) * 1e6
+
+
+def replace_model(model_file: Path, every: float, stop: threading.Event) -> None:
+    """Rename a fresh copy of the model file over it every `every` s."""
+    while not stop.wait(every):
+        tmp = model_file.with_suffix(".tmp")
+        shutil.copyfile(model_file, tmp)
+        os.replace(tmp, model_file)
+
+
+def main() -> None:
+    """Print the latency without and during reloads."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--every", type=float, default=1.0)
+    parser.add_argument("--interval", type=float, default=0.1)
+    parser.add_argument("--engine", choices=["sklearn", "flat"], default="flat")
+    args = parser.parse_args()
+
+    logger.remove()
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in Path(model_setting.model_path).iterdir():
+            if path.is_file():
+                shutil.copy2(path, tmp)
+        model_setting.model_path = tmp
+        model_setting.inference_engine = args.engine
+        service = ModelInferenceService()
+        start = time.perf_counter()
+        service.load_model()
+        cold = time.perf_counter() - start
+        rows = make_features(1_000).tolist()
+        latencies(service, rows, 1.0)
+
+        phases = {"steady": latencies(service, rows, args.seconds)}
+        stop = threading.Event()
+        writer = threading.Thread(
+            target=replace_model,
+            args=(Path(tmp) / model_setting.model_name, args.every, stop),
+        )
+        service.start_watching(args.interval)
+        writer.start()
+        version = service.version
+        phases["reloading"] = latencies(service, rows, args.seconds)
+        stop.set()
+        writer.join()
+        service.stop_watching()
+        swaps = service.version - version
+
+    print(
+        f"{args.engine} engine, cold load {cold * 1e3:.0f} ms, "
+        f"{swaps} swaps during {args.seconds:.0f} s",
+    )
+    print(
+        f"{'phase':10s} {'requests':>9s} {'p50 us':>9s} {'p99 us':>9s} {'max us':>9s}"
+    )
+    for label, timings in phases.items():
+        p50, p99 = np.percentile(timings, [50, 99])
+        print(
+            f"{label:10s} {len(timings):9d} {p50:9.1f} {p99:9.1f} {timings.max():9.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
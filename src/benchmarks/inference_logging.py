@@ -0,0 +1,78 @@
+"""
+Benchmark the cost of logging on single-row predict latency.
+
+Times the same `ModelInferenceService.predict` path under three logging
+setups, each writing to a temporary log file (no console sink):
+    - off: no sink at all, the latency without any logging,
+    - default: sink at DEBUG, every request logged,
+    - serving: sink at DEBUG, `log_sample_rate` of the requests logged.
+
+The logged requests pay for formatting and writing their record, in
+serving mode that cost lands on the sampled requests, the upper tail.
+
+Usage (from the src directory):
+    python -m benchmarks.inference_logging --requests 5000 --engine flat
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from benchmarks.predict_batch import make_features
+from config import configure_logging, logger_setting, model_setting
+from models.model_inference import ModelInferenceService
+
+
+def latencies(predict, rows: list) -> np.ndarray:
+    """Time one predict call per row, in microseconds."""
+    timings = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        predict(row)
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+
+def main() -> None:
+    """Print predict latency percentiles under every logging setup."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--engine", choices=["sklearn", "flat"], default="flat")
+    args = parser.parse_args()
+
+    model_setting.inference_engine = args.engine
+    service = ModelInferenceService()
+    service.load_model()
+    rows = make_features(args.requests).tolist()
+
+    print(
+        f"{args.requests} requests, {args.engine} engine, "
+        f"serving sample rate {logger_setting.log_sample_rate}",
+    )
+    print(
+        f"{'logging':8s} {'p50 us':>9s} {'p99 us':>9s} {'p99.9 us':>9s} "
+        f"{'total s':>8s}",
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        logger_setting.log_file = str(Path(tmp) / "app.log")
+        logger_setting.metrics_file = str(Path(tmp) / "metrics.jsonl")
+        for mode in ("off", "default", "serving"):
+            logger.remove()
+            if mode != "off":
+                configure_logging(log_level="DEBUG", mode=mode)
+            service.predict(rows[0])
+            timings = latencies(service.predict, rows)
+            p50, p99, p999 = np.percentile(timings, [50, 99, 99.9])
+            print(
+                f"{mode:8s} {p50:9.1f} {p99:9.1f} {p999:9.1f} "
+                f"{timings.sum() / 1e6:8.2f}",
+            )
+    logger.remove()
+
+
+if __name__ == "__main__":
+    main()
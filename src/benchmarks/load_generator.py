@@ -0,0 +1,117 @@
+"""
+Local load generator for the prediction server.
+
+Opens `concurrency` keep-alive connections to a running server
+(`python runner_server.py`), each sending POST /predict requests back to
+back for a fixed duration, and reports throughput, error counts and
+p50/p99 latency per concurrency level.
+
+Usage (from the src directory, with the server running):
+    python -m benchmarks.load_generator --concurrency 1 8 32 --duration 5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from benchmarks.predict_batch import make_features
+from config import server_setting
+
+FEATURE_NAMES = [
+    "area",
+    "constraction_year",
+    "bedrooms",
+    "garden",
+    "balcony_yes",
+    "parking_yes",
+    "furnished_yes",
+    "garage_yes",
+    "storage_yes",
+]
+
+
+async def _client(
+    host: str,
+    port: int,
+    payloads: list[bytes],
+    stop_at: float,
+    deadline_ms: float,
+) -> tuple[list[float], int]:
+    """Send requests on one connection until `stop_at`."""
+    reader, writer = await asyncio.open_connection(host, port)
+    latencies, errors, i = [], 0, 0
+    while time.perf_counter() < stop_at:
+        payload = payloads[i % len(payloads)]
+        i += 1
+        start = time.perf_counter()
+        writer.write(
+            b"POST /predict HTTP/1.1\r\n"
+            b"Content-Type: application/json\r\n"
+            + f"X-Deadline-Ms: {deadline_ms}\r\n".encode()
+            + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+            + payload,
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        length = 0
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+        if b" 200 " in status_line:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors += 1
+    writer.close()
+    return latencies, errors
+
+
+async def run_level(args, concurrency: int, payloads: list[bytes]) -> None:
+    """Run one concurrency level and print its results."""
+    stop_at = time.perf_counter() + args.duration
+    results = await asyncio.gather(
+        *(
+            _client(args.host, args.port, payloads, stop_at, args.deadline_ms)
+            for _ in range(concurrency)
+        ),
+    )
+    latencies = np.array([lat for lats, _ in results for lat in lats]) * 1e3
+    errors = sum(err for _, err in results)
+    p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0, 0)
+    print(
+        f"{concurrency:11d} {len(latencies) / args.duration:10.0f} "
+        f"{p50:9.2f} {p99:9.2f} {errors:7d}",
+    )
+
+
+async def main_async(args) -> None:
+    """Run every concurrency level in turn."""
+    payloads = [
+        json.dumps(dict(zip(FEATURE_NAMES, row.tolist()))).encode()
+        for row in make_features(1_000)
+    ]
+    print(
+        f"{'concurrency':>11s} {'req/s':>10s} {'p50 ms':>9s} {'p99 ms':>9s} {'errors':>7s}"
+    )
+    for concurrency in args.concurrency:
+        await run_level(args, concurrency, payloads)
+
+
+def main() -> None:
+    """Parse the arguments and generate the load."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default=server_setting.server_host)
+    parser.add_argument("--port", type=int, default=server_setting.server_port)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument(
+        "--deadline-ms", type=float, default=server_setting.server_deadline_ms
+    )
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark the model backends on synthetic listings of several sizes.
+
+For every size, fits the random forest with the hyperparameters of the
+bundled model and the gradient boosting backend with its defaults (early
+stopping sets the number of iterations) on 80% of the rows, then reports
+the fit time, the size of the pickled artifact, the single-row predict
+latency (sklearn and flat engines), the batch predict throughput and the
+R^2 on the other 20%.
+
+Usage (from the src directory):
+    python -m benchmarks.model_backends --sizes 10000 100000 1000000
+"""
+
+import argparse
+import pickle as pkl
+import time
+import warnings
+
+import numpy as np
+from loguru import logger
+from sklearn.ensemble import RandomForestRegressor
+
+from benchmarks.synthetic import make_listings
+from models.flat_forest import FlatForest
+from models.pipe.backends import count_trees, make_estimator
+from models.pipe.data_preparation import RentFeatureTransformer
+
+LATENCY_ROWS = 200
+
+
+def single_row_us(model, X: np.ndarray) -> float:
+    """Median latency of predicting one row, in us."""
+    timings = []
+    for row in X[:LATENCY_ROWS]:
+        start = time.perf_counter()
+        model.predict(row[None, :])
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+
+def main() -> None:
+    """Print one line per size and backend."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+    )
+    args = parser.parse_args()
+    logger.disable("models")
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    backends = {
+        "random_forest": lambda: RandomForestRegressor(
+            n_estimators=70,
+            max_depth=10,
+            n_jobs=-1,
+        ),
+        "hist_gradient_boosting": lambda: make_estimator("hist_gradient_boosting")[0],
+    }
+    print(
+        f"{'rows':>9s} {'backend':22s} {'trees':>6s} {'fit s':>8s} {'size MB':>8s} "
+        f"{'row us':>8s} {'flat us':>8s} {'batch r/s':>10s} {'R2':>7s}",
+    )
+    for rows in args.sizes:
+        listings = make_listings(rows)
+        transformer = RentFeatureTransformer().fit(listings)
+        X = transformer.transform(listings).astype(np.float32)
+        y = listings["rent"].to_numpy()
+        n_train = int(rows * 0.8)
+        X_train, X_test = X[:n_train], X[n_train:]
+        y_train, y_test = y[:n_train], y[n_train:]
+
+        for backend, make in backends.items():
+            model = make()
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit = time.perf_counter() - start
+            size_mb = len(pkl.dumps(model)) / 1e6
+
+            start = time.perf_counter()
+            model.predict(X_test)
+            batch = len(X_test) / (time.perf_counter() - start)
+            print(
+                f"{rows:9d} {backend:22s} {count_trees(model):6d} {fit:8.2f} "
+                f"{size_mb:8.2f} {single_row_us(model, X_test):8.1f} "
+                f"{single_row_us(FlatForest.from_estimator(model), X_test):8.1f} "
+                f"{batch:10.0f} {model.score(X_test, y_test):7.4f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
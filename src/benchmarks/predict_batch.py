@@ -0,0 +1,74 @@
+"""
+Benchmark batch prediction against the per-row predict loop.
+
+Scores the same random apartments once through `ModelInferenceService.predict`
+row by row and once through `ModelInferenceService.predict_batch`, and
+reports rows/sec for both.
+
+Usage (from the src directory):
+    python -m benchmarks.predict_batch --rows 5000 --chunk-size 10000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from loguru import logger
+
+from models.model_inference import ModelInferenceService
+
+
+def make_features(n_rows: int, seed: int = 0) -> np.ndarray:
+    """
+    Draw random apartments in training column order.
+
+    Args:
+        n_rows (int): Number of rows to generate.
+        seed (int): Random seed.
+
+    Returns:
+        np.ndarray: 2-D float array of shape (n_rows, 9).
+    """
+    rng = np.random.default_rng(seed)
+    return np.column_stack(
+        [
+            rng.uniform(20, 250, n_rows),  # area
+            rng.integers(1850, 2024, n_rows),  # constraction_year
+            rng.integers(1, 5, n_rows),  # bedrooms
+            rng.integers(0, 100, n_rows),  # garden
+            rng.integers(0, 2, (n_rows, 5)),  # yes/no amenities
+        ],
+    ).astype(np.float64)
+
+
+def main() -> None:
+    """Run the benchmark and print rows/sec for both code paths."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+
+    # keep log formatting out of the measurement for both paths
+    logger.disable("models")
+
+    ml_svc = ModelInferenceService()
+    ml_svc.load_model()
+    features = make_features(args.rows)
+
+    start = time.perf_counter()
+    loop_preds = np.array([ml_svc.predict(list(row))[0] for row in features])
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_preds = ml_svc.predict_batch(features, chunk_size=args.chunk_size)
+    batch_time = time.perf_counter() - start
+
+    assert np.allclose(loop_preds, batch_preds)
+    print(f"rows            : {args.rows}")
+    print(f"per-row loop    : {args.rows / loop_time:12,.0f} rows/sec")
+    print(f"predict_batch   : {args.rows / batch_time:12,.0f} rows/sec")
+    print(f"speedup         : {loop_time / batch_time:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark predict latency of the flat engine against sklearn.
+
+Times `RandomForestRegressor.predict` and `FlatForest.predict` on the
+configured model for batches of 1, 100 and 10k rows, checks that both
+return the same predictions, and reports p50/p99 latency per batch size.
+Both engines get the same float32 ndarray in training column order, as
+the inference service passes them (sklearn's feature-name check is
+silenced the same way).
+
+Usage (from the src directory):
+    python -m benchmarks.predict_latency --repeat 200
+"""
+
+import argparse
+import pickle as pk
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.predict_batch import make_features
+from config import model_setting
+from models.flat_forest import FlatForest
+
+BATCH_SIZES = (1, 100, 10_000)
+
+
+def latencies(predict, features: np.ndarray, repeat: int) -> np.ndarray:
+    """
+    Time `repeat` calls of `predict(features)` after one warm-up call.
+
+    Returns:
+        np.ndarray: Latency of every call in milliseconds.
+    """
+    predict(features)
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        predict(features)
+        timings[i] = time.perf_counter() - start
+    return timings * 1e3
+
+
+def main() -> None:
+    """Print p50/p99 latency of both engines for every batch size."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(Path(model_setting.model_path) / model_setting.model_name, "rb") as f:
+        forest = pk.load(f)
+    flat = FlatForest.from_estimator(forest)
+
+    print(f"{'rows':>6s} {'engine':8s} {'p50 ms':>9s} {'p99 ms':>9s}")
+    with warnings.catch_warnings():
+        # the matrix is already in training column order
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        for batch_size in BATCH_SIZES:
+            features = make_features(batch_size).astype(np.float32)
+            np.testing.assert_allclose(
+                flat.predict(features),
+                forest.predict(features),
+                rtol=1e-9,
+            )
+            # keep the 10k-row case to a reasonable wall time
+            repeat = max(10, args.repeat // (1 + batch_size // 1_000))
+            for engine, predict in (
+                ("sklearn", forest.predict),
+                ("flat", flat.predict),
+            ):
+                timings = latencies(predict, features, repeat)
+                p50, p99 = np.percentile(timings, [50, 99])
+                print(f"{batch_size:6d} {engine:8s} {p50:9.3f} {p99:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark the prediction cache on a skewed request distribution.
+
+Replays requests drawn from a Zipf distribution over a pool of distinct
+listings (a few listings get most of the traffic, like search pages and
+alerts re-scoring the same apartments) through
+`ModelInferenceService.predict`, with and without the cache.
+
+Usage (from the src directory):
+    python -m benchmarks.prediction_cache --requests 5000 --cache-size 1000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from loguru import logger
+
+from benchmarks.predict_batch import make_features
+from config import model_setting
+from models.model_inference import ModelInferenceService
+
+
+def replay(ml_svc: ModelInferenceService, requests: np.ndarray) -> float:
+    """Score every request one by one, returning the elapsed seconds."""
+    start = time.perf_counter()
+    for row in requests:
+        ml_svc.predict(row.tolist())
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Replay the same request stream with and without the cache."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--listings", type=int, default=10_000)
+    parser.add_argument("--zipf", type=float, default=1.2)
+    parser.add_argument("--cache-size", type=int, default=1_000)
+    args = parser.parse_args()
+
+    logger.disable("models")
+    pool = make_features(args.listings)
+    ranks = np.random.default_rng(1).zipf(args.zipf, args.requests)
+    requests = pool[(ranks - 1) % args.listings]
+
+    model_setting.prediction_cache_size = 0
+    plain = ModelInferenceService()
+    plain.load_model()
+    plain_time = replay(plain, requests)
+
+    model_setting.prediction_cache_size = args.cache_size
+    cached = ModelInferenceService()
+    cached.load_model()
+    cached_time = replay(cached, requests)
+
+    stats = cached.cache.stats()
+    print(f"requests : {args.requests} over {args.listings} listings, zipf {args.zipf}")
+    print(f"no cache : {args.requests / plain_time:10,.0f} req/s")
+    print(f"cache    : {args.requests / cached_time:10,.0f} req/s (size {args.cache_size})")
+    print(
+        f"hit rate : {stats['hit_rate']:.1%}  hits {stats['hits']}  "
+        f"misses {stats['misses']}  evictions {stats['evictions']}",
+    )
+
+
+if __name__ == "__main__":
+    main()
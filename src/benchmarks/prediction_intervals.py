@@ -0,0 +1,80 @@
+"""
+Benchmark interval predictions against plain predictions.
+
+For batches of 1, 100 and 10k rows, times on the configured model
+`ModelInferenceService.predict_batch`, `ModelInferenceService.predict_interval`
+(mean, std and the configured quantiles from one per-tree matrix) and the
+per-tree loop over `estimators_[i].predict` it replaces, checks that the
+interval mean equals the prediction, and reports the p50 latency of each
+and the overhead of intervals over plain predictions, for both engines.
+
+Usage (from the src directory):
+    python -m benchmarks.prediction_intervals --repeat 200
+"""
+
+import argparse
+import pickle as pk
+import warnings
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from benchmarks.predict_batch import make_features
+from benchmarks.predict_latency import latencies
+from config import model_setting
+from models.model_inference import ModelInferenceService
+
+BATCH_SIZES = (1, 100, 10_000)
+
+
+def tree_loop(forest, features: np.ndarray) -> np.ndarray:
+    """Mean, std and quantiles from one predict call per tree."""
+    leaves = np.stack([tree.predict(features) for tree in forest.estimators_])
+    return np.quantile(leaves, model_setting.interval_quantiles, axis=0)
+
+
+def main() -> None:
+    """Print p50 latency of the three code paths for every batch size."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    logger.disable("models")
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    with open(Path(model_setting.model_path) / model_setting.model_name, "rb") as f:
+        forest = pk.load(f)
+    print(f"quantiles {model_setting.interval_quantiles}")
+    print(
+        f"{'rows':>6s} {'engine':8s} {'predict ms':>11s} {'interval ms':>12s} "
+        f"{'overhead':>9s} {'tree loop ms':>13s}",
+    )
+    for engine in ("sklearn", "flat"):
+        model_setting.inference_engine = engine
+        service = ModelInferenceService()
+        service.load_model()
+        for batch_size in BATCH_SIZES:
+            features = make_features(batch_size).astype(np.float32)
+            np.testing.assert_allclose(
+                service.predict_interval(features).mean,
+                service.predict_batch(features),
+                rtol=1e-9,
+            )
+            # keep the 10k-row case to a reasonable wall time
+            repeat = max(10, args.repeat // (1 + batch_size // 1_000))
+            predict, interval, loop = (
+                np.percentile(latencies(call, features, repeat), 50)
+                for call in (
+                    service.predict_batch,
+                    service.predict_interval,
+                    lambda rows: tree_loop(forest, rows),
+                )
+            )
+            print(
+                f"{batch_size:6d} {engine:8s} {predict:11.3f} {interval:12.3f} "
+                f"{interval / predict:8.2f}x {loop:13.3f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark the RentFeatureTransformer against the legacy preprocessing.
+
+The legacy path is the previous `prepare_data` body: `pd.get_dummies`,
+a per-row `re.findall` on the garden column and a `LabelBinarizer`
+refitted on each dummy column. Both run on the same synthetic table.
+
+Usage (from the src directory):
+    python -m benchmarks.preprocessing --rows 1000000
+"""
+
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sklearn.preprocessing import LabelBinarizer
+
+from benchmarks.synthetic import make_listings
+from models.pipe.data_preparation import RentFeatureTransformer
+
+DUMMY_COLS = ["balcony", "parking", "furnished", "garage", "storage"]
+
+
+def legacy_prepare(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """
+    Run the preprocessing steps as they were before the transformer.
+
+    Args:
+        dataframe (pd.DataFrame): Raw listings.
+
+    Returns:
+        pd.DataFrame: The prepared listings.
+    """
+    df = pd.get_dummies(dataframe, columns=DUMMY_COLS, drop_first=True)
+    df["garden"] = df["garden"].apply(
+        lambda x: 0 if x == "Not present" else int(re.findall(r"\d+", x)[0])
+    )
+    label_binarizer = LabelBinarizer()
+    for col in [f"{col}_yes" for col in DUMMY_COLS]:
+        df[col] = label_binarizer.fit_transform(df[col])
+    return df
+
+
+def main() -> None:
+    """Run both preprocessing paths and print their timings."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    logger.disable("models")
+    listings = make_listings(args.rows)
+
+    start = time.perf_counter()
+    legacy = legacy_prepare(listings.copy())
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    transformer = RentFeatureTransformer().fit(listings)
+    features = transformer.transform(listings)
+    new_time = time.perf_counter() - start
+
+    names = list(transformer.get_feature_names_out())
+    assert np.allclose(legacy[names].to_numpy(dtype=np.float32), features)
+    print(f"rows                   : {args.rows:,}")
+    print(f"legacy preprocessing   : {legacy_time:8.2f} s")
+    print(f"RentFeatureTransformer : {new_time:8.2f} s")
+    print(f"speedup                : {legacy_time / new_time:8.1f}x")
+    print(f"output                 : {features.dtype}, {features.nbytes:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark the hyperparameter search strategies on the bundled dataset.
+
+Runs `make_search` with every strategy over the `GRID_PARAM` space on the
+training split of the SQLite table, and reports wall time, number of
+candidates, best cross-validation score and R^2 on the test split.
+
+Usage (from the src directory):
+    python -m benchmarks.search_strategies --time-budget 20
+"""
+
+import argparse
+import time
+
+from loguru import logger
+from sklearn.ensemble import RandomForestRegressor
+
+from config import model_setting
+from models.pipe.backends import GRID_PARAM
+from models.pipe.data_preparation import RentFeatureTransformer, prepare_data
+from models.pipe.model import _get_X_y, _split_train_test
+from models.pipe.search import make_search
+
+# (label, strategy, halving resource)
+RUNS = [
+    ("grid", "grid", None),
+    ("halving n_samples", "halving", "n_samples"),
+    ("halving n_estimators", "halving", "n_estimators"),
+    ("random (time budget)", "random", None),
+]
+
+
+def main() -> None:
+    """Run every strategy and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--time-budget", type=float, default=20.0)
+    parser.add_argument("--skip-grid", action="store_true")
+    args = parser.parse_args()
+
+    logger.disable("models")
+    model_setting.search_time_budget = args.time_budget
+    # every strategy is timed fitting its candidates
+    model_setting.cv_cache_enabled = False
+
+    transformer = RentFeatureTransformer()
+    data = prepare_data(transformer=transformer)
+    X, y = _get_X_y(data, col_x=list(transformer.get_feature_names_out()))
+    X_train, X_test, y_train, y_test = _split_train_test(X, y)
+
+    print(f"{'strategy':22s} {'time':>8s} {'cands':>6s} {'cv best':>8s} {'test R2':>8s}")
+    for label, strategy, resource in RUNS:
+        if args.skip_grid and strategy == "grid":
+            continue
+        if resource:
+            model_setting.search_resource = resource
+        search = make_search(
+            RandomForestRegressor(random_state=0),
+            param_grid=GRID_PARAM,
+            strategy=strategy,
+        )
+        start = time.perf_counter()
+        search.fit(X_train, y_train)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:22s} {elapsed:7.1f}s {len(search.cv_results_['params']):6d} "
+            f"{search.best_score_:8.4f} {search.score(X_test, y_test):8.4f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
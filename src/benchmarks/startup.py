@@ -0,0 +1,70 @@
+"""
+Benchmark the cold start of the inference and builder entry points.
+
+Each measurement runs in a fresh interpreter, so nothing is cached in
+`sys.modules`. Reports the median wall time of the full
+`runner_inference.py` run and of importing the service modules.
+
+Usage (from the src directory):
+    python -m benchmarks.startup --repeat 5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+COMMANDS = {
+    "runner_inference.py": ["runner_inference.py"],
+    "import models.model_inference": ["-c", "import models.model_inference"],
+    "import models.model_builder": ["-c", "import models.model_builder"],
+}
+
+
+def time_command(args: list[str], repeat: int, timeout: float) -> list[float]:
+    """
+    Run a python command in fresh interpreters and time each run.
+
+    Args:
+        args (list[str]): Arguments passed to the python executable.
+        repeat (int): Number of runs.
+        timeout (float): Seconds after which a run is abandoned.
+
+    Returns:
+        list[float]: Wall time of each run in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-W", "ignore", *args],
+            check=True,
+            capture_output=True,
+            timeout=timeout,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> None:
+    """Time every command and print the median and best runs."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    for name, command in COMMANDS.items():
+        try:
+            timings = time_command(command, args.repeat, args.timeout)
+        except subprocess.TimeoutExpired:
+            print(f"{name:32s}: timed out after {args.timeout:.0f} s")
+            continue
+        print(
+            f"{name:32s}: median {statistics.median(timings):6.3f} s"
+            f"  best {min(timings):6.3f} s",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Synthetic RentApartments rows for benchmarks.
+
+The generator mimics the bundled Amsterdam listings: garden strings such as
+"Present (25 m²)", yes/no amenity columns, energy labels and a rent that
+depends on the features, so models trained on it behave like real ones.
+"""
+
+import numpy as np
+import pandas as pd
+
+ENERGY_LABELS = ["A", "B", "C", "D", "E", "F", "G", "None"]
+FACILITIES = [
+    "Shower, Toilet",
+    "Shower, Bath, Toilet",
+    "Cable TV, Internet connection, Bath, Toilet",
+    "Roof terrace",
+]
+ORIENTATIONS = ["", ", located on the south", ", located on the north-west"]
+AMENITY_RATES = {
+    "balcony": 0.46,
+    "storage": 0.15,
+    "parking": 0.31,
+    "furnished": 0.72,
+    "garage": 0.09,
+}
+
+
+def make_listings(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate synthetic rows with the columns of the RentApartments table.
+
+    Args:
+        n_rows (int): Number of rows to generate.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: One row per synthetic apartment.
+    """
+    rng = np.random.default_rng(seed)
+    area = rng.gamma(4.0, 20.0, n_rows).clip(15, 400).round(1)
+    rooms = rng.integers(1, 8, n_rows)
+    bedrooms = np.minimum(rooms, rng.integers(1, 6, n_rows))
+    zip_codes = np.char.add(
+        rng.integers(1011, 1109, n_rows).astype(str),
+        " AB",
+    )
+    neighborhoods = np.char.add("Buurt ", rng.integers(0, 280, n_rows).astype(str))
+
+    garden_size = rng.integers(5, 300, n_rows)
+    has_garden = rng.random(n_rows) < 0.05
+    garden = np.where(
+        has_garden,
+        np.char.add(
+            np.char.add("Present (", garden_size.astype(str)),
+            np.char.add(
+                np.char.add(" m²", rng.choice(ORIENTATIONS, n_rows)),
+                ")",
+            ),
+        ),
+        "Not present",
+    )
+
+    amenities = {
+        col: np.where(rng.random(n_rows) < rate, "yes", "no")
+        for col, rate in AMENITY_RATES.items()
+    }
+    rent = (
+        300
+        + 22 * area
+        + 150 * bedrooms
+        + 400 * (amenities["furnished"] == "yes")
+        + 250 * (amenities["parking"] == "yes")
+        + 3 * np.where(has_garden, garden_size, 0)
+        + rng.normal(0, 250, n_rows)
+    ).clip(500, 9000).astype(np.int64)
+
+    return pd.DataFrame(
+        {
+            "address": np.char.add(
+                np.char.add(zip_codes, " Amsterdam #"),
+                np.arange(n_rows).astype(str),
+            ),
+            "area": area,
+            "constraction_year": rng.integers(1850, 2021, n_rows),
+            "rooms": rooms,
+            "bedrooms": bedrooms,
+            "bathrooms": rng.integers(1, 4, n_rows),
+            **amenities,
+            "garden": garden,
+            "energy": rng.choice(ENERGY_LABELS, n_rows),
+            "facilities": rng.choice(FACILITIES, n_rows),
+            "zip": zip_codes,
+            "neighborhood": neighborhoods,
+            "rent": rent,
+        },
+    )
@@ -0,0 +1,88 @@
+"""
+Benchmark the scaling of the process-pool grid search with the core count.
+
+Trains on synthetic listings prepared by `RentFeatureTransformer` and runs
+`ProcessPoolGridSearch` over a small grid with 1, 2, 4, ... worker
+processes up to the number of cores, then the joblib `GridSearchCV` with
+`n_jobs=-1` as the baseline. Reports wall time, speedup and parallel
+efficiency against one process, and the CPU utilization of the search.
+
+Usage (from the src directory):
+    python -m benchmarks.training_scaling --rows 20000
+"""
+
+import argparse
+import os
+import time
+
+from loguru import logger
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import GridSearchCV
+
+from benchmarks.synthetic import make_listings
+from models.pipe.data_preparation import RentFeatureTransformer
+from models.pipe.executor import ProcessPoolGridSearch
+
+PARAM_GRID = {"n_estimators": [50, 100], "max_depth": [8, 16]}
+
+
+def worker_counts(n_cores: int) -> list[int]:
+    """Return 1, 2, 4, ... up to and including `n_cores`."""
+    counts, count = [], 1
+    while count < n_cores:
+        counts.append(count)
+        count *= 2
+    return counts + [n_cores]
+
+
+def main() -> None:
+    """Run the search with every worker count and print a scaling table."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--inner-jobs", type=int, default=1)
+    args = parser.parse_args()
+
+    logger.disable("models")
+    listings = make_listings(args.rows)
+    transformer = RentFeatureTransformer().fit(listings)
+    X, y = transformer.transform(listings), listings["rent"].to_numpy()
+    n_cores = os.cpu_count() or 1
+
+    print(f"{args.rows} rows, {n_cores} cores, grid {PARAM_GRID}")
+    print(
+        f"{'executor':14s} {'workers':>7s} {'wall s':>8s} {'speedup':>8s} "
+        f"{'effic.':>7s} {'CPU use':>8s}",
+    )
+    baseline = None
+    for outer_jobs in worker_counts(n_cores):
+        search = ProcessPoolGridSearch(
+            RandomForestRegressor(random_state=0),
+            param_grid=PARAM_GRID,
+            outer_jobs=outer_jobs,
+            inner_jobs=args.inner_jobs,
+        )
+        start = time.perf_counter()
+        search.fit(X, y)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(
+            f"{'process_pool':14s} {outer_jobs:7d} {elapsed:8.1f} {speedup:7.2f}x "
+            f"{speedup / outer_jobs:7.0%} "
+            f"{search.stage_stats_['search']['cpu_utilization']:8.0%}",
+        )
+
+    start = time.perf_counter()
+    GridSearchCV(RandomForestRegressor(random_state=0), PARAM_GRID, n_jobs=-1).fit(
+        X,
+        y,
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"{'joblib':14s} {n_cores:7d} {elapsed:8.1f} "
+        f"{baseline / elapsed:7.2f}x {'':>7s} {'':>8s}",
+    )
+
+
+if __name__ == "__main__":
+    main()
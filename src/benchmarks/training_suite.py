@@ -0,0 +1,320 @@
+"""
+Training benchmark suite: pipeline stages and full builds at several sizes.
+
+`run` writes synthetic listings (see `benchmarks.synthetic`) of every
+requested size to a temporary SQLite table and runs `build_model` on it,
+each size in a fresh process so peak memory is not inherited from the
+previous one. The wall time, CPU time and peak resident memory of every
+stage, as recorded by the `Stage` instrumentation, go to a JSON results
+file together with the environment and the training settings. Sizes
+above `--train-up-to` only run the data preparation stage.
+
+`compare` matches two results files stage by stage and size by size,
+prints the time and memory ratios and exits with status 1 when a stage
+got slower, or heavier, by more than the threshold, so it can gate a
+deployment.
+
+Usage (from the src directory):
+    python -m benchmarks.training_suite run --search-strategy halving
+    python -m benchmarks.training_suite run --sizes 10000000 --train-up-to 0
+    python -m benchmarks.training_suite compare base.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+FORMAT_VERSION = 1
+RESULTS_DIR = Path("benchmarks/results")
+# settings a results file was measured with, compared by `compare`
+SUITE_SETTINGS = (
+    "search_strategy",
+    "search_resource",
+    "search_factor",
+    "train_executor",
+    "train_outer_jobs",
+    "train_inner_jobs",
+)
+WRITE_CHUNK_ROWS = 500_000
+# stages this fast are dominated by noise and never flagged
+MIN_SECONDS = 0.05
+MIN_MB = 16.0
+
+
+def measure(rows: int, train: bool, seed: int, out: Path, settings: dict) -> None:
+    """
+    Build a synthetic table of `rows` rows and record the stage metrics.
+
+    Runs in the child process started by `run_suite` for every size.
+    """
+    from loguru import logger
+
+    from benchmarks.synthetic import make_listings
+    from config import db_settings, get_engine, model_setting
+    from models.instrumentation import Stage
+    from models.pipe.data_collection import max_rowid
+
+    records = []
+    logger.remove()
+    logger.add(
+        lambda message: records.append(json.loads(message.record["extra"]["metric"])),
+        filter=lambda record: "metric" in record["extra"],
+        level="INFO",
+    )
+    for name, value in settings.items():
+        setattr(model_setting, name, value)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_settings.db_conn_str = f"sqlite:///{Path(tmp) / 'db.sqlite'}"
+        model_setting.model_path = Path(tmp)
+        model_setting.feature_store_enabled = False
+        model_setting.cv_cache_enabled = False
+
+        with Stage("write_table", rows=rows):
+            for i, start in enumerate(range(0, rows, WRITE_CHUNK_ROWS)):
+                make_listings(min(WRITE_CHUNK_ROWS, rows - start), seed + i).to_sql(
+                    db_settings.rent_apart_table_name,
+                    get_engine(),
+                    if_exists="append",
+                    index=False,
+                    chunksize=50_000,
+                )
+        if train:
+            from models.pipe.model import build_model
+
+            build_model()
+        else:
+            from models.pipe.data_preparation import (
+                RentFeatureTransformer,
+                prepare_data,
+            )
+
+            with Stage("prepare_data") as stage:
+                stage.rows = len(
+                    prepare_data(
+                        transformer=RentFeatureTransformer(),
+                        until_rowid=max_rowid(),
+                    ),
+                )
+
+    results = [
+        {
+            "rows": rows,
+            "stage": record["name"],
+            "stage_rows": record["rows"],
+            "wall_time": record["wall_time"],
+            "cpu_time": record["cpu_time"],
+            "peak_rss_mb": record["peak_rss_mb"],
+        }
+        for record in records
+        if record["kind"] == "stage" and record["status"] == "ok"
+    ]
+    out.write_text(json.dumps(results))
+
+
+def environment() -> dict:
+    """Describe the machine, library versions and code version."""
+    import numpy
+    import pandas
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_suite(args: argparse.Namespace) -> Path:
+    """Measure every size in its own process and write the results file."""
+    from config import model_setting
+
+    settings = {name: getattr(model_setting, name) for name in SUITE_SETTINGS}
+    if args.search_strategy:
+        settings["search_strategy"] = args.search_strategy
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            train = rows <= args.train_up_to
+            print(f"{rows} rows ({'full build' if train else 'prepare_data'}) ...")
+            part = Path(tmp) / f"{rows}.json"
+            start = time.perf_counter()
+            child = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.training_suite",
+                    "measure",
+                    str(rows),
+                    str(part),
+                    "--seed",
+                    str(args.seed),
+                    *(["--train"] if train else []),
+                    "--settings",
+                    json.dumps(settings),
+                ],
+                capture_output=True,
+                text=True,
+            )
+            if child.returncode:
+                sys.stderr.write(child.stderr)
+                raise SystemExit(f"measuring {rows} rows failed")
+            results.extend(json.loads(part.read_text()))
+            print(f"    done in {time.perf_counter() - start:.1f} s")
+
+    out = args.out
+    if out is None:
+        env = environment()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        out = RESULTS_DIR / f"training_{stamp}_{env['commit'] or 'nocommit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(
+        json.dumps(
+            {
+                "format_version": FORMAT_VERSION,
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "seed": args.seed,
+                "environment": environment(),
+                "settings": settings,
+                "results": results,
+            },
+            indent=2,
+        ),
+    )
+    print_results(results)
+    print(f"results written to {out}")
+    return out
+
+
+def print_results(results: list[dict]) -> None:
+    """Print one line per size and stage."""
+    print(f"{'rows':>10s} {'stage':18s} {'wall s':>9s} {'cpu s':>9s} {'peak MB':>9s}")
+    for result in results:
+        print(
+            f"{result['rows']:10d} {result['stage']:18s} {result['wall_time']:9.2f} "
+            f"{result['cpu_time']:9.2f} {result['peak_rss_mb']:9.1f}",
+        )
+
+
+def compare(base_path: Path, new_path: Path, threshold: float) -> int:
+    """
+    Compare two results files and report the regressions.
+
+    Returns:
+        int: Number of (size, stage) pairs slower or heavier than the base
+        by more than `threshold` (a fraction).
+    """
+    base, new = (json.loads(Path(path).read_text()) for path in (base_path, new_path))
+    for section in ("environment", "settings"):
+        for key in sorted(set(base[section]) | set(new[section])):
+            old_value, new_value = base[section].get(key), new[section].get(key)
+            if old_value != new_value and key != "commit":
+                print(f"warning: {section} {key} differs: {old_value} -> {new_value}")
+    print(
+        f"{base['environment']['commit']} -> {new['environment']['commit']}, "
+        f"threshold {threshold:.0%}",
+    )
+
+    base_results = {(r["rows"], r["stage"]): r for r in base["results"]}
+    print(
+        f"{'rows':>10s} {'stage':18s} {'base s':>9s} {'new s':>9s} {'time':>7s} "
+        f"{'base MB':>9s} {'new MB':>9s} {'memory':>7s}",
+    )
+    regressions = matched = 0
+    for result in new["results"]:
+        old = base_results.get((result["rows"], result["stage"]))
+        if old is None:
+            continue
+        matched += 1
+        time_ratio = result["wall_time"] / max(old["wall_time"], 1e-9)
+        memory_ratio = result["peak_rss_mb"] / max(old["peak_rss_mb"], 1e-9)
+        slower = (
+            time_ratio > 1 + threshold
+            and result["wall_time"] - old["wall_time"] > MIN_SECONDS
+        )
+        heavier = (
+            memory_ratio > 1 + threshold
+            and result["peak_rss_mb"] - old["peak_rss_mb"] > MIN_MB
+        )
+        regressions += slower or heavier
+        flag = "  REGRESSION" if slower or heavier else ""
+        print(
+            f"{result['rows']:10d} {result['stage']:18s} {old['wall_time']:9.2f} "
+            f"{result['wall_time']:9.2f} {time_ratio:6.2f}x "
+            f"{old['peak_rss_mb']:9.1f} {result['peak_rss_mb']:9.1f} "
+            f"{memory_ratio:6.2f}x{flag}",
+        )
+    if not matched:
+        print("warning: the files have no size and stage in common")
+    print(f"{regressions} regression(s) in {matched} stage(s) compared")
+    return regressions
+
+
+def main() -> None:
+    """Parse the command line and run, measure or compare."""
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite and write a results file")
+    run.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+    )
+    run.add_argument(
+        "--train-up-to",
+        type=int,
+        default=100_000,
+        help="largest size running the full build, larger ones only prepare",
+    )
+    run.add_argument("--search-strategy", choices=["grid", "halving", "random"])
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--out", type=Path, help=f"results file, in {RESULTS_DIR}")
+
+    child = commands.add_parser("measure", help="measure one size (internal)")
+    child.add_argument("rows", type=int)
+    child.add_argument("out", type=Path)
+    child.add_argument("--seed", type=int, default=0)
+    child.add_argument("--train", action="store_true")
+    child.add_argument("--settings", type=json.loads, default={})
+
+    diff = commands.add_parser("compare", help="compare two results files")
+    diff.add_argument("base", type=Path)
+    diff.add_argument("new", type=Path)
+    diff.add_argument("--threshold", type=float, default=0.15)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run_suite(args)
+    elif args.command == "measure":
+        measure(args.rows, args.train, args.seed, args.out, args.settings)
+    else:
+        sys.exit(1 if compare(args.base, args.new, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
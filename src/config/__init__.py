@@ -1,6 +1,23 @@
-from .db import db_settings, engine
-from .logger import configure_logging
+from .db import db_settings, get_engine
+from .logger import configure_logging, log_request_sampled, logger_setting
 from .model import model_setting
+from .server import server_setting
 
 # add unused imports to list making them available for import solving Ruff.
-__all__ = ["db_settings", "engine", "configure_logging", "model_setting"]
+__all__ = [
+    "db_settings",
+    "get_engine",
+    "engine",
+    "configure_logging",
+    "log_request_sampled",
+    "logger_setting",
+    "model_setting",
+    "server_setting",
+]
+
+
+def __getattr__(name: str):
+    """Create the database engine only when `config.engine` is accessed."""
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,10 +3,17 @@ This module sets up the database configuration.
 
 It utilizes Pydantic's BaseSettings for configuration management,
 allowing settings to be read from environment variables and a .env file.
+
+For SQLite databases every new connection is tuned with the configured
+pragmas (journal mode, synchronous, page cache, memory map and busy
+timeout), and the reading paths can go through a separate engine opened
+with a read-only URI, so training, batch scoring and other readers
+never take a write lock and, in WAL mode, never block the writer.
 """
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from sqlalchemy import create_engine
 
 
 class DbSettings(BaseSettings):
@@ -18,6 +25,28 @@ class DbSettings(BaseSettings):
         db_conn_str (str): Database connfication string.
         rent_apart_table_name (str): Name of rental apartments table
         in the database.
+        read_chunk_size (int): Number of rows fetched per chunk when
+        streaming the table.
+        predictions_table_name (str): Name of the table receiving the
+        predictions of the batch scoring job.
+        ingest_chunk_size (int): Rows coerced and upserted per transaction
+        by the bulk ingestion.
+        db_pool_size (int): Connections kept open by the engine pool.
+        db_max_overflow (int): Connections opened beyond the pool size
+        under load, closed when returned.
+        db_read_only_reads (bool): Open the reading paths through a
+        read-only SQLite URI (`mode=ro`).
+        sqlite_journal_mode (str | None): Journal mode set by the writing
+        engine, "wal" lets readers run during a write; unset (the
+        default) keeps the mode of the database file.
+        sqlite_synchronous (str | None): Sync level of the connections,
+        "normal" is safe in WAL mode.
+        sqlite_cache_size (int | None): Page cache of each connection,
+        in KiB when negative (SQLite convention), in pages otherwise.
+        sqlite_mmap_size (int | None): Bytes of the database file read
+        through a memory map, 0 disables it.
+        sqlite_busy_timeout (int): Milliseconds a connection waits on a
+        locked database before failing.
     """
 
     model_config = SettingsConfigDict(
@@ -29,9 +58,126 @@ class DbSettings(BaseSettings):
 
     db_conn_str: str
     rent_apart_table_name: str
+    read_chunk_size: int = 50_000
+    predictions_table_name: str = "rent_predictions"
+    ingest_chunk_size: int = 50_000
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_read_only_reads: bool = True
+    sqlite_journal_mode: (
+        Literal["delete", "truncate", "persist", "memory", "wal", "off"] | None
+    ) = None
+    sqlite_synchronous: Literal["off", "normal", "full", "extra"] | None = "normal"
+    sqlite_cache_size: int | None = -65_536
+    sqlite_mmap_size: int | None = 268_435_456
+    sqlite_busy_timeout: int = 5_000
 
 
 db_settings = DbSettings()
 
+# engines created by get_engine, keyed by read_only
+_engines = {}
+
+
+def get_engine(read_only: bool = False):
+    """
+    Create the SQLAlchemy engine on first use and reuse it afterwards.
+
+    Importing the config package stays cheap for processes, such as
+    inference workers, that never touch the database.
+
+    Args:
+        read_only (bool): Return the engine of the reading paths, opened
+            with a read-only URI on a SQLite file when
+            `db_read_only_reads` is set (the read-write engine otherwise).
+
+    Returns:
+        Engine: The application database engine.
+    """
+    read_only = bool(read_only and db_settings.db_read_only_reads)
+    if read_only not in _engines:
+        _engines[read_only] = _create_engine(read_only)
+    return _engines[read_only]
+
+
+def _create_engine(read_only: bool):
+    """Create the read-write or the read-only engine."""
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.engine import make_url
+
+    url = make_url(db_settings.db_conn_str)
+    sqlite_file = url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+    if read_only and not sqlite_file:
+        # server databases manage access by user, in-memory ones live in
+        # a single connection: readers share the read-write engine
+        return get_engine()
+    if url.get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            pool_size=db_settings.db_pool_size,
+            max_overflow=db_settings.db_max_overflow,
+            pool_pre_ping=True,
+        )
+    if not sqlite_file:
+        return create_engine(url)
+
+    if read_only:
+        database = url.database
+        if not database.startswith("file:"):
+            database = f"file:{database}"
+        url = url.set(
+            database=database,
+            query={**url.query, "mode": "ro", "uri": "true"},
+        )
+    engine = create_engine(
+        url,
+        pool_size=db_settings.db_pool_size,
+        max_overflow=db_settings.db_max_overflow,
+        connect_args={"timeout": db_settings.sqlite_busy_timeout / 1000},
+    )
+    event.listen(
+        engine,
+        "connect",
+        lambda dbapi_conn, _: _set_sqlite_pragmas(dbapi_conn, read_only),
+    )
+    return engine
+
+
+def dispose_engines() -> None:
+    """
+    Close the pooled connections and forget the engines.
+
+    The next `get_engine` call creates them again from the current
+    settings, e.g. after changing them or in a forked child process.
+    """
+    for engine in set(_engines.values()):
+        engine.dispose()
+    _engines.clear()
+
+
+def _set_sqlite_pragmas(dbapi_conn, read_only: bool) -> None:
+    """Apply the configured pragmas to a new SQLite connection."""
+    pragmas = {
+        # the journal mode is stored in the file, only a writer changes it
+        "journal_mode": None if read_only else db_settings.sqlite_journal_mode,
+        "synchronous": db_settings.sqlite_synchronous,
+        "cache_size": db_settings.sqlite_cache_size,
+        "mmap_size": db_settings.sqlite_mmap_size,
+        "busy_timeout": db_settings.sqlite_busy_timeout,
+    }
+    cursor = dbapi_conn.cursor()
+    for name, value in pragmas.items():
+        if value is not None:
+            cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
 
-engine = create_engine(db_settings.db_conn_str)
+def __getattr__(name: str):
+    """Keep `db.engine` available as a lazily created attribute."""
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
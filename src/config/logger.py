@@ -3,8 +3,20 @@ This module sets up the logger configuration.
 
 It utilizes Pydantic's BaseSettings for configuration management,
 allowing settings to be read from environment variables and a .env file.
+
+Two modes are available. "default" writes every record. "serving" is
+meant for the inference hot path: exception records skip the variable
+dump and per-request records are only emitted for a sampled fraction of
+the requests (`log_request_sampled`). Both write synchronously: loguru's
+`enqueue` pickles every record and writes it to a pipe in the calling
+thread, which costs the logged requests more than the buffered file
+write it replaces.
 """
 
+import random
+import sys
+from typing import Literal
+
 from loguru import logger
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,6 +28,12 @@ class LoggerSettings(BaseSettings):
     Attributes:
         model_config (SettingsConfigDict): Model config, Load from .env file.
         log_level (str): Logging level for the application.
+        log_file (str): Application log file.
+        log_mode (str): "default" or "serving" (sampled per-request
+        records).
+        log_sample_rate (float): Fraction of the requests whose
+        per-request records are emitted in serving mode.
+        metrics_file (str): JSON lines file receiving the metric records.
     """
 
     model_config = SettingsConfigDict(
@@ -26,28 +44,74 @@ class LoggerSettings(BaseSettings):
     )
 
     log_level: str
+    log_file: str = "logs/app.log"
+    log_mode: Literal["default", "serving"] = "default"
+    log_sample_rate: float = 0.01
+    metrics_file: str = "logs/metrics.jsonl"
+
+
+logger_setting = LoggerSettings()
+
+# fraction of the requests logged, set by configure_logging
+_request_sample_rate = 1.0
+
+
+def log_request_sampled() -> bool:
+    """
+    Tell whether the current request should emit its per-request records.
 
+    Returns:
+        bool: Always True in default mode, True for a random
+        `log_sample_rate` fraction of the calls in serving mode.
+    """
+    return _request_sample_rate >= 1.0 or random.random() < _request_sample_rate
 
-def configure_logging(log_level: str) -> None:
+
+def configure_logging(
+    log_level: str | None = None,
+    mode: str | None = None,
+) -> None:
     """
     Configure the logging for the application.
 
+    Entry points call this explicitly, importing the config package
+    does not add any sink. Records logged with a `metric` extra (see
+    `models.instrumentation`) are also written, as bare JSON lines,
+    to the metrics file.
+
     Arg:
-        log_level (str): The log level to be set for the logger.
+        log_level (str | None): The log level to be set for the logger,
+        defaults to the LOG_LEVEL setting.
+        mode (str | None): "default" or "serving", defaults to the
+        LOG_MODE setting.
 
     Returns:
         None
     """
+    global _request_sample_rate
+    log_level = log_level or logger_setting.log_level
+    mode = mode or logger_setting.log_mode
+    serving = mode == "serving"
+    _request_sample_rate = logger_setting.log_sample_rate if serving else 1.0
+    options = {"diagnose": not serving}
 
     # to remove the console output from loguru showing it only in the log file
     # logger.remove()
+    if serving:
+        # the default console sink takes every record, DEBUG included
+        logger.remove()
+        logger.add(sys.stderr, level="INFO", **options)
     logger.add(
-        "logs/app.log",
+        logger_setting.log_file,
         rotation="1 week",
         retention="2 weeks",
         level=log_level,
+        **options,
+    )
+    logger.add(
+        logger_setting.metrics_file,
+        format="{extra[metric]}",
+        filter=lambda record: "metric" in record["extra"],
+        level="INFO",
+        **options,
     )
-
-
-# intializing the setting an logging configure
-configure_logging(log_level=LoggerSettings().log_level)
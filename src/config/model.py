@@ -5,6 +5,8 @@ It utilizes Pydantic's BaseSettings for configuration management,
 allowing settings to be read from environment variables and a .env file.
 """
 
+from typing import Literal
+
 from pydantic import DirectoryPath
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -17,6 +19,86 @@ class ModelSettings(BaseSettings):
         model_config (SettingsConfigDict): Model config, Load from .env file.
         model_path (DirectoryPath): Path to the model directory.
         model_name (str): Name of the model file.
+        preprocessor_name (str): Name of the fitted feature transformer file.
+        feature_schema_name (str): Name of the feature schema file (input
+        names, order and kinds) saved with the model.
+        model_format (str): Artifact format loaded for inference, "pickle"
+        or "npy" (memory-mapped flat node arrays, pickle as fallback).
+        inference_engine (str): Predictor used for inference, "sklearn" or
+        "flat" (the forest walked as flat NumPy arrays, faster than
+        sklearn up to about 2k rows per call, slower beyond).
+        prediction_cache_size (int): Predictions kept in the in-process
+        LRU cache, 0 disables the cache.
+        prediction_cache_ttl (float | None): Seconds a cached prediction
+        stays valid, unset keeps it until evicted.
+        batch_chunk_size (int): Number of rows scored per forest predict
+        call in batch inference.
+        interval_quantiles (list[float]): Quantiles of the per-tree
+        predictions returned by interval predictions, in [0, 1].
+        explain_enabled (bool): Summarize the tree paths when a model is
+        loaded, so its predictions can be explained (TreeSHAP).
+        model_backend (str): Estimator trained by the pipeline,
+        "random_forest" or "hist_gradient_boosting".
+        hgb_max_iter (int): Most boosting iterations of the gradient
+        boosting backend.
+        hgb_max_bins (int): Bins every feature is discretized into before
+        the gradient boosting backend searches splits, at most 255.
+        hgb_validation_fraction (float): Share of the training rows held
+        out to early-stop the gradient boosting backend.
+        hgb_n_iter_no_change (int): Iterations without improvement of the
+        held-out loss after which boosting stops.
+        search_strategy (str): Hyperparameter search, "grid", "halving"
+        or "random".
+        search_resource (str): Budget grown by successive halving,
+        "n_samples" or "n_estimators".
+        search_factor (int): Halving factor between successive rounds.
+        search_time_budget (float): Seconds the random search may spend.
+        search_n_iter (int | None): Maximum candidates of the random search.
+        search_random_state (int): Seed of the halving and random searches.
+        train_executor (str): Runs the grid search with sklearn's "joblib"
+        backend or on a "process_pool" sharing the data in shared memory.
+        train_outer_jobs (int): Processes fitting (candidate, fold) pairs
+        at once on the process pool, -1 uses cores // train_inner_jobs.
+        train_inner_jobs (int): Threads building the trees of each forest
+        on the process pool.
+        training_mode (str): "full" rebuilds and re-searches the model,
+        "incremental" grows the saved forest with the new rows only.
+        training_state_name (str): Name of the training state file (row
+        watermark, chosen hyperparameters, score of the last full search).
+        full_search_every_days (float): Age of the last full search after
+        which an incremental run rebuilds the model instead.
+        drift_threshold (float): Drop of R^2 on the new rows, below the
+        score of the last full search, that triggers a full rebuild.
+        incremental_min_rows (int): New rows needed before an incremental
+        run adds trees, fewer are left for the next run.
+        feature_store_enabled (bool): Cache the prepared training data on
+        disk, keyed by a fingerprint of the table and preprocessing code.
+        feature_store_path (str): Directory of the feature store.
+        feature_store_max_bytes (int): Size beyond which the least recently
+        used entries of the feature store are evicted.
+        cv_cache_enabled (bool): Store the fold scores of the grid search
+        on disk and skip the candidates already cross-validated on the same
+        training data, folds and library versions.
+        cv_cache_path (str): Directory of the cross-validation result store.
+        cv_cache_max_bytes (int): Size beyond which the least recently used
+        contexts of the cross-validation result store are evicted.
+        scoring_workers (int): Worker processes of the batch scoring job.
+        scoring_chunk_size (int): Rows read, scored and inserted at a time
+        by the batch scoring job.
+        model_reload_interval (float): Seconds between checks of the model
+        artifacts by the prediction server, which loads a new version in
+        the background and swaps it in; 0 disables hot reload.
+        compression_enabled (bool): Save a compressed variant of the model,
+        the fewest trees within compression_tolerance of the full forest.
+        compression_tolerance (float): Largest drop of out-of-bag R^2
+        accepted for the compressed variant.
+        compression_max_rows (int): Training rows sampled to select the
+        trees of the compressed variant.
+        compression_distill (bool): Also save a distilled variant, a single
+        decision tree fitted to the predictions of the full model.
+        compression_distill_max_depth (int): Depth of the distilled tree.
+        model_variant (str): Model variant loaded for inference, "full",
+        "compressed" or "distilled".
     """
 
     model_config = SettingsConfigDict(
@@ -28,6 +110,51 @@ class ModelSettings(BaseSettings):
 
     model_path: DirectoryPath
     model_name: str
+    preprocessor_name: str = "preprocessor.pkl"
+    feature_schema_name: str = "feature_schema.json"
+    model_format: Literal["pickle", "npy"] = "pickle"
+    inference_engine: Literal["sklearn", "flat"] = "sklearn"
+    prediction_cache_size: int = 0
+    prediction_cache_ttl: float | None = None
+    batch_chunk_size: int = 10_000
+    interval_quantiles: list[float] = [0.05, 0.95]
+    explain_enabled: bool = True
+    model_backend: Literal["random_forest", "hist_gradient_boosting"] = (
+        "random_forest"
+    )
+    hgb_max_iter: int = 500
+    hgb_max_bins: int = 255
+    hgb_validation_fraction: float = 0.1
+    hgb_n_iter_no_change: int = 10
+    search_strategy: Literal["grid", "halving", "random"] = "grid"
+    search_resource: Literal["n_samples", "n_estimators"] = "n_samples"
+    search_factor: int = 3
+    search_time_budget: float = 300.0
+    search_n_iter: int | None = None
+    search_random_state: int = 42
+    train_executor: Literal["joblib", "process_pool"] = "joblib"
+    train_outer_jobs: int = -1
+    train_inner_jobs: int = 1
+    training_mode: Literal["full", "incremental"] = "full"
+    training_state_name: str = "training_state.json"
+    full_search_every_days: float = 7.0
+    drift_threshold: float = 0.05
+    incremental_min_rows: int = 50
+    feature_store_enabled: bool = False
+    feature_store_path: str = "feature_store"
+    feature_store_max_bytes: int = 1_000_000_000
+    cv_cache_enabled: bool = False
+    cv_cache_path: str = "cv_cache"
+    cv_cache_max_bytes: int = 100_000_000
+    scoring_workers: int = 1
+    scoring_chunk_size: int = 10_000
+    model_reload_interval: float = 0.0
+    compression_enabled: bool = False
+    compression_tolerance: float = 0.01
+    compression_max_rows: int = 20_000
+    compression_distill: bool = False
+    compression_distill_max_depth: int = 10
+    model_variant: Literal["full", "compressed", "distilled"] = "full"
 
 
 model_setting = ModelSettings()
@@ -0,0 +1,50 @@
+"""
+This module sets up the prediction server configuration.
+
+It utilizes Pydantic's BaseSettings for configuration management,
+allowing settings to be read from environment variables and a .env file.
+"""
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class ServerSettings(BaseSettings):
+    """
+    Prediction server configuration settings for the application.
+
+    Attributes:
+        model_config (SettingsConfigDict): Model config, Load from .env file.
+        server_host (str): Interface the HTTP server binds to.
+        server_port (int): Port the HTTP server listens on.
+        server_max_batch_size (int): Most requests coalesced into one
+        predict call.
+        server_max_wait_ms (float): Longest a request waits for others to
+        join its batch.
+        server_deadline_ms (float): Default time budget of a request when
+        it does not send its own deadline.
+        server_max_body_bytes (int): Largest request body read, larger ones
+        are answered with a 413.
+        server_max_headers (int): Most header lines read per request, more
+        are answered with a 431.
+        server_max_header_bytes (int): Largest size of the request line and
+        headers together, larger ones are answered with a 431.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file="config/.env",
+        env_file_encoding="UTF-8",
+        extra="ignore",
+        protected_namespaces=("settings_",),
+    )
+
+    server_host: str = "127.0.0.1"
+    server_port: int = 8000
+    server_max_batch_size: int = 64
+    server_max_wait_ms: float = 2.0
+    server_deadline_ms: float = 500.0
+    server_max_body_bytes: int = 65_536
+    server_max_headers: int = 100
+    server_max_header_bytes: int = 8_192
+
+
+server_setting = ServerSettings()
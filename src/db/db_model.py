@@ -2,8 +2,9 @@
 This module defines the database models using SQLAlchemy.
 
 It includes model classes for different types of real estate,
-specifically rental apartments. The module uses SQLAlchemy's
-ORM capabilities to map Python classes to database tables.
+specifically rental apartments, and for the predictions made on them.
+The module uses SQLAlchemy's ORM capabilities to map Python classes to
+database tables.
 The structure and fields of the RentApartments class are configured
 to match the corresponding database for rental apartments.
 """
@@ -41,8 +42,9 @@ class RentApartments(Base):
         garden (str): The garden status of the apartment.
         energy (str): The energy label of the apartment.
         facilities (str): Additional facilities in or near the apartment.
-        zip (str): The postal code of the apartment.
-        neighborhood (str): The neighborhood where the apartment is located.
+        zip (str): The postal code of the apartment (indexed).
+        neighborhood (str): The neighborhood where the apartment is located
+        (indexed).
         rent (int): The rent price of the apartment.
     """
 
@@ -62,6 +64,29 @@ class RentApartments(Base):
     garden: Mapped[str] = mapped_column(VARCHAR())
     energy: Mapped[str] = mapped_column(VARCHAR())
     facilities: Mapped[str] = mapped_column(VARCHAR())
-    zip: Mapped[str] = mapped_column(VARCHAR())
-    neighborhood: Mapped[str] = mapped_column(VARCHAR())
+    # secondary indexes, created in the database by `create_indexes`
+    zip: Mapped[str] = mapped_column(VARCHAR(), index=True)
+    neighborhood: Mapped[str] = mapped_column(VARCHAR(), index=True)
     rent: Mapped[int] = mapped_column(INTEGER())
+
+
+class RentPredictions(Base):
+    """
+    ORM model representating the predictions of the batch scoring job.
+
+    Attributes:
+        source_rowid (int): rowid of the scored row of the RentApartments
+        table (Primary Key with model_version).
+        model_version (str): Version of the model that made the prediction.
+        address (str): The address of the scored apartment.
+        prediction (float): The predicted rent price.
+        scored_at (str): UTC time of the scoring, ISO 8601.
+    """
+
+    __tablename__ = db_settings.predictions_table_name
+
+    source_rowid: Mapped[int] = mapped_column(INTEGER(), primary_key=True)
+    model_version: Mapped[str] = mapped_column(VARCHAR(), primary_key=True)
+    address: Mapped[str] = mapped_column(VARCHAR())
+    prediction: Mapped[float] = mapped_column(REAL())
+    scored_at: Mapped[str] = mapped_column(VARCHAR())
@@ -0,0 +1,228 @@
+"""
+This module provides the offline batch scoring job.
+
+It contains the BatchScoringService class, which re-scores every row of
+the RentApartments table with the saved model. Rows are paged out of the
+table in rowid order, prepared with the feature transformer saved at
+training time, scored (optionally on a pool of worker processes, each
+loading the model once) and bulk-inserted with `executemany` into the
+predictions table, with the model version and the scoring time.
+
+Every chunk is committed in its own transaction and chunks are committed
+in rowid order, so an interrupted job resumes after the highest rowid
+already scored by the same model version.
+"""
+
+import hashlib
+import multiprocessing as mp
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sqlalchemy import delete, func, insert, select
+
+from config import get_engine, model_setting
+from db.db_model import RentPredictions
+from models.instrumentation import emit_metric
+from models.model_inference import ModelInferenceService
+from models.pipe.data_collection import PIPELINE_COLUMNS, page_data_from_db
+
+# raw columns read for scoring: the model inputs and the row address
+SCORING_COLUMNS = {
+    **{col: dtype for col, dtype in PIPELINE_COLUMNS.items() if col != "rent"},
+    "address": "object",
+}
+
+# inference service of a worker process, set by _init_worker
+_worker_service: ModelInferenceService | None = None
+
+
+def _init_worker(model_id: str) -> None:
+    """Worker initializer: load the model the job was started with."""
+    global _worker_service
+    # Ctrl-C reaches the whole process group: let the parent handle it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_service = ModelInferenceService()
+    _worker_service.load_model()
+    if _worker_service.model_id != model_id:
+        raise RuntimeError(
+            f"model changed since the job started: {_worker_service.model_id}",
+        )
+
+
+def _score_chunk(listings: pd.DataFrame) -> np.ndarray:
+    """Score one chunk of raw listings in a worker process."""
+    return _worker_service.predict_listings(listings)
+
+
+class BatchScoringService:
+    """
+    BatchScoringService class scoring the whole table into a results table.
+
+    Attributes
+    ----------
+        workers (int): Worker processes scoring chunks, 1 scores in the
+            calling process.
+        chunk_size (int): Rows read, scored and inserted at a time.
+        model_version (str | None): Version written with the predictions,
+            by default a short hash of the loaded artifact identity.
+        service (ModelInferenceService): Service holding the model.
+
+    Methods
+    -------
+        run(self, restart) : Scores the rows not scored yet by this model
+        resume_point(self) : Returns the highest rowid already scored
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        chunk_size: int | None = None,
+        model_version: str | None = None,
+    ) -> None:
+        """Initializes the job settings"""
+        self.workers = workers or model_setting.scoring_workers
+        self.chunk_size = chunk_size or model_setting.scoring_chunk_size
+        self.model_version = model_version
+        self.service = ModelInferenceService()
+        self._insert_sql = None
+
+    def run(self, restart: bool = False) -> dict:
+        """
+        Function that scores the rows not scored yet by the loaded model.
+
+        Args:
+            restart (bool): Delete the predictions of this model version
+                and score the whole table again.
+
+        Returns:
+            dict: Rows scored, elapsed seconds and rows per second.
+        """
+        self.service.load_model()
+        self.model_version = (
+            self.model_version
+            or (hashlib.sha256(self.service.model_id.encode()).hexdigest()[:12])
+        )
+        engine = get_engine()
+        RentPredictions.__table__.create(engine, checkfirst=True)
+        self._insert_sql = str(
+            insert(RentPredictions.__table__).compile(dialect=engine.dialect),
+        )
+        if restart:
+            with engine.begin() as conn:
+                conn.execute(
+                    delete(RentPredictions).where(
+                        RentPredictions.model_version == self.model_version,
+                    ),
+                )
+
+        after_rowid = self.resume_point()
+        logger.info(
+            f"scoring with model version {self.model_version} after rowid "
+            f"{after_rowid} on {self.workers} worker(s)",
+        )
+        chunks = page_data_from_db(after_rowid, self.chunk_size, SCORING_COLUMNS)
+        start = time.perf_counter()
+        n_rows = 0
+        try:
+            for chunk, predictions in self._scored_chunks(chunks):
+                self._insert(chunk, predictions)
+                n_rows += len(chunk)
+                elapsed = time.perf_counter() - start
+                logger.debug(
+                    f"scored up to rowid {chunk['rowid'].iloc[-1]}, "
+                    f"{n_rows} rows at {n_rows / elapsed:.0f} rows/s",
+                )
+        except KeyboardInterrupt:
+            logger.warning(
+                f"scoring interrupted after {n_rows} rows, "
+                f"run again to resume after rowid {self.resume_point()}",
+            )
+            raise
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            "rows": n_rows,
+            "elapsed": round(elapsed, 3),
+            "rows_per_sec": round(n_rows / elapsed, 1) if elapsed else 0.0,
+        }
+        emit_metric(
+            "job",
+            "batch_scoring",
+            model_version=self.model_version,
+            workers=self.workers,
+            **stats,
+        )
+        logger.info(
+            f"scored {n_rows} rows in {elapsed:.1f} s "
+            f"({stats['rows_per_sec']:.0f} rows/s)",
+        )
+        return stats
+
+    def resume_point(self) -> int:
+        """
+        Function that finds where an interrupted job stopped.
+
+        Returns:
+            int: Highest rowid scored by the current model version, 0 if
+            none was.
+        """
+        query = select(func.max(RentPredictions.source_rowid)).where(
+            RentPredictions.model_version == self.model_version,
+        )
+        with get_engine().connect() as conn:
+            return conn.execute(query).scalar() or 0
+
+    def _scored_chunks(self, chunks):
+        """
+        Function that yields (chunk, predictions) in rowid order.
+
+        With several workers up to two chunks per worker are in flight,
+        and results are taken in submission order so chunks are always
+        committed in rowid order.
+        """
+        if self.workers == 1:
+            for chunk in chunks:
+                yield chunk, self.service.predict_listings(chunk)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.service.model_id,),
+        ) as pool:
+            pending = deque()
+            try:
+                for chunk in chunks:
+                    pending.append((chunk, pool.submit(_score_chunk, chunk)))
+                    if len(pending) >= 2 * self.workers:
+                        chunk, future = pending.popleft()
+                        yield chunk, future.result()
+                while pending:
+                    chunk, future = pending.popleft()
+                    yield chunk, future.result()
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def _insert(self, chunk: pd.DataFrame, predictions: np.ndarray) -> None:
+        """Function that bulk-inserts the predictions of one chunk."""
+        scored_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        rows = list(
+            zip(
+                chunk["rowid"].tolist(),
+                repeat(self.model_version),
+                chunk["address"].tolist(),
+                predictions.tolist(),
+                repeat(scored_at),
+            ),
+        )
+        # one DBAPI executemany call per chunk, committed atomically
+        with get_engine().begin() as conn:
+            conn.exec_driver_sql(self._insert_sql, rows)
@@ -0,0 +1,276 @@
+"""
+This module provides the typed feature schema saved with a model.
+
+It contains the FeatureSchema class, derived from the training matrix by
+`build_model` and saved as JSON next to the model. It lists the features
+in training column order with their kind ("float", "int" or "binary")
+and the range seen in training. At inference it maps named inputs onto
+that order, writing them block by block straight into a preallocated
+float32 buffer, and rejects bad input with errors naming the offending
+row and feature. It only depends on NumPy, so the inference path stays
+free of pandas.
+"""
+
+import json
+import os
+from collections.abc import Iterable, Mapping, Sequence
+from operator import itemgetter
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_VERSION = 1
+FEATURE_KINDS = ("float", "int", "binary")
+# rows converted to Python tuples at once by FeatureSchema.assemble
+ASSEMBLY_BLOCK_ROWS = 4096
+
+
+class FeatureSchema:
+    """
+    FeatureSchema class describing the model input.
+
+    Attributes
+    ----------
+        names (list[str]): Feature names in training column order.
+        kinds (list[str]): Kind of every feature, one of FEATURE_KINDS.
+        minimums, maximums (list[float] | None): Range seen in training,
+            for reference; values outside it are not rejected.
+
+    Methods
+    -------
+        from_training(cls, X, names, kinds) : Derives the schema from training
+        from_names(cls, names) : Untyped schema of an older artifact
+        save(self, path) : Writes the schema as JSON
+        load(cls, path) : Reads a saved schema
+        assemble(self, rows) : Builds the feature matrix of named rows
+        validate(self, features) : Checks a feature matrix against the kinds
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        kinds: list[str],
+        minimums: list[float] | None = None,
+        maximums: list[float] | None = None,
+    ) -> None:
+        """Initializes the schema"""
+        unknown = set(kinds) - set(FEATURE_KINDS)
+        if unknown:
+            raise ValueError(f"unknown feature kinds: {sorted(unknown)}")
+        if len(kinds) != len(names):
+            raise ValueError("names and kinds must have the same length")
+        self.names = list(names)
+        self.kinds = list(kinds)
+        self.minimums = minimums
+        self.maximums = maximums
+        self._name_set = frozenset(self.names)
+        getter = itemgetter(*self.names)
+        # itemgetter of a single name returns the bare value, not a tuple
+        self._getter = getter if len(self.names) != 1 else lambda row: (getter(row),)
+
+    @property
+    def n_features(self) -> int:
+        """Number of features."""
+        return len(self.names)
+
+    @classmethod
+    def from_training(
+        cls,
+        X,
+        names: Iterable[str],
+        kinds: Iterable[str] | None = None,
+    ) -> "FeatureSchema":
+        """
+        Derive the schema from the training feature matrix.
+
+        Without explicit kinds, a column holding only 0 and 1 is "binary"
+        and any other "float".
+
+        Args:
+            X: 2-D training features in column order (array or DataFrame).
+            names (Iterable[str]): Feature names in column order.
+            kinds (Iterable[str] | None): Kind of every feature, such as
+                the ones the feature transformer declares.
+
+        Returns:
+            FeatureSchema: The derived schema.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if kinds is None:
+            kinds = [
+                "binary" if np.isin(column, (0.0, 1.0)).all() else "float"
+                for column in X.T
+            ]
+        return cls(
+            list(names),
+            list(kinds),
+            minimums=X.min(axis=0).tolist(),
+            maximums=X.max(axis=0).tolist(),
+        )
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> "FeatureSchema":
+        """Untyped ("float") schema for models saved without one."""
+        names = list(names)
+        return cls(names, ["float"] * len(names))
+
+    def save(self, path: str | Path) -> None:
+        """Write the schema as JSON, renamed over `path` once written."""
+        tmp_path = Path(f"{path}.tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "format_version": FORMAT_VERSION,
+                    "dtype": "float32",
+                    "features": [
+                        {
+                            "name": name,
+                            "kind": kind,
+                            "min": None if self.minimums is None else lo,
+                            "max": None if self.maximums is None else hi,
+                        }
+                        for name, kind, lo, hi in zip(
+                            self.names,
+                            self.kinds,
+                            self.minimums or [None] * self.n_features,
+                            self.maximums or [None] * self.n_features,
+                        )
+                    ],
+                },
+                indent=2,
+            ),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "FeatureSchema":
+        """
+        Read a schema saved by `save`.
+
+        Raises:
+            ValueError: if the file was written by a newer format version.
+        """
+        meta = json.loads(Path(path).read_text())
+        if meta["format_version"] > FORMAT_VERSION:
+            raise ValueError(
+                f"feature schema format {meta['format_version']} is newer "
+                f"than the supported {FORMAT_VERSION}",
+            )
+        features = meta["features"]
+        minimums = [feature["min"] for feature in features]
+        maximums = [feature["max"] for feature in features]
+        return cls(
+            [feature["name"] for feature in features],
+            [feature["kind"] for feature in features],
+            minimums=None if None in minimums else minimums,
+            maximums=None if None in maximums else maximums,
+        )
+
+    def assemble(self, rows: Mapping | Iterable[Mapping]) -> np.ndarray:
+        """
+        Build the feature matrix of named rows.
+
+        Every row must hold exactly the schema features, as numbers:
+        strings are rejected even when they would parse as one. The
+        values are picked in training column order with one C-level
+        getter per row and written block by block into one preallocated
+        float32 buffer, so only a block of rows is ever held as Python
+        tuples.
+
+        Args:
+            rows (Mapping | Iterable[Mapping]): One feature dict or an
+                iterable of them.
+
+        Returns:
+            np.ndarray: C-contiguous (n_rows, n_features) float32 matrix.
+
+        Raises:
+            ValueError: on missing, unexpected or invalid features.
+        """
+        if isinstance(rows, Mapping):
+            rows = [rows]
+        elif not isinstance(rows, Sequence):
+            rows = list(rows)
+        features = np.empty((len(rows), self.n_features), dtype=np.float32)
+        for start in range(0, len(rows), ASSEMBLY_BLOCK_ROWS):
+            block = rows[start : start + ASSEMBLY_BLOCK_ROWS]
+            try:
+                if any(len(row) != self.n_features for row in block):
+                    raise KeyError
+                values = np.asarray(list(map(self._getter, block)))
+                if values.dtype.kind in "SU" or (
+                    values.dtype.kind == "O"
+                    and any(isinstance(value, (str, bytes)) for value in values.flat)
+                ):
+                    raise TypeError
+                features[start : start + len(block)] = values
+            except (KeyError, TypeError, ValueError):
+                self._raise_row_error(block, start)
+        return self.validate(features)
+
+    def validate(self, features: np.ndarray) -> np.ndarray:
+        """
+        Check a feature matrix in training column order.
+
+        Args:
+            features (np.ndarray): 2-D float feature matrix.
+
+        Returns:
+            np.ndarray: The same matrix.
+
+        Raises:
+            ValueError: on a wrong shape, NaN or infinite values, values
+                other than 0/1 in a binary feature or fractional values
+                in an integer feature.
+        """
+        if features.ndim != 2 or features.shape[1] != self.n_features:
+            raise ValueError(
+                f"expected a 2-D input with {self.n_features} features "
+                f"{self.names}, got shape {features.shape}",
+            )
+        checks = (
+            ("float", lambda col: np.isfinite(col), "a finite number"),
+            ("int", lambda col: col == np.round(col), "a whole number"),
+            ("binary", lambda col: (col == 0) | (col == 1), "0 or 1"),
+        )
+        finite = np.isfinite(features)
+        for kind, check, expected in checks:
+            columns = [j for j, k in enumerate(self.kinds) if k == kind]
+            if not columns:
+                continue
+            valid = finite[:, columns] & check(features[:, columns])
+            if not valid.all():
+                row, col = np.argwhere(~valid)[0]
+                name = self.names[columns[col]]
+                raise ValueError(
+                    f"row {row}: feature {name!r} must be {expected}, "
+                    f"got {features[row, columns[col]]}",
+                )
+        return features
+
+    def _raise_row_error(self, block: Sequence, offset: int) -> None:
+        """Raise a ValueError describing the first bad row of a block."""
+        for i, row in enumerate(block, start=offset):
+            if not isinstance(row, Mapping):
+                raise ValueError(f"row {i} is not a mapping of feature values")
+            missing = sorted(self._name_set - row.keys())
+            unexpected = sorted(set(row.keys()) - self._name_set, key=str)
+            if missing or unexpected:
+                problems = []
+                if missing:
+                    problems.append(f"missing features {missing}")
+                if unexpected:
+                    problems.append(f"unexpected features {unexpected}")
+                raise ValueError(
+                    f"row {i}: {', '.join(problems)}; expected {self.names}",
+                )
+            for name in self.names:
+                try:
+                    if isinstance(row[name], (str, bytes)):
+                        raise TypeError
+                    np.float32(row[name])
+                except (TypeError, ValueError):
+                    raise ValueError(
+                        f"row {i}: feature {name!r} must be numeric, got {row[name]!r}",
+                    ) from None
+        raise ValueError("rows do not match the feature schema")
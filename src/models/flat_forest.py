@@ -0,0 +1,427 @@
+"""
+This module provides a compact, memory-mappable format for tree ensembles.
+
+It contains the FlatForest class that stores every tree of a fitted
+forest, or of a histogram gradient boosting ensemble, as a handful of flat
+NumPy arrays (feature, threshold, left and right children, leaf value,
+and the training cover the explanations need) concatenated across trees.
+The arrays are saved as uncompressed `.npy` files next to a small
+`meta.json`, so they can be memory-mapped: inference processes on the
+same host then share a single page-cache copy of the model instead of
+each unpickling its own.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from config import model_setting
+
+FORMAT_VERSION = 1
+ARRAYS = ("feature", "threshold", "children_left", "children_right", "value")
+# artifacts saved by a build: the model, its selected-trees subset and
+# its distillation into a single tree
+MODEL_VARIANTS = ("full", "compressed", "distilled")
+# boosting losses predicting the raw sum of the trees (identity link)
+IDENTITY_LOSSES = ("squared_error", "absolute_error", "quantile")
+
+
+class FlatForest:
+    """
+    Tree ensemble stored as flat node arrays.
+
+    Children of leaf nodes point back to the leaf itself, so walking
+    `max_depth` levels from the roots always ends on a leaf, without any
+    per-node branching. A forest predicts the mean of its trees, a boosted
+    ensemble its baseline plus the sum of its trees.
+
+    The walk pays off on request-sized batches: on the configured model
+    (`benchmarks.predict_latency`) one row takes 0.03 ms against 3 ms
+    with sklearn, 100 rows 0.5 ms against 3.4 ms. The two cross around
+    2k rows and at 10k rows it is slower than sklearn, about 45 ms
+    against 35 ms, since every tree walks `max_depth` levels where
+    sklearn's compiled traversal stops at the leaf; large offline
+    batches are better scored with the sklearn engine.
+
+    Attributes
+    ----------
+        feature (np.ndarray): Split feature of every node (0 for leaves).
+        threshold (np.ndarray): Split threshold of every node.
+        children_left (np.ndarray): Global index of the left child.
+        children_right (np.ndarray): Global index of the right child.
+        value (np.ndarray): Prediction of every node.
+        roots (np.ndarray): Global index of the root node of every tree.
+        max_depth (int): Depth of the deepest tree.
+        n_features_in_ (int): Number of features the forest was fitted on.
+        feature_names_in_ (np.ndarray | None): Training feature names.
+        average (bool): Whether trees are averaged (forest) or summed
+            (boosting).
+        baseline (float): Constant added to the trees' output.
+        cover (np.ndarray | None): Training samples reaching every node,
+            used by the explanations (None for artifacts saved without).
+
+    Methods
+    -------
+        from_estimator(cls, forest) : Flattens a fitted sklearn ensemble
+        save(self, path) : Writes the arrays and metadata to a directory
+        load(cls, path, mmap_mode) : Reads a saved forest, memory-mapped
+        predict(self, X) : Predicts the combined trees for every row
+        predict_trees(self, X) : Returns every tree's output for every row
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children_left: np.ndarray,
+        children_right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features_in_: int,
+        feature_names_in_: np.ndarray | None = None,
+        params: dict | None = None,
+        average: bool = True,
+        baseline: float = 0.0,
+        cover: np.ndarray | None = None,
+    ) -> None:
+        """Initializes the forest from its node arrays"""
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features_in_
+        self.feature_names_in_ = feature_names_in_
+        self.params = params or {}
+        self.average = average
+        self.baseline = baseline
+        self.cover = cover
+
+    @classmethod
+    def from_estimator(cls, forest) -> "FlatForest":
+        """
+        Flatten a fitted sklearn forest or gradient boosting regressor.
+
+        Args:
+            forest: A fitted RandomForestRegressor (or any single-output
+                ensemble exposing `estimators_` of decision trees), a
+                DecisionTreeRegressor, or a HistGradientBoostingRegressor
+                with an identity link loss.
+
+        Returns:
+            FlatForest: The flattened forest.
+
+        Raises:
+            ValueError: for a boosted ensemble that cannot be flattened.
+        """
+        if hasattr(forest, "_predictors"):
+            return cls._from_boosting(forest)
+        # a single decision tree is a forest of one
+        estimators = getattr(forest, "estimators_", [forest])
+        trees = [estimator.tree_ for estimator in estimators]
+        sizes = np.array([tree.node_count for tree in trees])
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        children_left, children_right = [], []
+        for tree, root in zip(trees, roots):
+            nodes = np.arange(tree.node_count) + root
+            is_leaf = tree.children_left == -1
+            children_left.append(np.where(is_leaf, nodes, tree.children_left + root))
+            children_right.append(np.where(is_leaf, nodes, tree.children_right + root))
+
+        feature = np.concatenate([tree.feature for tree in trees])
+        feature_names = getattr(forest, "feature_names_in_", None)
+        return cls(
+            feature=np.where(feature < 0, 0, feature).astype(np.intp),
+            threshold=np.concatenate([tree.threshold for tree in trees]),
+            children_left=np.concatenate(children_left).astype(np.intp),
+            children_right=np.concatenate(children_right).astype(np.intp),
+            value=np.concatenate([tree.value[:, 0, 0] for tree in trees]),
+            roots=roots.astype(np.intp),
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features_in_=forest.n_features_in_,
+            feature_names_in_=feature_names,
+            params=_json_params(forest),
+            cover=np.concatenate([tree.weighted_n_node_samples for tree in trees]),
+        )
+
+    @classmethod
+    def _from_boosting(cls, model) -> "FlatForest":
+        """
+        Flatten a fitted HistGradientBoostingRegressor.
+
+        Missing values are rejected by the feature schema before they
+        reach the model, so the per-node direction of missing values is
+        not kept.
+        """
+        if model.loss not in IDENTITY_LOSSES:
+            raise ValueError(
+                f"cannot flatten a boosted model with the {model.loss!r} loss, "
+                f"only {IDENTITY_LOSSES}",
+            )
+        nodes = [predictors[0].nodes for predictors in model._predictors]
+        if any(tree["is_categorical"].any() for tree in nodes):
+            raise ValueError("cannot flatten categorical splits")
+        sizes = np.array([len(tree) for tree in nodes])
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        children_left, children_right = [], []
+        for tree, root in zip(nodes, roots):
+            index = np.arange(len(tree)) + root
+            is_leaf = tree["is_leaf"].astype(bool)
+            children_left.append(np.where(is_leaf, index, tree["left"] + root))
+            children_right.append(np.where(is_leaf, index, tree["right"] + root))
+
+        feature_names = getattr(model, "feature_names_in_", None)
+        return cls(
+            feature=np.concatenate([tree["feature_idx"] for tree in nodes]).astype(
+                np.intp,
+            ),
+            threshold=np.concatenate([tree["num_threshold"] for tree in nodes]),
+            children_left=np.concatenate(children_left).astype(np.intp),
+            children_right=np.concatenate(children_right).astype(np.intp),
+            value=np.concatenate([tree["value"] for tree in nodes]),
+            roots=roots.astype(np.intp),
+            max_depth=max(int(tree["depth"].max()) for tree in nodes),
+            n_features_in_=model.n_features_in_,
+            feature_names_in_=feature_names,
+            params=_json_params(model),
+            average=False,
+            baseline=float(model._baseline_prediction.ravel()[0]),
+            cover=np.concatenate([tree["count"] for tree in nodes]).astype(
+                np.float64,
+            ),
+        )
+
+    def save(self, path: str | Path) -> None:
+        """
+        Write the node arrays as `.npy` files plus a `meta.json`.
+
+        Every file is written aside and renamed over the previous one,
+        `meta.json` last: processes memory-mapping the previous arrays
+        keep their pages, and a watcher sees the new forest once complete.
+
+        Args:
+            path (str | Path): Directory to write to, created if missing.
+
+        Returns:
+            None
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        names = (*ARRAYS, "roots") + (() if self.cover is None else ("cover",))
+        for name in names:
+            with open(path / f"{name}.npy.tmp", "wb") as array_file:
+                np.save(array_file, np.ascontiguousarray(getattr(self, name)))
+            os.replace(path / f"{name}.npy.tmp", path / f"{name}.npy")
+
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "n_trees": len(self.roots),
+            "n_nodes": len(self.value),
+            "max_depth": self.max_depth,
+            "n_features_in": self.n_features_in_,
+            "feature_names_in": (
+                None if self.feature_names_in_ is None else list(self.feature_names_in_)
+            ),
+            "params": self.params,
+            "average": self.average,
+            "baseline": self.baseline,
+        }
+        (path / "meta.json.tmp").write_text(json.dumps(meta, indent=2))
+        os.replace(path / "meta.json.tmp", path / "meta.json")
+        logger.info(f"saved {meta['n_trees']} flattened trees to {path}")
+
+    @classmethod
+    def load(cls, path: str | Path, mmap_mode: str | None = "r") -> "FlatForest":
+        """
+        Read a forest written by `save`.
+
+        Args:
+            path (str | Path): Directory holding the arrays and metadata.
+            mmap_mode (str | None): Passed to `np.load`, "r" memory-maps
+                the arrays read-only, None reads them into memory.
+
+        Returns:
+            FlatForest: The loaded forest.
+        """
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        if meta["format_version"] != FORMAT_VERSION:
+            raise ValueError(
+                f"unsupported forest format version {meta['format_version']}",
+            )
+        # plain ndarray views of the maps: same pages, without the
+        # np.memmap subclass overhead on every indexing operation
+        arrays = {
+            name: np.asarray(np.load(path / f"{name}.npy", mmap_mode=mmap_mode))
+            for name in (*ARRAYS, "roots")
+        }
+        # forests saved before the covers were kept load without them
+        if (path / "cover.npy").exists():
+            arrays["cover"] = np.asarray(
+                np.load(path / "cover.npy", mmap_mode=mmap_mode),
+            )
+        feature_names = meta["feature_names_in"]
+        return cls(
+            **arrays,
+            max_depth=meta["max_depth"],
+            n_features_in_=meta["n_features_in"],
+            feature_names_in_=(
+                None if feature_names is None else np.array(feature_names, dtype=object)
+            ),
+            params=meta["params"],
+            average=meta.get("average", True),
+            baseline=meta.get("baseline", 0.0),
+        )
+
+    def predict(self, X, block_rows: int = 1024) -> np.ndarray:
+        """
+        Predict the mean of all trees (or the boosted sum) for every row.
+
+        All trees are walked together, one level per step, over blocks of
+        `block_rows` rows to bound the (trees x rows) working arrays and
+        keep them in cache. A single row takes a shorter path without the
+        row dimension.
+
+        Args:
+            X: 2-D array-like of shape (n_rows, n_features_in_).
+            block_rows (int): Rows walked at a time.
+
+        Returns:
+            np.ndarray: Predictions of shape (n_rows,).
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) == 1:
+            return np.array([self._predict_row(X[0])])
+
+        predictions = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), block_rows):
+            block = X[start : start + block_rows]
+            predictions[start : start + len(block)] = self._predict_block(block)
+        return predictions
+
+    def predict_trees(self, X, block_rows: int = 1024) -> np.ndarray:
+        """
+        Output of every tree for every row, without combining the trees.
+
+        The same single walk as `predict`: all trees advance together one
+        level per step, so the (trees x rows) matrix costs about as much
+        as the prediction itself. For a forest, the mean over the trees
+        axis is the prediction.
+
+        Args:
+            X: 2-D array-like of shape (n_rows, n_features_in_).
+            block_rows (int): Rows walked at a time.
+
+        Returns:
+            np.ndarray: Leaf values of shape (n_trees, n_rows).
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) == 1:
+            return self._walk_row(X[0])[:, None]
+
+        leaves = np.empty((len(self.roots), len(X)), dtype=np.float64)
+        for start in range(0, len(X), block_rows):
+            block = X[start : start + block_rows]
+            leaves[:, start : start + len(block)] = self._walk_block(block)
+        return leaves
+
+    def _predict_row(self, row: np.ndarray) -> float:
+        """Walk every tree for one row, returning the forest output."""
+        return self._combine(self._walk_row(row))
+
+    def _predict_block(self, block: np.ndarray) -> np.ndarray:
+        """Walk every tree for a block of rows, returning the forest outputs."""
+        return self._combine(self._walk_block(block))
+
+    def _walk_row(self, row: np.ndarray) -> np.ndarray:
+        """Leaf value of every tree for one row, shape (n_trees,)."""
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            nodes = np.where(
+                row[self.feature[nodes]] <= self.threshold[nodes],
+                self.children_left[nodes],
+                self.children_right[nodes],
+            )
+        return self.value[nodes]
+
+    def _walk_block(self, block: np.ndarray) -> np.ndarray:
+        """Leaf value of every tree for a block of rows, (n_trees, n_rows)."""
+        # index the raveled block directly: row offset + split feature
+        values = block.ravel()
+        offsets = np.arange(len(block))[None, :] * block.shape[1]
+        nodes = np.repeat(self.roots[:, None], len(block), axis=1)
+        for _ in range(self.max_depth):
+            nodes = np.where(
+                values[offsets + self.feature[nodes]] <= self.threshold[nodes],
+                self.children_left[nodes],
+                self.children_right[nodes],
+            )
+        return self.value[nodes]
+
+    def _combine(self, leaves: np.ndarray) -> np.ndarray:
+        """Mean (forest) or baseline plus sum (boosting) over the trees axis."""
+        if self.average:
+            return leaves.mean(axis=0)
+        return self.baseline + leaves.sum(axis=0)
+
+    def __repr__(self) -> str:
+        """Short description, the node arrays are not rendered."""
+        return (
+            f"FlatForest(n_trees={len(self.roots)}, "
+            f"n_nodes={len(self.value)}, max_depth={self.max_depth})"
+        )
+
+
+def _json_params(model) -> dict:
+    """The parameters of an estimator that are plain JSON values."""
+    return {
+        key: value
+        for key, value in model.get_params().items()
+        if isinstance(value, (str, int, float, bool, type(None)))
+    }
+
+
+def variant_model_name(variant: str, model_name: str | None = None) -> str:
+    """
+    File name of a model variant saved by the compression stage.
+
+    Args:
+        variant (str): One of `MODEL_VARIANTS`.
+        model_name (str | None): Model file name, defaults to
+            `model_setting.model_name`.
+
+    Returns:
+        str: e.g. `base_rf_compressed.pkl`, `base_rf.pkl` for "full".
+    """
+    model_name = model_name or model_setting.model_name
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(
+            f"unknown model variant {variant!r}, expected one of {MODEL_VARIANTS}",
+        )
+    if variant == "full":
+        return model_name
+    name = Path(model_name)
+    return f"{name.stem}_{variant}{name.suffix}"
+
+
+def flat_model_path(model_name: str | None = None) -> Path:
+    """
+    Directory of the flat artifact of a model, named after its file stem.
+
+    Args:
+        model_name (str | None): Model file name, defaults to
+            `model_setting.model_name`.
+
+    Returns:
+        Path: e.g. `models/model/base_rf` for `base_rf.pkl`.
+    """
+    model_name = model_name or model_setting.model_name
+    return Path(model_setting.model_path) / Path(model_name).stem
@@ -0,0 +1,170 @@
+"""
+This module provides timing and memory instrumentation for the pipelines.
+
+It contains the Stage class, a context manager and decorator recording the
+wall time, CPU time, peak resident memory and row count of one pipeline
+stage, the `emit_metric` function through which every record goes, and
+the `profiled` context manager wrapping a run in cProfile.
+
+Records are emitted as JSON on the loguru logger bound with a `metric`
+extra; `configure_logging` routes them to the metrics file as JSON lines,
+so the application log and the metrics file carry the same records.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from contextlib import ContextDecorator, contextmanager
+from pathlib import Path
+
+from loguru import logger
+
+# groups the records of one process run in the metrics file
+RUN_ID = uuid.uuid4().hex[:12]
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_bytes() -> int:
+    """Current resident set size, the lifetime peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def emit_metric(kind: str, name: str, **fields) -> dict:
+    """
+    Emit one structured metric record.
+
+    Args:
+        kind (str): Type of record, such as "stage" or "search_candidate".
+        name (str): Name of the measured stage or candidate.
+        **fields: JSON-serializable measurements.
+
+    Returns:
+        dict: The emitted record.
+    """
+    record = {
+        "run_id": RUN_ID,
+        "time": time.time(),
+        "kind": kind,
+        "name": name,
+        **fields,
+    }
+    payload = json.dumps(record, default=str)
+    logger.bind(metric=payload).info(f"metric {payload}")
+    return record
+
+
+class Stage(ContextDecorator):
+    """
+    Stage class measuring one step of a pipeline.
+
+    Used as `with Stage("prepare_data") as stage:` the caller can set
+    `stage.rows` (and other fields in `stage.extra`) before the block
+    ends; used as `@Stage("save_model")` every call is measured.
+    A background thread samples the resident memory while the stage runs.
+
+    Attributes
+    ----------
+        name (str): Name of the stage in the records.
+        rows (int | None): Number of rows the stage processed.
+        extra (dict): Additional fields of the record.
+        record (dict | None): The emitted record, set on exit.
+
+    Methods
+    -------
+        __enter__(self) : Starts the clocks and the memory sampler
+        __exit__(self, *exc) : Stops them and emits the record
+    """
+
+    sample_interval = 0.05
+
+    def __init__(self, name: str, rows: int | None = None, **extra) -> None:
+        """Initializes the stage"""
+        self.name = name
+        self.rows = rows
+        self.extra = extra
+        self.record = None
+
+    def _recreate_cm(self) -> "Stage":
+        """Fresh instance for every decorated call."""
+        return type(self)(self.name, self.rows, **self.extra)
+
+    def __enter__(self) -> "Stage":
+        """Start the clocks and the memory sampler."""
+        self._rss_start = self._rss_peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._wall, self._cpu = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        """Stop the clocks and the sampler, then emit the record."""
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        self._stop.set()
+        self._sampler.join()
+        self._rss_peak = max(self._rss_peak, _rss_bytes())
+        self.record = emit_metric(
+            "stage",
+            self.name,
+            status="ok" if exc_type is None else "error",
+            wall_time=round(wall, 6),
+            cpu_time=round(cpu, 6),
+            rss_start_mb=round(self._rss_start / 2**20, 1),
+            peak_rss_mb=round(self._rss_peak / 2**20, 1),
+            rows=self.rows,
+            **self.extra,
+        )
+        return False
+
+    def _sample(self) -> None:
+        """Record the peak resident memory until the stage ends."""
+        while not self._stop.wait(self.sample_interval):
+            self._rss_peak = max(self._rss_peak, _rss_bytes())
+
+
+@contextmanager
+def profiled(path: str, sort: str = "cumulative", limit: int = 40):
+    """
+    Run the block under cProfile and dump the profile and a report.
+
+    The raw profile is written to `path` (readable by pstats or snakeviz)
+    and the report of the `limit` most expensive functions sorted by
+    `sort` to `path` with a `.txt` suffix. Work done in child processes,
+    such as joblib search workers, is not profiled.
+
+    Args:
+        path (str): File the raw profile is written to.
+        sort (str): pstats sort key of the report.
+        limit (int): Number of functions in the report.
+
+    Yields:
+        cProfile.Profile: The running profiler.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats(sort).print_stats(limit)
+        report_path = Path(path).with_suffix(".txt")
+        report_path.write_text(report.getvalue())
+        logger.info(f"profile saved to {path}, report to {report_path}")
@@ -12,7 +12,6 @@ from loguru import logger
 
 # local packages
 from config import model_setting
-from models.pipe.model import build_model
 
 
 class ModelBuilderService:
@@ -28,6 +27,7 @@ class ModelBuilderService:
     ----------
         model_path (str) : Path to the model directory.
         model_name (str) : Name of the model file.
+        training_mode (str) : "full" rebuild or "incremental" update.
 
     Methods
     -------
@@ -40,13 +40,19 @@ class ModelBuilderService:
         self.model = None
         self.model_path = model_setting.model_path
         self.model_name = model_setting.model_name
+        self.training_mode = model_setting.training_mode
 
-    def train_model(self) -> None:
+    def train_model(self, rebuild_features: bool = False) -> None:
         """
         Function that trains and saves it to a specified path
 
+        With `training_mode = incremental` the saved model is grown with
+        the rows added since the last run instead of rebuilt.
+
         Args:
-            None
+            rebuild_features (bool): Prepare the training data again
+                instead of loading it from the feature store, also in
+                the full builds an incremental update falls back to.
 
         Returns:
              None
@@ -56,4 +62,14 @@ class ModelBuilderService:
             f"{self.model_path}/{self.model_name}",
         )
 
-        build_model()
+        # imported here so the training stack (pandas, sklearn.ensemble,
+        # the database engine) only loads when a build is asked for
+        if self.training_mode == "incremental":
+            from models.pipe.incremental import update_model
+
+            update_model(rebuild_features=rebuild_features)
+            return
+
+        from models.pipe.model import build_model
+
+        build_model(rebuild_features=rebuild_features)
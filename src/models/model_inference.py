@@ -3,14 +3,112 @@ This module provides functionality for making predictions using ML models.
 
 It contain the ModelInferenceService class that offers methods
 to load a model, make predictions using the loaded model.
+
+A loaded model (the estimator, its identity and feature schema) is held
+as one immutable LoadedModel snapshot. Every prediction reads the
+snapshot once, so `reload_model` can load and warm a new artifact in
+the background and swap the snapshot with a single assignment: requests
+already running finish on the model they started with.
 """
 
 import pickle as pk
+import sys
+import threading
+import time
+import warnings
+from collections.abc import Iterable, Mapping
 from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
 
+import numpy as np
 from loguru import logger
 
-from config import model_setting
+from config import log_request_sampled, model_setting
+from models.feature_schema import FeatureSchema
+from models.flat_forest import FlatForest, flat_model_path, variant_model_name
+from models.instrumentation import emit_metric
+from models.prediction_cache import PredictionCache
+from models.tree_shap import TreeExplainer
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# rows predicted on a freshly loaded model before it serves requests
+WARMUP_ROWS = 256
+
+
+class LoadedModel(NamedTuple):
+    """
+    Snapshot of one loaded model artifact, swapped as a whole.
+
+    Attributes
+    ----------
+        model (object): The estimator or FlatForest.
+        model_id (str): Identity of the artifact (path, size, mtime).
+        schema (FeatureSchema | None): Feature schema saved with it.
+        stamp (tuple): Sizes and mtimes of the artifact files when the
+            load started, compared by the watcher.
+        version (int): Number of models loaded by the service so far.
+        load_seconds (float): Time spent reading (and flattening) it.
+        warm_seconds (float): Time spent on the warm-up predictions.
+        explainer (TreeExplainer | None): Path summaries of its trees,
+            None with `explain_enabled` off.
+    """
+
+    model: object
+    model_id: str
+    schema: FeatureSchema | None
+    stamp: tuple
+    version: int
+    load_seconds: float
+    warm_seconds: float
+    explainer: TreeExplainer | None = None
+
+
+class PredictionInterval(NamedTuple):
+    """
+    Spread of the trees of a forest around its predictions.
+
+    The quantiles and standard deviation are those of the individual
+    trees' predictions: a band of how much the trees disagree, wider
+    where the training data is sparse or noisy, not a calibrated
+    predictive interval.
+
+    Attributes
+    ----------
+        mean (np.ndarray): Forest predictions, as returned by `predict`.
+        std (np.ndarray): Standard deviation over the trees.
+        quantiles (dict[float, np.ndarray]): Quantile over the trees, by
+            level.
+    """
+
+    mean: np.ndarray
+    std: np.ndarray
+    quantiles: dict[float, np.ndarray]
+
+
+class Explanation(NamedTuple):
+    """
+    Contribution of every feature to every prediction (TreeSHAP).
+
+    Attributes
+    ----------
+        prediction (np.ndarray): Predictions, as returned by `predict`.
+        base_value (float): Prediction expected over the training data.
+        values (np.ndarray): Contributions, (n_rows, n_features); a row
+            sums to its prediction minus `base_value`.
+        feature_names (tuple[str, ...]): Features of the columns of
+            `values`, in training order.
+    """
+
+    prediction: np.ndarray
+    base_value: float
+    values: np.ndarray
+    feature_names: tuple[str, ...]
+
+    def contributions(self) -> list[dict[str, float]]:
+        """Contributions of every row keyed by feature name."""
+        return [dict(zip(self.feature_names, row.tolist())) for row in self.values]
 
 
 class ModelInferenceService:
@@ -25,22 +123,100 @@ class ModelInferenceService:
     Attributes
     ----------
         model : object
-        the ML model object loaded from a pickle file
+        the ML model object loaded from a pickle file, or a FlatForest
+        memory-mapped from `.npy` node arrays or flattened at load time
+        for the flat inference engine
 
     Methods
     -------
         __init__(self) : Constructor that initializes the model object
         load_model(self) : Loads the model from a pickle file if it exists
-        else builds one predict(self, input_parameters) : Makes a prediction
+        else builds one
+        reload_model(self) : Loads, warms and swaps in the current artifact
+        start_watching(self, interval) : Reloads the model in the background
+        whenever its artifact files change
+        stop_watching(self) : Stops the background watcher
+        predict(self, input_parameters) : Makes a prediction
         using the loaded model by passing input parameters
+        predict_batch(self, input_parameters, chunk_size) : Makes predictions
+        for many rows at once, scoring them in chunks
+        predict_interval(self, input_parameters, quantiles, chunk_size) :
+        Makes predictions with the spread of the trees around them
+        explain(self, input_parameters, chunk_size) : Makes predictions
+        with the contribution of every feature to them
+        predict_listings(self, listings, chunk_size) : Prepares raw listings
+        with the training feature transformer and predicts them
+        build_feature_matrix(self, input_parameters) : Validates input rows
+        against the feature schema saved with the model and builds the
+        feature matrix in training column order
+
+    The artifact loaded is the model variant set by `model_variant`: the
+    full model, or the compressed or distilled one saved next to it by
+    the build (see `models.pipe.compression`). A variant the build did
+    not save falls back to the full model with a warning, until it is.
+
+    With `prediction_cache_size > 0` predictions are cached per feature
+    vector in `cache` (a PredictionCache), which is emptied whenever
+    `load_model` loads a different artifact.
+
+    `model`, `model_id`, `schema`, `explainer` and `version` read the
+    current LoadedModel snapshot; `version` counts the models loaded so far.
 
     """
 
     def __init__(self) -> None:
         """Initializes the model object"""
-        self.model = None
+        self._loaded: LoadedModel | None = None
+        self.preprocessor = None
+        self._preprocessor_id = None
         self.model_path = model_setting.model_path
-        self.model_name = model_setting.model_name
+        # the full model, or its compressed or distilled variant
+        self.model_name = variant_model_name(model_setting.model_variant)
+        self.preprocessor_name = model_setting.preprocessor_name
+        self.feature_schema_name = model_setting.feature_schema_name
+        self.model_format = model_setting.model_format
+        self.inference_engine = model_setting.inference_engine
+        self.batch_chunk_size = model_setting.batch_chunk_size
+        self.cache = (
+            PredictionCache(
+                model_setting.prediction_cache_size,
+                ttl=model_setting.prediction_cache_ttl,
+            )
+            if model_setting.prediction_cache_size > 0
+            else None
+        )
+
+        # (model_id, FlatForest) walked for intervals on the sklearn engine
+        self._tree_model: tuple[str, FlatForest] | None = None
+
+        self._reload_lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self._stop_watching = threading.Event()
+
+    @property
+    def model(self):
+        """The current model, None before `load_model`."""
+        return None if self._loaded is None else self._loaded.model
+
+    @property
+    def model_id(self) -> str | None:
+        """Identity of the current model artifact."""
+        return None if self._loaded is None else self._loaded.model_id
+
+    @property
+    def schema(self) -> FeatureSchema | None:
+        """Feature schema of the current model."""
+        return None if self._loaded is None else self._loaded.schema
+
+    @property
+    def explainer(self) -> TreeExplainer | None:
+        """Tree path summaries of the current model, used by `explain`."""
+        return None if self._loaded is None else self._loaded.explainer
+
+    @property
+    def version(self) -> int:
+        """Number of models loaded so far, 0 before `load_model`."""
+        return 0 if self._loaded is None else self._loaded.version
 
     def load_model(self) -> None:
         """
@@ -56,10 +232,40 @@ class ModelInferenceService:
             f"checking the existance of the model config file at "
             f"{self.model_path}/{self.model_name}",
         )
+        self._swap(self._load_artifact(), trigger="load")
 
-        model_path = Path(
-            f"{self.model_path}/{self.model_name}",
-        )
+    def reload_model(self) -> bool:
+        """
+        Function that loads the current artifact and swaps it in.
+
+        The new model is read, flattened if needed and warmed with a few
+        predictions while the previous one keeps serving, then swapped
+        in with one assignment. On failure the previous model stays.
+
+        Returns:
+            bool: True if the new model was swapped in.
+        """
+        with self._reload_lock:
+            try:
+                loaded = self._load_artifact()
+            except Exception as err:  # a bad artifact must not stop serving
+                logger.error(f"reloading the model failed, keeping the current: {err}")
+                return False
+            self._swap(loaded, trigger="reload")
+            return True
+
+    def _load_artifact(self) -> LoadedModel:
+        """
+        Function that reads and warms the artifact without serving it.
+
+        Returns:
+            LoadedModel: The snapshot of the new model.
+
+        Raises:
+            FileNotFoundError: if the model file does not exist.
+            ValueError: if the schema does not match the model features.
+        """
+        model_path = self._variant_path()
 
         if not model_path.exists():
             raise FileNotFoundError('Model file does not exist!')
@@ -69,26 +275,701 @@ class ModelInferenceService:
             # )
 
         logger.info(
-            f"model {self.model_name} exists --> "
+            f"model {model_path.name} exists --> "
             "loading model configuration file",
         )
 
+        start = time.perf_counter()
+        # taken first: files rewritten during the load trigger another one
+        stamp = self._artifact_stamp()
+        model = self._read_model(model_path)
+        model_id = self._artifact_identity(model, model_path)
+        if self.inference_engine == "flat" and not isinstance(
+            model,
+            FlatForest,
+        ):
+            logger.info("flattening the model for the flat inference engine")
+            model = FlatForest.from_estimator(model)
+        schema = self._load_schema(model)
+        explainer = self._build_explainer(model)
+        load_seconds = time.perf_counter() - start
+        self._warm_up(model, schema)
+        warm_seconds = time.perf_counter() - start - load_seconds
+
+        # identity logged once here, never the repr of the forest per request
+        if isinstance(model, FlatForest):
+            n_trees = len(model.roots)
+        elif hasattr(model, "tree_"):
+            n_trees = 1  # the distilled variant
+        else:
+            # boosting iterations of a gradient boosting model
+            n_trees = getattr(model, "n_iter_", len(getattr(model, "estimators_", [])))
+        logger.info(
+            f"loaded model {model_id} ({type(model).__name__}, "
+            f"{n_trees} trees, engine {self.inference_engine}) in "
+            f"{load_seconds:.3f} s, warmed in {warm_seconds:.3f} s",
+        )
+        return LoadedModel(
+            model,
+            model_id,
+            schema,
+            stamp,
+            self.version + 1,
+            load_seconds,
+            warm_seconds,
+            explainer,
+        )
+
+    def _variant_path(self) -> Path:
+        """
+        Function that finds the file of the configured model variant.
+
+        A compressed or distilled variant is only saved by a full build
+        with `compression_enabled` (the compressed one for a bagged
+        forest, the distilled one with `compression_distill`) and is
+        deleted by incremental updates; without it the full model is
+        served.
+
+        Returns:
+            Path: The variant file, or the full model file if the variant
+            was not saved.
+        """
+        model_path = Path(f"{self.model_path}/{self.model_name}")
+        full_path = Path(f"{self.model_path}/{model_setting.model_name}")
+        if model_path.exists() or model_path == full_path:
+            return model_path
+        if not model_setting.compression_enabled:
+            reason = "compression_enabled is off"
+        elif model_setting.model_variant == "distilled":
+            reason = "compression_distill is off or it was not saved yet"
+        else:
+            reason = "only a bagged forest is compressed"
+        logger.warning(
+            f"no {model_setting.model_variant} model at {model_path} ({reason}, "
+            f"or an incremental update deleted it), serving the full model",
+        )
+        return full_path
+
+    def _build_explainer(self, model) -> TreeExplainer | None:
+        """
+        Function that summarizes the tree paths of a model being loaded.
+
+        Returns:
+            TreeExplainer | None: None with `explain_enabled` off, or for
+            a flat artifact saved without node covers.
+        """
+        if not model_setting.explain_enabled:
+            return None
+        try:
+            if not isinstance(model, FlatForest):
+                model = FlatForest.from_estimator(model)
+            explainer = TreeExplainer(model)
+        except ValueError as err:
+            logger.warning(f"predictions of this model cannot be explained: {err}")
+            return None
+        logger.info(f"summarized {explainer.n_paths} tree paths for explanations")
+        return explainer
+
+    def _swap(self, loaded: LoadedModel, trigger: str) -> None:
+        """
+        Function that makes a loaded snapshot the one serving requests.
+
+        The cache is emptied first, so predictions of the previous model
+        still running are not cached for the new one.
+        """
+        if self.cache is not None:
+            # predictions of another artifact must not be served
+            self.cache.reset(loaded.model_id)
+        self._loaded = loaded
+        emit_metric(
+            "model_load",
+            loaded.model_id,
+            trigger=trigger,
+            version=loaded.version,
+            load_seconds=round(loaded.load_seconds, 6),
+            warm_seconds=round(loaded.warm_seconds, 6),
+        )
+
+    def _warm_up(self, model, schema: FeatureSchema | None) -> None:
+        """
+        Function that predicts a few rows on a model not serving yet.
+
+        Pages in memory-mapped arrays and runs the first-call paths of
+        the predictor before the model takes requests. Rows are drawn in
+        the training range of every feature when the schema has it.
+        """
+        n_features = model.n_features_in_
+        rng = np.random.default_rng(0)
+        if schema is not None and schema.minimums is not None:
+            low, high = np.array(schema.minimums), np.array(schema.maximums)
+        else:
+            low, high = np.zeros(n_features), np.ones(n_features)
+        rows = rng.uniform(low, high, (WARMUP_ROWS, n_features))
+        with warnings.catch_warnings():
+            warnings.filterwarnings(
+                "ignore",
+                message="X does not have valid feature names",
+            )
+            model.predict(rows.astype(np.float32))
+
+    def start_watching(self, interval: float | None = None) -> None:
+        """
+        Function that starts reloading the model when its files change.
+
+        A daemon thread compares the size and mtime of the model,
+        feature schema and transformer files every `interval` seconds,
+        and reloads once they changed and then stayed the same for one
+        more check, so a half-written artifact is not loaded.
+
+        Args:
+            interval (float | None): Seconds between checks, defaults to
+                `model_setting.model_reload_interval`; 0 does not watch.
+        """
+        interval = model_setting.model_reload_interval if interval is None else interval
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            args=(interval,),
+            name="model-watcher",
+            daemon=True,
+        )
+        self._watcher.start()
+        logger.info(f"watching the model artifacts every {interval} s")
+
+    def stop_watching(self) -> None:
+        """Function that stops the background watcher."""
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        """Reload the model whenever its files changed and settled."""
+        previous = self._artifact_stamp()
+        failed = None
+        while not self._stop_watching.wait(interval):
+            stamp = self._artifact_stamp()
+            settled = stamp == previous
+            previous = stamp
+            loaded = self._loaded
+            if not settled or stamp == failed or (loaded and stamp == loaded.stamp):
+                continue
+            logger.info(f"model artifacts changed, reloading {self.model_name}")
+            failed = None if self.reload_model() else stamp
+
+    def _artifact_stamp(self) -> tuple:
+        """
+        Function that stamps the artifact files with size and mtime.
+
+        Returns:
+            tuple: (name, size, mtime) of every artifact file, None for
+            the missing ones.
+        """
+        # the full model is served while the variant is missing
+        names = list(dict.fromkeys((self.model_name, model_setting.model_name)))
+        paths = [
+            *(Path(f"{self.model_path}/{name}") for name in names),
+            Path(f"{self.model_path}/{self.feature_schema_name}"),
+            Path(f"{self.model_path}/{self.preprocessor_name}"),
+        ]
+        if self.model_format == "npy":
+            paths.extend(flat_model_path(name) / "meta.json" for name in names)
+        stamp = []
+        for path in paths:
+            try:
+                stat = path.stat()
+                stamp.append((path.name, stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _read_model(self, model_path: Path):
+        """
+        Function that reads the model in the configured artifact format.
+
+        With `model_format = npy` the flat node arrays next to the pickle
+        are memory-mapped, so worker processes share one copy of the
+        model; the pickle is the fallback when they are missing.
+
+        Args:
+            model_path (Path): Path to the pickled model.
+
+        Returns:
+            The loaded model, a FlatForest or the unpickled estimator.
+        """
+        if self.model_format == "npy":
+            flat_path = flat_model_path(model_path.name)
+            if (flat_path / "meta.json").exists():
+                logger.info(f"memory-mapping flat model arrays at {flat_path}")
+                return FlatForest.load(flat_path, mmap_mode="r")
+            logger.warning(
+                f"no flat model at {flat_path}, falling back to the pickle",
+            )
+
         with open(model_path, "rb") as model_file:
-            self.model = pk.load(model_file)
+            return pk.load(model_file)
+
+    def _artifact_identity(self, model, model_path: Path) -> str:
+        """
+        Function that identifies the artifact just loaded.
+
+        The path, size and modification time of the file read (the
+        pickle, or the flat model metadata) change whenever a new
+        artifact is written, without hashing the whole file.
+
+        Args:
+            model: The model just read.
+            model_path (Path): Path to the pickled model.
+
+        Returns:
+            str: The identity of the artifact.
+        """
+        if isinstance(model, FlatForest) and self.model_format == "npy":
+            model_path = flat_model_path(model_path.name) / "meta.json"
+        stat = model_path.stat()
+        return f"{model_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _load_schema(self, model) -> FeatureSchema | None:
+        """
+        Function that loads the feature schema saved with the model.
+
+        Models saved without a schema get an untyped one built from the
+        feature names they recorded, if any.
+
+        Args:
+            model: The model the schema belongs to.
+
+        Returns:
+            FeatureSchema | None: The schema, None if the model has
+            neither a schema nor feature names.
+
+        Raises:
+            ValueError: if the schema does not match the model features.
+        """
+        feature_names = getattr(model, "feature_names_in_", None)
+        schema_path = Path(f"{self.model_path}/{self.feature_schema_name}")
+        if not schema_path.exists():
+            logger.warning(f"no feature schema at {schema_path}")
+            if feature_names is None:
+                return None
+            return FeatureSchema.from_names(feature_names)
+
+        schema = FeatureSchema.load(schema_path)
+        expected = (
+            list(feature_names)
+            if feature_names is not None
+            else [None] * model.n_features_in_
+        )
+        if len(schema.names) != len(expected) or (
+            feature_names is not None and schema.names != expected
+        ):
+            raise ValueError(
+                f"feature schema {schema_path} {schema.names} does not match "
+                f"the model features {expected}",
+            )
+        return schema
+
+    def _load_preprocessor(self, model_id: str) -> None:
+        """
+        Function that loads the feature transformer saved with the model.
+
+        Args:
+            model_id (str): Identity of the model it is loaded for.
+
+        Raises:
+            FileNotFoundError: if no transformer was saved with the model.
+        """
+        preprocessor_path = Path(
+            f"{self.model_path}/{self.preprocessor_name}",
+        )
+        if not preprocessor_path.exists():
+            raise FileNotFoundError(
+                f"No feature transformer at {preprocessor_path}, "
+                "raw listings cannot be scored",
+            )
+        logger.info(f"loading feature transformer {preprocessor_path}")
+        with open(preprocessor_path, "rb") as preprocessor_file:
+            self.preprocessor = pk.load(preprocessor_file)
+        self._preprocessor_id = model_id
 
-    def predict(self, input_parameters: list) -> list:
+    def predict(self, input_parameters: "Mapping | list") -> np.ndarray:
         """
         Function that makes a prediction using the loaded model
         by passing input parameters
 
         Args:
-            input_parameters (list): list of input parameters for the model
+            input_parameters (Mapping | list): dict of the training
+                features by name, or list of their values in training
+                column order
 
         Returns:
-            list: list of predicted values
+            np.ndarray: array holding the predicted value
         """
-        logger.info(
-            f"input parameters : {input_parameters} ",
-            f"making prediction with model : {self.model}",
+        # one snapshot for the whole request, a reload may swap it meanwhile
+        loaded = self._loaded
+        # per-request record: sampled in serving mode, rendered only if
+        # a sink accepts DEBUG; the model identity is logged at load time
+        if log_request_sampled():
+            logger.opt(lazy=True).debug(
+                "making prediction with model {} for input parameters : {}",
+                lambda: loaded.model_id,
+                lambda: input_parameters,
+            )
+        features = self._build_feature_matrix(
+            loaded,
+            [input_parameters]
+            if isinstance(input_parameters, Mapping)
+            else np.asarray([input_parameters], dtype=np.float32),
         )
-        return self.model.predict([input_parameters])
\ No newline at end of file
+        if self.cache is None:
+            return self._predict_chunks(loaded.model, features, 1)
+
+        key = self.cache.key(features[0])
+        cached = self.cache.get(key)
+        if cached is not None:
+            return np.array([cached])
+        prediction = self._predict_chunks(loaded.model, features, 1)
+        self.cache.put(key, float(prediction[0]), model_id=loaded.model_id)
+        return prediction
+
+    def predict_batch(
+        self,
+        input_parameters: "np.ndarray | pd.DataFrame | Iterable[Mapping]",
+        chunk_size: int | None = None,
+    ) -> np.ndarray:
+        """
+        Function that makes predictions for many rows at once.
+
+        The feature matrix is validated and built once, then scored in
+        chunks of `chunk_size` rows so a whole portfolio costs a handful
+        of forest predict calls instead of one per apartment.
+
+        Args:
+            input_parameters (np.ndarray | pd.DataFrame | Iterable[Mapping]):
+                2-D array in training column order, DataFrame with the
+                training feature columns, or an iterable of feature dicts.
+            chunk_size (int | None): Rows per predict call, defaults to
+                `model_setting.batch_chunk_size`.
+
+        Returns:
+            np.ndarray: predicted values in input order.
+        """
+        chunk_size = chunk_size or self.batch_chunk_size
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+
+        loaded = self._loaded
+        features = self._build_feature_matrix(loaded, input_parameters)
+        n_rows = features.shape[0]
+        if log_request_sampled():
+            logger.debug(
+                "making batch prediction for {} rows in chunks of {}",
+                n_rows,
+                chunk_size,
+            )
+
+        if self.cache is None:
+            return self._predict_chunks(loaded.model, features, chunk_size)
+
+        # score only the rows the cache does not already hold
+        keys = [self.cache.key(row) for row in features]
+        cached = [self.cache.get(key) for key in keys]
+        missing = np.array([value is None for value in cached], dtype=bool)
+        predictions = np.array(
+            [np.nan if value is None else value for value in cached],
+            dtype=np.float64,
+        )
+        if missing.any():
+            predictions[missing] = self._predict_chunks(
+                loaded.model,
+                features[missing],
+                chunk_size,
+            )
+            for i in np.flatnonzero(missing):
+                self.cache.put(
+                    keys[i],
+                    float(predictions[i]),
+                    model_id=loaded.model_id,
+                )
+        return predictions
+
+    def predict_interval(
+        self,
+        input_parameters: "Mapping | np.ndarray | pd.DataFrame | Iterable[Mapping]",
+        quantiles: "Iterable[float] | None" = None,
+        chunk_size: int | None = None,
+    ) -> PredictionInterval:
+        """
+        Function that makes predictions with the spread of the trees.
+
+        The leaf values of every tree for a chunk of rows are gathered in
+        one (trees x rows) matrix by a single walk of the flattened forest
+        (see `FlatForest.predict_trees`), then reduced along the trees
+        axis to the mean, standard deviation and quantiles. With the
+        sklearn engine the forest is flattened on the first interval
+        request for each loaded model. Predictions are not cached.
+
+        Args:
+            input_parameters: one feature dict, or a batch as accepted by
+                `predict_batch`.
+            quantiles (Iterable[float] | None): Levels in [0, 1], defaults
+                to `model_setting.interval_quantiles`.
+            chunk_size (int | None): Rows per walk, defaults to
+                `model_setting.batch_chunk_size`.
+
+        Returns:
+            PredictionInterval: mean, std and quantiles, in input order.
+
+        Raises:
+            ValueError: if a level is outside [0, 1] or the model sums its
+                trees (gradient boosting) instead of averaging them.
+        """
+        levels = [
+            float(q)
+            for q in (
+                model_setting.interval_quantiles if quantiles is None else quantiles
+            )
+        ]
+        if any(not 0.0 <= q <= 1.0 for q in levels):
+            raise ValueError(f"quantiles must be in [0, 1], got {levels}")
+        chunk_size = chunk_size or self.batch_chunk_size
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+
+        loaded = self._loaded
+        features = self._build_feature_matrix(
+            loaded,
+            [input_parameters]
+            if isinstance(input_parameters, Mapping)
+            else input_parameters,
+        )
+        forest = self._forest_for_intervals(loaded)
+        mean = np.empty(len(features), dtype=np.float64)
+        std = np.empty(len(features), dtype=np.float64)
+        spread = np.empty((len(levels), len(features)), dtype=np.float64)
+        for start in range(0, len(features), chunk_size):
+            stop = min(start + chunk_size, len(features))
+            leaves = forest.predict_trees(features[start:stop])
+            mean[start:stop] = leaves.mean(axis=0)
+            std[start:stop] = leaves.std(axis=0)
+            if levels:
+                spread[:, start:stop] = _tree_quantiles(leaves, levels)
+        return PredictionInterval(mean, std, dict(zip(levels, spread)))
+
+    def explain(
+        self,
+        input_parameters: "Mapping | np.ndarray | pd.DataFrame | Iterable[Mapping]",
+        chunk_size: int | None = None,
+    ) -> Explanation:
+        """
+        Function that makes predictions with the contribution of every
+        feature to them.
+
+        The contributions are the exact TreeSHAP values of the model,
+        computed from the path summaries built when it was loaded (see
+        `models.tree_shap`), for all the rows of a chunk at once.
+
+        Args:
+            input_parameters: one feature dict, or a batch as accepted by
+                `predict_batch`.
+            chunk_size (int | None): Rows per predict and explainer call,
+                defaults to `model_setting.batch_chunk_size`.
+
+        Returns:
+            Explanation: predictions, base value and contributions keyed
+            by the training feature names, in input order.
+
+        Raises:
+            RuntimeError: if no model is loaded or it has no explainer.
+            ValueError: if chunk_size is not positive.
+        """
+        chunk_size = chunk_size or self.batch_chunk_size
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+        loaded = self._loaded
+        features = self._build_feature_matrix(
+            loaded,
+            [input_parameters]
+            if isinstance(input_parameters, Mapping)
+            else input_parameters,
+        )
+        if loaded.explainer is None:
+            raise RuntimeError(
+                "the loaded model has no explainer, enable explain_enabled "
+                "(flat artifacts must be saved with their node covers)",
+            )
+        names = (
+            loaded.schema.names
+            if loaded.schema is not None
+            else [f"x{i}" for i in range(features.shape[1])]
+        )
+        contributions = np.empty(features.shape, dtype=np.float64)
+        for start in range(0, len(features), chunk_size):
+            stop = min(start + chunk_size, len(features))
+            contributions[start:stop] = loaded.explainer.shap_values(
+                features[start:stop],
+            )
+        return Explanation(
+            self._predict_chunks(loaded.model, features, chunk_size),
+            loaded.explainer.expected_value,
+            contributions,
+            tuple(names),
+        )
+
+    def _forest_for_intervals(self, loaded: LoadedModel | None) -> FlatForest:
+        """Function that returns the flat forest of a model snapshot."""
+        if loaded is None:
+            raise RuntimeError("Model is not loaded, call load_model first")
+        if isinstance(loaded.model, FlatForest):
+            forest = loaded.model
+        else:
+            cached = self._tree_model
+            if cached is not None and cached[0] == loaded.model_id:
+                forest = cached[1]
+            else:
+                logger.info("flattening the model for interval predictions")
+                forest = FlatForest.from_estimator(loaded.model)
+                self._tree_model = (loaded.model_id, forest)
+        if not forest.average:
+            raise ValueError(
+                "prediction intervals need a forest averaging its trees, "
+                "the trees of a boosted model are summed",
+            )
+        return forest
+
+    def _predict_chunks(
+        self,
+        model,
+        features: np.ndarray,
+        chunk_size: int,
+    ) -> np.ndarray:
+        """
+        Function that scores a validated feature matrix chunk by chunk.
+
+        Args:
+            model: Model of the request snapshot.
+            features (np.ndarray): 2-D float32 array in training order.
+            chunk_size (int): Rows per predict call.
+
+        Returns:
+            np.ndarray: predicted values in input order.
+        """
+        predictions = np.empty(len(features), dtype=np.float64)
+        with warnings.catch_warnings():
+            # the matrix is already in training column order
+            warnings.filterwarnings(
+                "ignore",
+                message="X does not have valid feature names",
+            )
+            for start in range(0, len(features), chunk_size):
+                stop = min(start + chunk_size, len(features))
+                predictions[start:stop] = model.predict(
+                    features[start:stop],
+                )
+        return predictions
+
+    def predict_listings(
+        self,
+        listings: "pd.DataFrame",
+        chunk_size: int | None = None,
+    ) -> np.ndarray:
+        """
+        Function that predicts raw listings as stored in the database.
+
+        The listings are prepared by the feature transformer fitted
+        during training, then scored with `predict_batch`.
+
+        Args:
+            listings (pd.DataFrame): Raw RentApartments rows.
+            chunk_size (int | None): Rows per predict call.
+
+        Returns:
+            np.ndarray: predicted values in input order.
+        """
+        model_id = self.model_id
+        if self.preprocessor is None or self._preprocessor_id != model_id:
+            self._load_preprocessor(model_id)
+        features = self.preprocessor.transform(listings)
+        return self.predict_batch(features, chunk_size=chunk_size)
+
+    def build_feature_matrix(
+        self,
+        input_parameters: "np.ndarray | pd.DataFrame | Iterable[Mapping]",
+    ) -> np.ndarray:
+        """
+        Validate batch input and turn it into one float feature matrix.
+
+        Feature dicts are mapped by name through the feature schema saved
+        with the model, straight into a preallocated float32 buffer;
+        arrays must already be in training column order. Every matrix is
+        checked against the feature kinds of the schema.
+
+        Args:
+            input_parameters: array, DataFrame or iterable of feature dicts.
+
+        Returns:
+            np.ndarray: 2-D float32 array in training column order, the
+            dtype the forest predicts on, so it is not converted again.
+
+        Raises:
+            RuntimeError: if no model is loaded.
+            ValueError: if the input does not match the feature schema.
+        """
+        return self._build_feature_matrix(self._loaded, input_parameters)
+
+    def _build_feature_matrix(
+        self,
+        loaded: LoadedModel | None,
+        input_parameters: "np.ndarray | pd.DataFrame | Iterable[Mapping]",
+    ) -> np.ndarray:
+        """Function that builds the feature matrix for one model snapshot."""
+        if loaded is None:
+            raise RuntimeError("Model is not loaded, call load_model first")
+        schema = loaded.schema or FeatureSchema.from_names(
+            f"x{i}" for i in range(loaded.model.n_features_in_)
+        )
+
+        # pandas is only imported by callers that pass DataFrames
+        pandas = sys.modules.get("pandas")
+        if pandas is not None and isinstance(input_parameters, pandas.DataFrame):
+            if loaded.schema is None:
+                raise ValueError("model has no feature names to select by")
+            missing = set(schema.names) - set(input_parameters.columns)
+            if missing:
+                raise ValueError(f"missing feature columns: {sorted(missing)}")
+            features = input_parameters[schema.names].to_numpy(
+                dtype=np.float32,
+            )
+        elif isinstance(input_parameters, np.ndarray):
+            features = np.asarray(input_parameters, dtype=np.float32)
+        else:
+            if loaded.schema is None:
+                raise ValueError("model has no feature names to map dicts by")
+            return schema.assemble(input_parameters)
+        return schema.validate(features)
+
+
+def _tree_quantiles(leaves: np.ndarray, levels: list[float]) -> np.ndarray:
+    """
+    Quantiles over the trees axis of a (trees x rows) matrix.
+
+    The matrix is sorted once along the trees axis and every level is
+    interpolated linearly between its two closest trees, as the default
+    method of `np.quantile`, which partitions again for every call and is
+    several times slower on these short columns.
+
+    Args:
+        leaves (np.ndarray): Per-tree predictions, (n_trees, n_rows).
+        levels (list[float]): Quantile levels in [0, 1].
+
+    Returns:
+        np.ndarray: Quantiles of shape (len(levels), n_rows).
+    """
+    ordered = np.sort(leaves, axis=0)
+    position = np.asarray(levels) * (len(ordered) - 1)
+    below = np.floor(position).astype(int)
+    above = np.minimum(below + 1, len(ordered) - 1)
+    weight = (position - below)[:, None]
+    return ordered[below] * (1 - weight) + ordered[above] * weight
@@ -0,0 +1,427 @@
+"""
+This module provides an async HTTP server for model predictions.
+
+It contains the MicroBatcher class, which coalesces concurrent requests
+into batches bounded by a maximum size and a maximum wait time and scores
+each batch with a single `ModelInferenceService.predict_batch` call, and
+the PredictionServer class, a small HTTP/1.1 server built on asyncio
+streams that loads the model once and answers JSON feature dicts.
+
+Endpoints:
+    POST /predict : body is one JSON feature dict, answers
+        {"prediction": float, "deadline_ms": float, "elapsed_ms": float}.
+        The `X-Deadline-Ms` request header overrides the default budget;
+        a request not scored within its deadline gets a 504.
+    POST /predict_interval : same body and deadline, answers
+        {"prediction": float, "std": float, "quantiles": {level: float},
+        "deadline_ms": float, "elapsed_ms": float} with the spread of the
+        trees at `interval_quantiles`. Not micro-batched: the per-tree
+        matrix of a single row is computed in one walk of the forest.
+    POST /explain : same body and deadline, answers {"prediction": float,
+        "base_value": float, "contributions": {feature: float},
+        "deadline_ms": float, "elapsed_ms": float}; the contributions add
+        up to the prediction minus the base value (TreeSHAP).
+    GET /health : answers {"status": "ok", "model_id": str,
+        "model_version": int} once the model is loaded; the version grows
+        with every model hot-reloaded by the service.
+
+A request that cannot be parsed gets a 400, a body larger than
+`server_max_body_bytes` a 413 and more headers than `server_max_headers`
+or `server_max_header_bytes` a 431, all closing the connection. An
+`X-Deadline-Ms` that is not a positive number gets a 400.
+"""
+
+import asyncio
+import json
+import math
+from http import HTTPStatus
+
+import numpy as np
+from loguru import logger
+
+from config import server_setting
+from models.model_inference import ModelInferenceService
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request is not scored within its deadline."""
+
+
+class RequestError(Exception):
+    """Raised when a request cannot be read, with the status to answer."""
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        """Initializes the error with its HTTP status"""
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """
+    MicroBatcher class coalescing single-row requests into batches.
+
+    Requests are queued with their absolute deadline; a background task
+    takes the first waiting request, waits up to `max_wait_ms` for up to
+    `max_batch_size - 1` more, drops the expired ones and scores the rest
+    with one predict call in a worker thread.
+
+    Attributes
+    ----------
+        service (ModelInferenceService): Service with a loaded model.
+        max_batch_size (int): Most rows scored per predict call.
+        max_wait_ms (float): Longest the first request of a batch waits.
+
+    Methods
+    -------
+        start(self) : Starts the background batching task
+        stop(self) : Cancels the background batching task
+        submit(self, row, deadline) : Queues a row and awaits its prediction
+    """
+
+    def __init__(
+        self,
+        service: ModelInferenceService,
+        max_batch_size: int | None = None,
+        max_wait_ms: float | None = None,
+    ) -> None:
+        """Initializes the batcher around a loaded inference service"""
+        self.service = service
+        self.max_batch_size = max_batch_size or server_setting.server_max_batch_size
+        self.max_wait_ms = (
+            server_setting.server_max_wait_ms if max_wait_ms is None else max_wait_ms
+        )
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the background task that forms and scores batches."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the background task."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def submit(self, row: np.ndarray, deadline: float) -> float:
+        """
+        Queue one feature row and wait for its prediction.
+
+        Args:
+            row (np.ndarray): Feature row in training column order.
+            deadline (float): Absolute `loop.time()` by which to answer.
+
+        Returns:
+            float: The predicted value.
+
+        Raises:
+            DeadlineExceeded: if the row is not scored by its deadline.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self._queue.put((row, deadline, future))
+        try:
+            return await asyncio.wait_for(future, deadline - loop.time())
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded from None
+
+    async def _run(self) -> None:
+        """Form batches from the queue and score them, forever."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            batch_deadline = loop.time() + self.max_wait_ms / 1e3
+            while len(batch) < self.max_batch_size:
+                timeout = batch_deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            now = loop.time()
+            live = [
+                (row, future)
+                for row, deadline, future in batch
+                if deadline > now and not future.done()
+            ]
+            if not live:
+                continue
+            rows = np.vstack([row for row, _ in live])
+            try:
+                predictions = await loop.run_in_executor(
+                    None,
+                    self.service.predict_batch,
+                    rows,
+                )
+            except Exception as err:  # surfaced to every request of the batch
+                for _, future in live:
+                    if not future.done():
+                        future.set_exception(err)
+                continue
+            for (_, future), prediction in zip(live, predictions):
+                if not future.done():
+                    future.set_result(float(prediction))
+
+
+class PredictionServer:
+    """
+    PredictionServer class serving predictions over HTTP.
+
+    Attributes
+    ----------
+        service (ModelInferenceService): Service with a loaded model.
+        batcher (MicroBatcher): Batcher scoring the queued requests.
+        host (str): Interface to bind.
+        port (int): Port to listen on.
+        deadline_ms (float): Default time budget of a request.
+        max_body_bytes (int): Largest request body read.
+        max_headers (int): Most header lines read per request.
+        max_header_bytes (int): Largest request line and headers read.
+
+    Methods
+    -------
+        serve_forever(self) : Starts the batcher and serves until cancelled
+    """
+
+    def __init__(
+        self,
+        service: ModelInferenceService,
+        host: str | None = None,
+        port: int | None = None,
+        deadline_ms: float | None = None,
+        batcher: MicroBatcher | None = None,
+        max_body_bytes: int | None = None,
+        max_headers: int | None = None,
+        max_header_bytes: int | None = None,
+    ) -> None:
+        """Initializes the server around a loaded inference service"""
+        self.service = service
+        self.batcher = batcher or MicroBatcher(service)
+        self.host = host or server_setting.server_host
+        self.port = port or server_setting.server_port
+        self.deadline_ms = deadline_ms or server_setting.server_deadline_ms
+        self.max_body_bytes = max_body_bytes or server_setting.server_max_body_bytes
+        self.max_headers = max_headers or server_setting.server_max_headers
+        self.max_header_bytes = (
+            max_header_bytes or server_setting.server_max_header_bytes
+        )
+
+    async def serve_forever(self) -> None:
+        """Start the batcher and accept connections until cancelled."""
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(
+            f"serving predictions on http://{self.host}:{self.port} "
+            f"(batch <= {self.batcher.max_batch_size}, "
+            f"wait <= {self.batcher.max_wait_ms} ms)",
+        )
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Answer the requests of one keep-alive connection."""
+        try:
+            while True:
+                try:
+                    request = await _read_request(
+                        reader,
+                        self.max_body_bytes,
+                        self.max_headers,
+                        self.max_header_bytes,
+                    )
+                except RequestError as err:
+                    # the rest of the stream cannot be framed, answer and close
+                    _write_response(writer, err.status, {"error": str(err)})
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                status, body = await self._dispatch(*request)
+                _write_response(writer, status, body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(
+        self,
+        method: str,
+        path: str,
+        headers: dict,
+        body: bytes,
+    ) -> tuple[HTTPStatus, dict]:
+        """Route one request and return its status and JSON body."""
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, {
+                "status": "ok",
+                "model_id": self.service.model_id,
+                "model_version": self.service.version,
+            }
+        if path not in ("/predict", "/predict_interval", "/explain"):
+            return HTTPStatus.NOT_FOUND, {"error": f"no route {path}"}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            deadline_ms = float(headers.get("x-deadline-ms", self.deadline_ms))
+            if not (math.isfinite(deadline_ms) and deadline_ms > 0):
+                raise ValueError("X-Deadline-Ms must be a positive number")
+            features = json.loads(body)
+            if not isinstance(features, dict):
+                raise ValueError("body must be a JSON object of features")
+            row = self.service.build_feature_matrix([features])
+        except (ValueError, TypeError) as err:
+            return HTTPStatus.BAD_REQUEST, {"error": str(err)}
+
+        try:
+            if path == "/predict":
+                result = {
+                    "prediction": await self.batcher.submit(
+                        row,
+                        start + deadline_ms / 1e3,
+                    ),
+                }
+            else:
+                handler = (
+                    self._predict_interval
+                    if path == "/predict_interval"
+                    else self._explain
+                )
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(None, handler, row),
+                    start + deadline_ms / 1e3 - loop.time(),
+                )
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            return HTTPStatus.GATEWAY_TIMEOUT, {
+                "error": "deadline exceeded",
+                "deadline_ms": deadline_ms,
+            }
+        except Exception as err:  # reported to the client as a 500
+            logger.exception(f"prediction failed: {err}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "prediction failed"}
+
+        return HTTPStatus.OK, {
+            **result,
+            "deadline_ms": deadline_ms,
+            "elapsed_ms": (loop.time() - start) * 1e3,
+        }
+
+    def _predict_interval(self, row: np.ndarray) -> dict:
+        """Score one row with the spread of the trees, as JSON values."""
+        interval = self.service.predict_interval(row)
+        return {
+            "prediction": float(interval.mean[0]),
+            "std": float(interval.std[0]),
+            "quantiles": {
+                str(level): float(values[0])
+                for level, values in interval.quantiles.items()
+            },
+        }
+
+    def _explain(self, row: np.ndarray) -> dict:
+        """Score one row with its feature contributions, as JSON values."""
+        explanation = self.service.explain(row)
+        return {
+            "prediction": float(explanation.prediction[0]),
+            "base_value": explanation.base_value,
+            "contributions": explanation.contributions()[0],
+        }
+
+
+async def _read_request(
+    reader: asyncio.StreamReader,
+    max_body_bytes: int,
+    max_headers: int,
+    max_header_bytes: int,
+) -> tuple[str, str, dict, bytes] | None:
+    """
+    Read one HTTP/1.1 request from a connection.
+
+    Args:
+        reader (asyncio.StreamReader): The connection.
+        max_body_bytes (int): Largest Content-Length accepted.
+        max_headers (int): Most header lines accepted.
+        max_header_bytes (int): Largest request line and headers accepted.
+
+    Returns:
+        tuple | None: (method, path, lower-cased headers, body), or None
+        once the client closed the connection.
+
+    Raises:
+        RequestError: with a 400 for a malformed request line, header line
+            or Content-Length, a 413 for a body above `max_body_bytes`
+            and a 431 for headers above `max_headers` or `max_header_bytes`.
+    """
+    request_line = await _read_line(reader)
+    if not request_line:
+        return None
+    parts = request_line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "malformed request line")
+    method, path, _ = parts
+
+    headers = {}
+    n_lines, n_bytes = 0, len(request_line)
+    while True:
+        if n_lines > max_headers or n_bytes > max_header_bytes:
+            raise RequestError(
+                HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                f"headers above {max_headers} lines or {max_header_bytes} bytes",
+            )
+        line = await _read_line(reader)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        n_lines, n_bytes = n_lines + 1, n_bytes + len(line)
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "malformed Content-Length")
+    if length > max_body_bytes:
+        raise RequestError(
+            HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            f"body of {length} bytes is larger than {max_body_bytes}",
+        )
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+async def _read_line(reader: asyncio.StreamReader) -> bytes:
+    """Read one line, a line beyond the stream buffer limit is a 400."""
+    try:
+        return await reader.readline()
+    except ValueError as err:  # asyncio.LimitOverrunError, re-raised by readline
+        raise RequestError(HTTPStatus.BAD_REQUEST, "line too long") from err
+
+
+def _write_response(
+    writer: asyncio.StreamWriter,
+    status: HTTPStatus,
+    body: dict,
+) -> None:
+    """Write a JSON response keeping the connection open."""
+    payload = json.dumps(body).encode()
+    writer.write(
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "Connection: keep-alive\r\n\r\n".encode("latin-1")
+        + payload,
+    )
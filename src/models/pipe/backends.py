@@ -0,0 +1,95 @@
+"""
+This module provides the estimator backends of the training pipeline.
+
+The backend is selected by configuration (`model_setting.model_backend`):
+    - "random_forest": RandomForestRegressor searched over `GRID_PARAM`.
+    - "hist_gradient_boosting": HistGradientBoostingRegressor searched over
+      `HGB_GRID_PARAM`. Every fit bins the features once into at most
+      `hgb_max_bins` integer bins and searches the splits on histograms of
+      the bins, so the fit time grows about linearly with the rows instead
+      of with the sorting of every feature at every node. The number of
+      boosting iterations is not searched: boosting stops early once the
+      loss on a held-out `hgb_validation_fraction` of the rows has not
+      improved for `hgb_n_iter_no_change` iterations, or at `hgb_max_iter`.
+
+Both backends save the same way and expose `predict`, `n_features_in_`
+and `feature_names_in_`, so the inference service and the flat engine
+serve either one.
+"""
+
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+from config import model_setting
+
+MODEL_BACKENDS = ("random_forest", "hist_gradient_boosting")
+
+# hyperparameter space searched for the random forest
+GRID_PARAM = {
+    "n_estimators": range(50, 100, 20),
+    "criterion": ["squared_error", "poisson", "absolute_error", "friedman_mse"],
+    "max_depth": range(6, 12, 2),
+}
+
+# hyperparameter space searched for gradient boosting, the number of
+# iterations is left to early stopping
+HGB_GRID_PARAM = {
+    "learning_rate": [0.05, 0.1, 0.2],
+    "max_leaf_nodes": [15, 31, 63],
+    "l2_regularization": [0.0, 1.0],
+}
+
+
+def make_estimator(backend: str | None = None) -> tuple[object, dict]:
+    """
+    Build the unfitted estimator of a backend and its search space.
+
+    Args:
+        backend (str | None): One of `MODEL_BACKENDS`, defaults to
+            `model_setting.model_backend`.
+
+    Returns:
+        tuple: The estimator and the hyperparameter grid to search.
+    """
+    backend = backend or model_setting.model_backend
+    if backend == "random_forest":
+        return RandomForestRegressor(), GRID_PARAM
+    if backend == "hist_gradient_boosting":
+        return (
+            HistGradientBoostingRegressor(
+                max_iter=model_setting.hgb_max_iter,
+                max_bins=model_setting.hgb_max_bins,
+                early_stopping=True,
+                validation_fraction=model_setting.hgb_validation_fraction,
+                n_iter_no_change=model_setting.hgb_n_iter_no_change,
+            ),
+            HGB_GRID_PARAM,
+        )
+    raise ValueError(
+        f"unknown model backend {backend!r}, expected one of {MODEL_BACKENDS}",
+    )
+
+
+def n_trees_param(estimator) -> str:
+    """Name of the parameter counting the trees of an ensemble."""
+    return "max_iter" if "max_iter" in estimator.get_params() else "n_estimators"
+
+
+def count_trees(model) -> int:
+    """
+    Number of trees of a fitted ensemble.
+
+    Args:
+        model: A fitted forest, boosted ensemble, single tree or
+            FlatForest.
+
+    Returns:
+        int: Trees of a forest, boosting iterations actually run (early
+        stopping included) of a boosted ensemble.
+    """
+    if hasattr(model, "roots"):
+        return len(model.roots)
+    if hasattr(model, "tree_"):
+        return 1
+    if hasattr(model, "n_iter_"):
+        return int(model.n_iter_)
+    return len(getattr(model, "estimators_", []))
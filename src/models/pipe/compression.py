@@ -0,0 +1,282 @@
+"""
+This module provides the post-training compression of the forest.
+
+`compress_model` derives two smaller variants of the model picked by the
+search, saved by `build_model` next to it (see `variant_model_name`):
+    - "compressed": the fewest trees of the forest whose out-of-bag R^2
+      stays within `compression_tolerance` of the out-of-bag R^2 of the
+      whole forest (see `select_trees`). Out-of-bag predictions (every
+      tree scored on the training rows left out of its bootstrap sample)
+      keep the test split out of the selection, so the test scores
+      reported for the variants are unbiased.
+    - "distilled" (with `compression_distill`): a single decision tree of
+      at most `compression_distill_max_depth` levels fitted to the
+      predictions of the full model on the training rows.
+Every variant, the full model included, is measured on the test split
+(R^2, pickled size, single-row and batch predict time on the configured
+inference engine) and the trade-off is written to a JSON report; the
+inference service loads the variant set by `model_variant`.
+
+Tree selection needs a bagged forest (bootstrap samples); other models,
+such as the gradient boosting backend, are only distilled. Incremental
+updates grow the full model only and delete the variants and their
+report, the next full build derives them again.
+"""
+
+import copy
+import pickle as pkl
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sklearn.metrics import r2_score
+from sklearn.tree import DecisionTreeRegressor
+
+from config import model_setting
+from models.flat_forest import FlatForest
+from models.instrumentation import emit_metric
+from models.pipe.backends import count_trees
+
+# test rows timed one at a time per variant
+LATENCY_ROWS = 200
+
+
+def compress_model(
+    model,
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+) -> tuple[dict, dict]:
+    """
+    Derive the compressed and distilled variants of a trained model.
+
+    Args:
+        model: The model picked by the search, fitted on `X_train`.
+        X_train (pd.DataFrame): The training features.
+        y_train (pd.Series): The training target.
+        X_test (pd.DataFrame): The test features, only used to measure.
+        y_test (pd.Series): The test target.
+
+    Returns:
+        tuple[dict, dict]: The variants by name (without "full") and the
+        report of every variant, the full model included.
+    """
+    variants = {}
+    report = {
+        "tolerance": model_setting.compression_tolerance,
+        "variants": {},
+    }
+    if getattr(model, "bootstrap", False):
+        variants["compressed"], report["selection"] = select_trees(
+            model,
+            X_train,
+            y_train,
+            model_setting.compression_tolerance,
+            model_setting.compression_max_rows,
+        )
+    else:
+        logger.info(
+            f"tree selection needs a bagged forest, "
+            f"not compressing the {type(model).__name__}",
+        )
+    if model_setting.compression_distill:
+        variants["distilled"] = distill(
+            model,
+            X_train,
+            model_setting.compression_distill_max_depth,
+        )
+
+    for name, variant in {"full": model, **variants}.items():
+        report["variants"][name] = measure(variant, X_test, y_test)
+        emit_metric("model_variant", name, **report["variants"][name])
+    full = report["variants"]["full"]
+    for name, stats in report["variants"].items():
+        logger.info(
+            f"{name} model : {stats['n_trees']} trees, "
+            f"{stats['size_bytes'] / 1e6:.2f} MB "
+            f"({stats['size_bytes'] / full['size_bytes']:.0%}), "
+            f"test R^2 {stats['test_score']:.4f}, "
+            f"{stats['row_latency_us']:.0f} us per single row",
+        )
+    return variants, report
+
+
+def select_trees(
+    forest,
+    X: pd.DataFrame,
+    y: pd.Series,
+    tolerance: float,
+    max_rows: int,
+) -> tuple[object, dict]:
+    """
+    Select the fewest trees keeping the out-of-bag R^2 of the forest.
+
+    Keeps the first k trees, in the order they were fitted, for the
+    smallest k whose out-of-bag R^2 is within `tolerance` of the
+    out-of-bag R^2 of all the trees and which have an out-of-bag
+    prediction for (almost) every row the forest has. Bagged trees are
+    interchangeable, so the first k are an unbiased sample of the forest;
+    picking the trees that score best out-of-bag instead overfits the
+    training rows and loses more on the test split than the tolerance.
+    Each row is only out-of-bag for about a third of the k trees, so the
+    estimate errs on the side of keeping more trees.
+
+    Args:
+        forest: A bagged forest fitted on `X`, `y`.
+        X (pd.DataFrame): The rows the forest was fitted on.
+        y (pd.Series): Their target.
+        tolerance (float): Largest drop of R^2 accepted.
+        max_rows (int): Rows sampled to score the selections.
+
+    Returns:
+        tuple: A copy of the forest holding the selected trees only, and
+        the number of trees and out-of-bag R^2 before and after.
+    """
+    rng = np.random.default_rng(model_setting.search_random_state)
+    rows = np.arange(len(X))
+    if len(rows) > max_rows:
+        rows = np.sort(rng.choice(rows, max_rows, replace=False))
+    X_rows = np.asarray(X, dtype=np.float32)[rows]
+    y_rows = np.asarray(y, dtype=np.float64)[rows]
+
+    # position of every training row in the sample, -1 if not sampled
+    position = np.full(len(X), -1)
+    position[rows] = np.arange(len(rows))
+    oob = np.ones((len(rows), len(forest.estimators_)), dtype=bool)
+    for t, drawn in enumerate(forest.estimators_samples_):
+        drawn = position[drawn]
+        oob[drawn[drawn >= 0], t] = False
+    oob_predictions = np.column_stack(
+        [tree.predict(X_rows, check_input=False) for tree in forest.estimators_],
+    )
+    oob_predictions[~oob] = 0.0
+
+    # column k - 1 scores the first k trees
+    scores, coverage = _oob_scores(
+        np.cumsum(oob_predictions, axis=1),
+        np.cumsum(oob, axis=1, dtype=np.float64),
+        y_rows,
+    )
+    kept = (scores >= scores[-1] - tolerance) & (coverage >= 0.99 * coverage[-1])
+    n_trees = int(np.argmax(kept)) + 1
+
+    compressed = copy.copy(forest)
+    compressed.estimators_ = forest.estimators_[:n_trees]
+    compressed.n_estimators = n_trees
+    selection = {
+        "rows": len(rows),
+        "trees": [len(forest.estimators_), n_trees],
+        "oob_score": [float(scores[-1]), float(scores[n_trees - 1])],
+    }
+    logger.info(
+        f"selected {n_trees} of {len(forest.estimators_)} trees, out-of-bag "
+        f"R^2 {scores[n_trees - 1]:.4f} (all trees {scores[-1]:.4f}, "
+        f"tolerance {tolerance})",
+    )
+    return compressed, selection
+
+
+def _oob_scores(
+    sums: np.ndarray,
+    counts: np.ndarray,
+    y: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    R^2 and coverage of the out-of-bag predictions of every column.
+
+    Args:
+        sums (np.ndarray): (rows, selections) sums of the out-of-bag
+            predictions of the trees of every selection.
+        counts (np.ndarray): Number of trees summed.
+        y (np.ndarray): Target of the rows.
+
+    Returns:
+        tuple: R^2 on the rows with at least one out-of-bag prediction,
+        and the share of such rows, per selection.
+    """
+    covered = counts > 0
+    n_covered = covered.sum(axis=0)
+    predictions = np.divide(sums, counts, out=np.zeros_like(sums), where=covered)
+    y = y[:, None]
+    y_mean = (y * covered).sum(axis=0) / np.maximum(n_covered, 1)
+    residual = (((y - predictions) ** 2) * covered).sum(axis=0)
+    total = (((y - y_mean) ** 2) * covered).sum(axis=0)
+    scores = np.where(total > 0, 1 - residual / np.maximum(total, 1e-12), -np.inf)
+    return scores, n_covered / len(y)
+
+
+def distill(model, X: pd.DataFrame, max_depth: int) -> DecisionTreeRegressor:
+    """
+    Fit a single decision tree to the predictions of a model.
+
+    Args:
+        model: The fitted teacher model.
+        X (pd.DataFrame): The rows the teacher was fitted on.
+        max_depth (int): Depth of the tree.
+
+    Returns:
+        DecisionTreeRegressor: The student tree.
+    """
+    start = time.perf_counter()
+    student = DecisionTreeRegressor(
+        max_depth=max_depth,
+        random_state=model_setting.search_random_state,
+    ).fit(X, model.predict(X))
+    logger.info(
+        f"distilled the {type(model).__name__} into a tree of depth "
+        f"{student.get_depth()} with {student.get_n_leaves()} leaves "
+        f"in {time.perf_counter() - start:.1f} s",
+    )
+    return student
+
+
+def measure(model, X_test: pd.DataFrame, y_test: pd.Series) -> dict:
+    """
+    Measure the accuracy, size and predict time of one variant.
+
+    The predict times are taken on the configured inference engine:
+    sklearn's predict, or the variant flattened for the flat engine.
+
+    Args:
+        model: The fitted variant.
+        X_test (pd.DataFrame): The test features.
+        y_test (pd.Series): The test target.
+
+    Returns:
+        dict: Trees, pickled size in bytes, test R^2, median single-row
+        predict time in microseconds and batch predict rows per second.
+    """
+    X = np.ascontiguousarray(X_test, dtype=np.float32)
+    predictor = (
+        FlatForest.from_estimator(model)
+        if model_setting.inference_engine == "flat"
+        else model
+    )
+    timings = []
+    with warnings.catch_warnings():
+        # served the way the inference service does, as bare arrays
+        warnings.filterwarnings("ignore", message="X does not have valid feature")
+        for row in X[:LATENCY_ROWS]:
+            start = time.perf_counter()
+            predictor.predict(row[None, :])
+            timings.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        predictions = predictor.predict(X)
+        batch_seconds = time.perf_counter() - start
+    return {
+        "n_trees": count_trees(model),
+        "size_bytes": len(pkl.dumps(model)),
+        "test_score": float(r2_score(y_test, predictions)),
+        "row_latency_us": round(float(np.median(timings)) * 1e6, 1),
+        "batch_rows_per_sec": round(len(X) / batch_seconds, 1),
+    }
+
+
+def compression_report_path() -> Path:
+    """Path of the compression report next to the model."""
+    stem = Path(model_setting.model_name).stem
+    return Path(model_setting.model_path) / f"{stem}_compression.json"
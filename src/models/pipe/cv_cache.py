@@ -0,0 +1,217 @@
+"""
+This module provides an on-disk store of cross-validation results.
+
+The grid searches (ProcessPoolGridSearch, JoblibGridSearch) look up the
+fold scores and fit times of every candidate before fitting it and only
+fit the candidates the store misses, so a rebuild on unchanged training
+data with a grown grid only trains the new grid points.
+
+Results are grouped in one JSON file per context, named after a hash of
+everything the scores depend on besides the candidate:
+    - the training matrix (as the float32 the forest is fitted on), the
+      target and the feature names,
+    - the fold split (the splitter, its shuffling and seed),
+    - the python, numpy and sklearn versions.
+Within a context a candidate is keyed by the estimator class and all its
+parameters except `n_jobs` and `verbose`, so changing a fixed parameter
+is a miss. Failed fits are stored with a NaN score: for the same
+parameters and versions they fail again.
+Contexts are evicted least recently used first once the store grows
+beyond `cv_cache_max_bytes`.
+"""
+
+import hashlib
+import json
+import os
+import platform
+from pathlib import Path
+
+import numpy as np
+import sklearn
+from loguru import logger
+from sklearn.base import clone
+
+from config import model_setting
+from models.instrumentation import emit_metric
+
+# parameters that change how fast a candidate is fitted, not its scores
+IGNORED_PARAMS = ("n_jobs", "verbose")
+
+
+class CVResultStore:
+    """
+    Directory of cross-validation results, one JSON file per context.
+
+    Attributes
+    ----------
+        path (Path): Directory of the store.
+        max_bytes (int): Size beyond which the least recently used
+            contexts are evicted.
+
+    Methods
+    -------
+        context(X, y, cv, feature_names) : Hashes the data, folds and versions
+        lookup(self, context, estimator, candidates) : Returns the stored folds
+        save(self, context, estimator, candidates, results) : Stores results
+        evict(self) : Deletes the least recently used contexts
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        """Initializes the store, by default from the model settings"""
+        self.path = Path(path or model_setting.cv_cache_path)
+        self.max_bytes = (
+            model_setting.cv_cache_max_bytes if max_bytes is None else max_bytes
+        )
+
+    @staticmethod
+    def context(X: np.ndarray, y: np.ndarray, cv, feature_names=None) -> str:
+        """
+        Function that hashes what every score of a search depends on.
+
+        Args:
+            X (np.ndarray): Training features.
+            y (np.ndarray): Training target.
+            cv: The fold splitter, e.g. `KFold(5)`.
+            feature_names: Column names of the training features.
+
+        Returns:
+            str: The context key.
+        """
+        data = hashlib.sha256()
+        for array in (
+            np.ascontiguousarray(X, dtype=np.float32),
+            np.ascontiguousarray(y, dtype=np.float64),
+        ):
+            data.update(f"{array.shape}{array.dtype}".encode())
+            data.update(array)
+        key = {
+            "data": data.hexdigest(),
+            "features": None if feature_names is None else list(feature_names),
+            "cv": repr(cv),
+            "versions": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "sklearn": sklearn.__version__,
+            },
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+    def lookup(self, context: str, estimator, candidates: list[dict]) -> list:
+        """
+        Function that returns the stored fold results of the candidates.
+
+        Logs and emits the hits and the fit time they save.
+
+        Args:
+            context (str): Key returned by `context`.
+            estimator: The unfitted estimator searched.
+            candidates (list[dict]): Parameters of every candidate.
+
+        Returns:
+            list: For every candidate its list of fold results, None for
+            the candidates not stored.
+        """
+        entries = self._read(context)
+        results = [
+            entries.get(_candidate_key(estimator, params), {}).get("folds")
+            for params in candidates
+        ]
+        hits = [folds for folds in results if folds is not None]
+        saved = sum(r["fit_time"] + r["score_time"] for folds in hits for r in folds)
+        if hits:
+            self._file(context).touch()  # recency for the eviction
+        emit_metric(
+            "cv_cache",
+            context,
+            hits=len(hits),
+            misses=len(candidates) - len(hits),
+            saved_seconds=round(saved, 3),
+        )
+        logger.info(
+            f"cv result store: {len(hits)} of {len(candidates)} candidates "
+            f"cached, {saved:.1f} s of fold fits saved",
+        )
+        return results
+
+    def save(
+        self,
+        context: str,
+        estimator,
+        candidates: list[dict],
+        results: list,
+    ) -> None:
+        """
+        Function that stores the fold results of freshly fitted candidates.
+
+        Args:
+            context (str): Key returned by `context`.
+            estimator: The unfitted estimator searched.
+            candidates (list[dict]): Parameters of every candidate.
+            results (list): For every candidate, its list of fold results.
+
+        Returns:
+            None
+        """
+        entries = self._read(context)
+        for params, folds in zip(candidates, results):
+            entries[_candidate_key(estimator, params)] = {
+                "params": params,
+                "folds": [
+                    {key: float(value) for key, value in r.items()} for r in folds
+                ],
+            }
+        self.path.mkdir(parents=True, exist_ok=True)
+        path = self._file(context)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(json.dumps(entries, default=repr))
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Function that deletes the least recently used contexts until the
+        store fits in `max_bytes`.
+
+        Returns:
+            None
+        """
+        files = sorted(self.path.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        sizes = {path: path.stat().st_size for path in files}
+        total = sum(sizes.values())
+        for path in files[:-1]:  # the newest context is always kept
+            if total <= self.max_bytes:
+                break
+            logger.info(f"evicting cv results {path} ({sizes[path]} bytes)")
+            path.unlink(missing_ok=True)
+            total -= sizes[path]
+
+    def _file(self, context: str) -> Path:
+        """Path of the results file of a context."""
+        return self.path / f"{context}.json"
+
+    def _read(self, context: str) -> dict:
+        """Load the results of a context, empty if none or unreadable."""
+        try:
+            return json.loads(self._file(context).read_text())
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning(f"ignoring the unreadable cv results {self._file(context)}")
+            return {}
+
+
+def _candidate_key(estimator, params: dict) -> str:
+    """Hash of the estimator class and all the parameters of a candidate."""
+    full_params = clone(estimator).set_params(**params).get_params(deep=False)
+    for name in IGNORED_PARAMS:
+        full_params.pop(name, None)
+    key = json.dumps(
+        [f"{type(estimator).__module__}.{type(estimator).__qualname__}", full_params],
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
@@ -8,15 +8,35 @@ analysis or processing. It uses SQLAlchemy for executing database queries
 and pandas for handling the data in a DataFrame format.
 """
 
+from collections.abc import Iterator
+
 import pandas as pd
 
 # from config import settings
 from loguru import logger
-from sqlalchemy import select
+from sqlalchemy import func, literal_column, select
+from sqlalchemy import inspect as sa_inspect
 
-from config import engine
+from config import db_settings, get_engine
 from db.db_model import RentApartments
 
+# columns the training pipeline reads, with the dtypes they are loaded as
+PIPELINE_COLUMNS = {
+    "area": "float64",
+    "constraction_year": "int64",
+    "bedrooms": "int64",
+    "garden": "object",
+    "balcony": "category",
+    "parking": "category",
+    "furnished": "category",
+    "garage": "category",
+    "storage": "category",
+    "rent": "int64",
+}
+
+# SQLite row id, the table has no primary key or modification time
+ROWID = literal_column("rowid")
+
 
 def load_data(path):
     # print("Loading CSV file...")
@@ -25,13 +45,167 @@ def load_data(path):
     return pd.read_csv(path)
 
 
-def load_data_from_db() -> pd.DataFrame:
+def load_data_from_db(
+    after_rowid: int | None = None,
+    filters: dict | None = None,
+) -> pd.DataFrame:
     """
-    Extract the entire RentApartments table from the database.
+    Extract the RentApartments table from the database.
+
+    Args:
+        after_rowid (int | None): Only extract the rows inserted after
+            this rowid, returned with their id in a `rowid` column.
+        filters (dict | None): Column name to the value, or list of
+            values, the extracted rows must have, such as
+            `{"zip": ["1071 HK", "1071 HN"]}`. Filters on the indexed
+            columns (see `create_indexes`) do not scan the table.
 
     Returns:
         pd.DataFrame: DataFrame containing the RentApartments data.
     """
-    logger.info("extracting the table from the database ...")
-    query = select(RentApartments)
-    return pd.read_sql(query, engine)
+    if after_rowid is None:
+        logger.info("extracting the table from the database ...")
+        query = select(RentApartments)
+    else:
+        logger.info(f"extracting the rows after rowid {after_rowid} ...")
+        query = (
+            select(RentApartments, ROWID.label("rowid"))
+            .where(ROWID > after_rowid)
+            .order_by(ROWID)
+        )
+    for col, value in (filters or {}).items():
+        column = getattr(RentApartments, col)
+        if isinstance(value, (list, tuple, set)):
+            query = query.where(column.in_(value))
+        else:
+            query = query.where(column == value)
+    return pd.read_sql(query, get_engine(read_only=True))
+
+
+def create_indexes() -> list[str]:
+    """
+    Create the secondary indexes declared on the RentApartments model.
+
+    Indexes already in the database are left as they are, so the call
+    is cheap once they exist. Building them on a large table takes a
+    write lock for the duration of the build.
+
+    Returns:
+        list[str]: Names of the indexes created.
+    """
+    engine = get_engine()
+    existing = {
+        index["name"]
+        for index in sa_inspect(engine).get_indexes(
+            db_settings.rent_apart_table_name,
+        )
+    }
+    created = []
+    for index in sorted(RentApartments.__table__.indexes, key=lambda i: i.name):
+        if index.name not in existing:
+            logger.info(f"creating index {index.name} ...")
+            index.create(engine)
+            created.append(index.name)
+    return created
+
+
+def max_rowid() -> int:
+    """
+    Return the highest rowid of the RentApartments table.
+
+    Returns:
+        int: The rowid of the last inserted row, 0 if the table is empty.
+    """
+    query = select(func.max(ROWID)).select_from(RentApartments)
+    with get_engine(read_only=True).connect() as conn:
+        return conn.execute(query).scalar() or 0
+
+
+def stream_data_from_db(
+    chunk_size: int | None = None,
+    columns: dict | None = None,
+    until_rowid: int | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream the RentApartments table from the database in typed chunks.
+
+    Only the requested columns are selected and each chunk is cast to
+    explicit dtypes, so memory is bounded by `chunk_size` rather than
+    by the size of the table.
+
+    Args:
+        chunk_size (int | None): Rows per chunk, defaults to
+            `db_settings.read_chunk_size`.
+        columns (dict | None): Mapping of column name to dtype,
+            defaults to `PIPELINE_COLUMNS`.
+        until_rowid (int | None): Only stream the rows up to this rowid.
+
+    Yields:
+        pd.DataFrame: The next chunk of at most `chunk_size` rows.
+    """
+    chunk_size = chunk_size or db_settings.read_chunk_size
+    columns = columns or PIPELINE_COLUMNS
+    logger.info(
+        f"streaming {list(columns)} from the database "
+        f"in chunks of {chunk_size} rows ...",
+    )
+    query = select(*(getattr(RentApartments, col) for col in columns))
+    if until_rowid is not None:
+        query = query.where(ROWID <= until_rowid)
+    with get_engine(read_only=True).connect() as conn:
+        conn = conn.execution_options(stream_results=True)
+        yield from pd.read_sql(
+            query,
+            conn,
+            chunksize=chunk_size,
+            dtype=columns,
+        )
+
+
+def page_data_from_db(
+    after_rowid: int = 0,
+    chunk_size: int | None = None,
+    columns: dict | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Page through the RentApartments table in rowid order.
+
+    Every chunk is its own short query (`rowid > last ORDER BY rowid
+    LIMIT chunk_size`), so no read stays open between chunks and the
+    caller can write to the database while paging; the rowid of each
+    row is returned in a `rowid` column, to resume after it.
+
+    Args:
+        after_rowid (int): Only read the rows after this rowid.
+        chunk_size (int | None): Rows per chunk, defaults to
+            `db_settings.read_chunk_size`.
+        columns (dict | None): Mapping of column name to dtype,
+            defaults to `PIPELINE_COLUMNS`.
+
+    Yields:
+        pd.DataFrame: The next chunk of at most `chunk_size` rows.
+    """
+    chunk_size = chunk_size or db_settings.read_chunk_size
+    columns = columns or PIPELINE_COLUMNS
+    logger.info(
+        f"paging {list(columns)} from the database after rowid "
+        f"{after_rowid} in chunks of {chunk_size} rows ...",
+    )
+    query = (
+        select(
+            ROWID.label("rowid"),
+            *(getattr(RentApartments, col) for col in columns),
+        )
+        .order_by(ROWID)
+        .limit(chunk_size)
+    )
+    while True:
+        chunk = pd.read_sql(
+            query.where(ROWID > after_rowid),
+            get_engine(read_only=True),
+            dtype=columns,
+        )
+        if chunk.empty:
+            return
+        yield chunk
+        after_rowid = int(chunk["rowid"].iloc[-1])
@@ -1,128 +1,222 @@
 """
 This module provides functionality for preparing a dataset for ML model.
 
-It consists of functions to load data from a database,
-encode categorical columns, and parse specific columns for further processing.
+It consists of the RentFeatureTransformer, a fitted and serializable
+transformer that encodes categorical columns against a fixed vocabulary
+and parses the garden column, and of the function that streams the data
+from the database through it. The same fitted transformer is saved next
+to the model and reused at inference time.
 """
 
+import numpy as np
 import pandas as pd
-import re
 
 from loguru import logger
-from sklearn.preprocessing import LabelBinarizer
-
-from models.pipe.data_collection import load_data_from_db
-
-
-def prepare_data() -> pd.DataFrame:
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+# kind of every numeric column in the saved feature schema
+NUMERIC_KINDS = {"area": "float", "constraction_year": "int", "bedrooms": "int"}
+NUMERIC_COLS = list(NUMERIC_KINDS)
+CATEGORICAL_COLS = ["balcony", "parking", "furnished", "garage", "storage"]
+# default vocabulary of every categorical column
+CATEGORY_VALUES = ["no", "yes"]
+GARDEN_PATTERN = r"(\d+)"
+# garden value of listings without one, parsed as a size of 0
+NO_GARDEN = "Not present"
+
+
+def prepare_data(
+    chunk_size: int | None = None,
+    transformer: "RentFeatureTransformer | None" = None,
+    until_rowid: int | None = None,
+) -> pd.DataFrame:
     """
     Prepares the dataset for the machine learning pipeline by executing
     the necessary preprocessing steps.
 
         The function performs the following operations:
-        1. Loads the preprocessed dataset from the database.
-        2. Encodes categorical features using one-hot encoding.
-        3. Parses and processes the garden data column.
-        4. Binarizes specified columns to convert them into a binary format.
-
-    Returns:
-        DataFrame: A pandas DataFrame containing the fully prepared data,
-        which is ready for model training.
-    """
-    # make logger object to use it in the script
-    logger.info("Starting up preprocessing Pipeline")
-    # 1. load preprocessed dataset
-    dataframe = load_data_from_db()
-    # 2. encode categorical data
-    data_encoded = encode_cat_cols(dataframe)
-    # 3. parse the garden data
-    df = parse_garden_col(data_encoded)
-    # 4. binarize the data
-    df = binarize_df(df)
+        1. Streams the dataset from the database in chunks.
+        2. Fits the feature transformer on the first chunk.
+        3. Transforms each chunk into a float32 feature matrix.
 
-    return df
-
-
-def encode_cat_cols(dataframe: pd.DataFrame) -> pd.DataFrame:
-    """
-    Encodes categorical features into a binary format using one-hot encoding.
-
-    This function targets specific columns that require encoding to avoid
-    issues with multicollinearity.
-    The `pandas.get_dummies` function is used to perform the encoding.
+    Only one raw chunk is held in memory at a time.
 
     Args:
-        data (DataFrame): The DataFrame containing data to be encoded.
+        chunk_size (int | None): Rows per chunk read from the database.
+        transformer (RentFeatureTransformer | None): Transformer to use,
+            fitted on the first chunk if it is not fitted yet.
+        until_rowid (int | None): Only prepare the rows up to this rowid.
 
     Returns:
-        DataFrame: The DataFrame with encoded categorical features.
-    """
-    cols = ["balcony", "parking", "furnished", "garage", "storage"]
-    logger.info(f"Dummy encoding the data {cols}")
-    # print("Step 2 : Dummy encoding the data...")
-    return pd.get_dummies(dataframe, columns=cols, drop_first=True)
-
-
-# def parse_garden_col(data):
-#     print("Parsing the garden data...")
-#     for i in range(len(data)):
-#         if data.garden[i]=='Not present':
-#             data.garden[i]=0
-#         else:
-#             data.garden[i] = int(re.findall(r'\d+', data.garden[i])[0])
-#     return data
-def parse_garden_col(dataframe: pd.DataFrame) -> pd.DataFrame:
+        DataFrame: A pandas DataFrame containing the fully prepared data,
+        which is ready for model training.
     """
-    Parses and transforms the 'garden' column from textual data to
-    a numerical format.
-
-    The function identifies whether a garden is present and extracts the size
-    of the garden if applicable.
-    The `re` module is utilized to find numerical values in the textual data.
+    # imported here so unpickling the transformer at inference time
+    # does not pull in the database layer
+    from models.pipe.data_collection import stream_data_from_db
 
-    Args:
-        data (DataFrame): Containing the 'garden' column to be parsed.
-
-    Returns:
-        DataFrame: The DataFrame with column transformed to numerical format.
-    """
-    logger.info("Parsing the garden data...")
-    dataframe["garden"] = dataframe["garden"].apply(
-        lambda x: 0 if x == "Not present" else int(re.findall(r"\d+", x)[0])
+    # make logger object to use it in the script
+    logger.info("Starting up preprocessing Pipeline")
+    transformer = transformer or RentFeatureTransformer()
+    features, target = [], []
+    # 1. stream the dataset
+    for dataframe in stream_data_from_db(chunk_size, until_rowid=until_rowid):
+        # 2. fit once on the first chunk
+        if not hasattr(transformer, "feature_names_out_"):
+            transformer.fit(dataframe)
+        # 3. transform the chunk
+        features.append(transformer.transform(dataframe))
+        target.append(dataframe["rent"].to_numpy())
+
+    data = pd.DataFrame(
+        np.concatenate(features),
+        columns=transformer.get_feature_names_out(),
+        copy=False,
     )
-    return dataframe
+    data["rent"] = np.concatenate(target)
+    return data
 
 
-def binarize_df(dataframe: pd.DataFrame) -> pd.DataFrame:
+class RentFeatureTransformer(TransformerMixin, BaseEstimator):
     """
-    Converts specified columns into a binary format.
-
-    The function uses the `LabelBinarizer` from `sklearn.preprocessing` to
-    transform columns into binary values.
-    This is particularly useful for features that are already binary
-    but represented as categorical variables.
-
-    Args:
-        data (DataFrame): The DataFrame containing columns to be binarized.
-
-    Returns:
-        DataFrame: The DataFrame with binarized columns.
+    Transformer turning raw RentApartments rows into model features.
+
+    Categorical columns are one-hot encoded against a fixed vocabulary,
+    dropping the first category, so the output columns never depend on
+    which values happen to appear in the data. The garden column is parsed
+    with a vectorized extraction of its size in square meters.
+
+    Attributes
+    ----------
+        categories (dict[str, list[str]] | None): Vocabulary of every
+            categorical column, defaults to ["no", "yes"] for each of
+            `CATEGORICAL_COLS`.
+        feature_names_out_ (np.ndarray): Output column names, set by fit.
+        feature_kinds_out_ (np.ndarray): Kind of every output column
+            ("float", "int" or "binary"), set by fit.
+
+    Methods
+    -------
+        fit(self, X, y) : Checks the input columns and fixes the output layout
+        transform(self, X) : Builds a C-contiguous float32 feature matrix
+        get_feature_names_out(self) : Returns the output column names
+        get_feature_kinds_out(self) : Returns the output column kinds
     """
-    # print("Step 3 : Binarizing the data...")
-    binarizer_col = dataframe[
-        [
-         "balcony_yes",
-         "storage_yes",
-         "parking_yes",
-         "furnished_yes",
-         "garage_yes"
-         ]
-    ]
-    logger.info(f"Binarizing the data {binarizer_col}")
-    label_binarizer = LabelBinarizer()
-    for col in binarizer_col:
-        dataframe[col] = label_binarizer.fit_transform(dataframe[col])
-    return dataframe
+
+    def __init__(self, categories: dict[str, list[str]] | None = None) -> None:
+        """Initializes the transformer with its categorical vocabulary"""
+        self.categories = categories
+
+    def fit(self, X: pd.DataFrame, y=None) -> "RentFeatureTransformer":
+        """
+        Function that fixes the vocabulary and output columns.
+
+        Args:
+            X (pd.DataFrame): Raw rows holding the input columns.
+            y: Ignored.
+
+        Returns:
+            RentFeatureTransformer: The fitted transformer.
+        """
+        self.categories_ = self.categories or {
+            col: list(CATEGORY_VALUES) for col in CATEGORICAL_COLS
+        }
+        self.feature_names_in_ = np.array(
+            [*NUMERIC_COLS, "garden", *self.categories_],
+            dtype=object,
+        )
+        self._check_columns(X)
+        self.feature_names_out_ = np.array(
+            [
+                *NUMERIC_COLS,
+                "garden",
+                *(
+                    f"{col}_{category}"
+                    for col, categories in self.categories_.items()
+                    for category in categories[1:]
+                ),
+            ],
+            dtype=object,
+        )
+        n_binary = len(self.feature_names_out_) - len(NUMERIC_COLS) - 1
+        self.feature_kinds_out_ = np.array(
+            [*NUMERIC_KINDS.values(), "int", *["binary"] * n_binary],
+            dtype=object,
+        )
+        logger.info(f"fitted feature transformer {list(self.feature_names_out_)}")
+        return self
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Function that builds the feature matrix from raw rows.
+
+        Args:
+            X (pd.DataFrame): Raw rows holding the input columns.
+
+        Returns:
+            np.ndarray: C-contiguous float32 array with one column per
+            entry of `feature_names_out_`.
+        """
+        check_is_fitted(self, "feature_names_out_")
+        self._check_columns(X)
+
+        out = np.empty(
+            (len(X), len(self.feature_names_out_)),
+            dtype=np.float32,
+        )
+        for i, col in enumerate(NUMERIC_COLS):
+            out[:, i] = X[col].to_numpy(dtype=np.float32)
+        out[:, len(NUMERIC_COLS)] = self._parse_garden(X["garden"])
+
+        i = len(NUMERIC_COLS) + 1
+        for col, categories in self.categories_.items():
+            # map the distinct values onto the vocabulary, then broadcast
+            values, uniques = pd.factorize(X[col], use_na_sentinel=False)
+            vocab_index = pd.Index(categories).get_indexer(uniques)
+            if (vocab_index < 0).any():
+                unknown = uniques[vocab_index < 0][:5]
+                raise ValueError(
+                    f"unknown values in column {col!r}: {list(unknown)}",
+                )
+            codes = vocab_index[values]
+            for code in range(1, len(categories)):
+                out[:, i] = codes == code
+                i += 1
+        return out
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        """Returns the output column names in feature matrix order."""
+        check_is_fitted(self, "feature_names_out_")
+        return self.feature_names_out_
+
+    def get_feature_kinds_out(self) -> np.ndarray:
+        """Returns the kind of every output column, in matrix order."""
+        check_is_fitted(self, "feature_kinds_out_")
+        return self.feature_kinds_out_
+
+    def _check_columns(self, X: pd.DataFrame) -> None:
+        """Raises a ValueError listing any missing input columns."""
+        missing = set(self.feature_names_in_) - set(X.columns)
+        if missing:
+            raise ValueError(f"missing input columns: {sorted(missing)}")
+
+    @staticmethod
+    def _parse_garden(garden: pd.Series) -> np.ndarray:
+        """
+        Parses the garden size out of strings such as "Present (25 m²)".
+
+        "Not present" (or any value without a number) becomes 0. The
+        pattern runs once per distinct string, not once per row.
+        """
+        codes, uniques = pd.factorize(garden, use_na_sentinel=False)
+        size = (
+            pd.Series(uniques, dtype=object)
+            .astype(str)
+            .str.extract(GARDEN_PATTERN, expand=False)
+        )
+        sizes = pd.to_numeric(size).fillna(0).to_numpy(dtype=np.float32)
+        return sizes[codes]
 
 
 # # test the script
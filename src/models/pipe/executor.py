@@ -0,0 +1,433 @@
+"""
+This module provides a process-pool executor for cross-validated search.
+
+The training matrix is copied once into shared memory; worker processes
+attach to it at start-up, so a (candidate, fold) task only carries the
+candidate parameters and the fold number. Cores are split between outer
+parallelism (tasks running at once, `train_outer_jobs`) and inner
+parallelism (threads building the trees of one forest, `train_inner_jobs`).
+
+It contains the SharedArray helper and the ProcessPoolGridSearch class, a
+drop-in for GridSearchCV exposing the same `cv_results_`, `best_params_`,
+`best_score_` and `best_estimator_` attributes, and its JoblibGridSearch
+subclass evaluating the folds with sklearn's joblib backend instead. Both
+skip the candidates a CVResultStore already holds results for.
+"""
+
+import multiprocessing as mp
+import os
+import time
+import warnings
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from loguru import logger
+from sklearn.base import clone
+from sklearn.exceptions import FitFailedWarning
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import GridSearchCV, KFold, ParameterGrid
+from threadpoolctl import threadpool_limits
+
+from models.instrumentation import emit_metric
+from models.pipe.cv_cache import CVResultStore
+
+# views on the shared training data, set in every worker by _attach
+_worker_data: dict = {}
+
+
+class SharedArray:
+    """
+    NumPy array backed by a named shared memory block.
+
+    Attributes
+    ----------
+        name (str): Name of the shared memory block.
+        shape (tuple): Shape of the array.
+        dtype (str): Dtype of the array.
+
+    Methods
+    -------
+        from_array(cls, array) : Copies an array into a new block
+        attach(self) : Maps the block, returning (array, block)
+        close(self) : Releases and unlinks the block (owner only)
+    """
+
+    def __init__(self, name: str, shape: tuple, dtype: str) -> None:
+        """Initializes the descriptor of an existing block"""
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+        self._shm = None
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> "SharedArray":
+        """Copy `array` into a new shared memory block."""
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+        shared = cls(shm.name, array.shape, array.dtype.str)
+        shared._shm = shm
+        return shared
+
+    def attach(self) -> tuple[np.ndarray, shared_memory.SharedMemory]:
+        """Map the block in this process, returning the array and block."""
+        shm = shared_memory.SharedMemory(name=self.name)
+        return np.ndarray(self.shape, self.dtype, buffer=shm.buf), shm
+
+    def close(self) -> None:
+        """Release and unlink the block created by `from_array`."""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __getstate__(self) -> dict:
+        """Only the descriptor is sent to the workers."""
+        return {"name": self.name, "shape": self.shape, "dtype": self.dtype}
+
+    def __setstate__(self, state: dict) -> None:
+        """Rebuild the descriptor in a worker."""
+        self.__init__(**state)
+
+
+def _attach(X: SharedArray, y: SharedArray, inner_jobs: int) -> None:
+    """Worker initializer: map the training data and cap native threads."""
+    _worker_data["X"], _worker_data["X_shm"] = X.attach()
+    _worker_data["y"], _worker_data["y_shm"] = y.attach()
+    _worker_data["limits"] = threadpool_limits(inner_jobs)
+
+
+def _fit_and_score(estimator, params: dict, fold: int, n_splits: int) -> dict:
+    """
+    Fit one candidate on one fold of the shared data and score it.
+
+    A fit or score raising scores NaN, like GridSearchCV's default
+    `error_score`, and records the error for the search to report.
+    """
+    X, y = _worker_data["X"], _worker_data["y"]
+    train, test = list(KFold(n_splits).split(X))[fold]
+    wall, cpu = time.perf_counter(), time.process_time()
+    fit_time = 0.0
+    try:
+        model = clone(estimator).set_params(**params).fit(X[train], y[train])
+        fit_time = time.perf_counter() - wall
+        score = check_scoring(model)(model, X[test], y[test])
+    except Exception as err:  # reported by the search as a FitFailedWarning
+        return {
+            "fit_time": fit_time or time.perf_counter() - wall,
+            "score_time": 0.0,
+            "cpu_time": time.process_time() - cpu,
+            "score": np.nan,
+            "error": f"{type(err).__name__}: {err}",
+        }
+    return {
+        "fit_time": fit_time,
+        "score_time": time.perf_counter() - wall - fit_time,
+        "cpu_time": time.process_time() - cpu,
+        "score": score,
+    }
+
+
+def _report_failed_fits(results: list) -> None:
+    """Warn about the failed fits like GridSearchCV, raise if all failed."""
+    errors = Counter(r["error"] for folds in results for r in folds if "error" in r)
+    if not errors:
+        return
+    n_fits = sum(len(folds) for folds in results)
+    n_failed = sum(errors.values())
+    summary = "\n".join(
+        f"{count} fits failed with {err}" for err, count in errors.items()
+    )
+    if n_failed == n_fits:
+        raise ValueError(f"all the {n_fits} fits failed:\n{summary}")
+    warnings.warn(
+        f"{n_failed} fits failed out of a total of {n_fits}, the score on "
+        f"these train-test partitions is set to nan:\n{summary}",
+        FitFailedWarning,
+        stacklevel=3,
+    )
+
+
+def _with_jobs(estimator, n_jobs: int | None):
+    """Set `n_jobs` on estimators having it (forests, not boosting)."""
+    if "n_jobs" in estimator.get_params():
+        estimator.set_params(n_jobs=n_jobs)
+    return estimator
+
+
+class ProcessPoolGridSearch:
+    """
+    Exhaustive cross-validated grid search on a process pool.
+
+    A candidate failing to fit on a fold scores NaN there and ranks last,
+    with a FitFailedWarning, like GridSearchCV.
+
+    Attributes
+    ----------
+        estimator: The estimator to tune; its `n_jobs`, if it has one, is
+            set to `inner_jobs` for every fit (native threads are capped
+            to `inner_jobs` in every worker either way).
+        param_grid (dict): Parameter names mapped to the values to try.
+        cv (int): Number of KFold splits (unshuffled, like GridSearchCV).
+        outer_jobs (int): Worker processes fitting (candidate, fold) tasks.
+        inner_jobs (int): Threads used inside each forest fit.
+        store (CVResultStore | None): Store of the fold results of earlier
+            searches, the candidates it holds are not fitted again.
+        cv_results_ (dict): Per-candidate fit times and scores.
+        n_cached_ (int): Candidates read from the store instead of fitted.
+        stage_stats_ (dict): Wall time, CPU time and utilization per stage.
+
+    Methods
+    -------
+        fit(self, X, y) : Runs the search and refits the best candidate
+    """
+
+    # prefix of the stage metrics
+    executor = "process_pool"
+
+    def __init__(
+        self,
+        estimator,
+        param_grid: dict,
+        cv: int = 5,
+        outer_jobs: int = -1,
+        inner_jobs: int = 1,
+        store: CVResultStore | None = None,
+    ) -> None:
+        """Initializes the search and splits the cores"""
+        n_cores = os.cpu_count() or 1
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.cv = cv
+        self.store = store
+        self.inner_jobs = max(1, inner_jobs)
+        self.outer_jobs = (
+            max(1, n_cores // self.inner_jobs) if outer_jobs < 1 else outer_jobs
+        )
+        self.n_cores = n_cores
+
+    def fit(self, X, y) -> "ProcessPoolGridSearch":
+        """
+        Evaluate every (candidate, fold) pair and refit the best candidate.
+
+        Args:
+            X: Training features.
+            y: Training target.
+
+        Returns:
+            ProcessPoolGridSearch: The fitted search.
+        """
+        self.feature_names_in_ = getattr(X, "columns", None)
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float64)
+        candidates = list(ParameterGrid(self.param_grid))
+        results = [None] * len(candidates)
+        if self.store is not None:
+            context = self.store.context(X, y, KFold(self.cv), self.feature_names_in_)
+            results = self.store.lookup(context, self.estimator, candidates)
+        missing = [i for i, folds in enumerate(results) if folds is None]
+        self.n_cached_ = len(candidates) - len(missing)
+
+        wall = time.perf_counter()
+        if missing:
+            fresh = self._evaluate(X, y, [candidates[i] for i in missing])
+            for i, folds in zip(missing, fresh):
+                results[i] = folds
+        search_wall = time.perf_counter() - wall
+        _report_failed_fits(results)
+        # failed fits are not stored, they may succeed another time
+        fitted = [
+            i for i in missing if not any(np.isnan(r["score"]) for r in results[i])
+        ]
+        if self.store is not None and fitted:
+            self.store.save(
+                context,
+                self.estimator,
+                [candidates[i] for i in fitted],
+                [results[i] for i in fitted],
+            )
+
+        # the fresh fits only; without a CPU clock a fit is single-threaded
+        search_cpu = sum(
+            r.get("cpu_time", r["fit_time"] + r["score_time"])
+            for i in missing
+            for r in results[i]
+        )
+        self._collect_results(candidates, results)
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        self.best_estimator_ = _with_jobs(
+            _with_jobs(
+                clone(self.estimator).set_params(**self.best_params_),
+                self.n_cores,
+            ).fit(self._with_names(X), y),
+            self.estimator.get_params().get("n_jobs"),
+        )
+        refit_wall, refit_cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+        self.stage_stats_ = {
+            stage: {
+                "wall_time": stage_wall,
+                "cpu_time": stage_cpu,
+                "cpu_utilization": (
+                    stage_cpu / (stage_wall * self.n_cores) if stage_wall else 0.0
+                ),
+            }
+            for stage, stage_wall, stage_cpu in (
+                ("search", search_wall, search_cpu),
+                ("refit", refit_wall, refit_cpu),
+            )
+        }
+        for stage, stats in self.stage_stats_.items():
+            emit_metric(
+                "stage",
+                f"{self.executor}_{stage}",
+                rows=len(X),
+                n_cores=self.n_cores,
+                **stats,
+            )
+        return self
+
+    def _evaluate(self, X: np.ndarray, y: np.ndarray, candidates: list) -> list:
+        """
+        Fit and score every candidate on every fold on the process pool.
+
+        Returns:
+            list: For every candidate, the list of its fold results.
+        """
+        estimator = _with_jobs(clone(self.estimator), self.inner_jobs)
+        logger.info(
+            f"searching {len(candidates)} candidates x {self.cv} folds on "
+            f"{self.outer_jobs} processes x {self.inner_jobs} threads",
+        )
+        shared_X, shared_y = SharedArray.from_array(X), SharedArray.from_array(y)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.outer_jobs,
+                mp_context=mp.get_context("spawn"),
+                initializer=_attach,
+                initargs=(shared_X, shared_y, self.inner_jobs),
+            ) as pool:
+                futures = [
+                    [
+                        pool.submit(_fit_and_score, estimator, params, fold, self.cv)
+                        for fold in range(self.cv)
+                    ]
+                    for params in candidates
+                ]
+                return [[f.result() for f in folds] for folds in futures]
+        finally:
+            shared_X.close()
+            shared_y.close()
+
+    def _collect_results(self, candidates: list[dict], results: list) -> None:
+        """Aggregate the fold results like GridSearchCV.cv_results_."""
+        scores = np.array([[r["score"] for r in folds] for folds in results])
+        mean_scores = scores.mean(axis=1)
+        # failed fits score NaN and rank last, like GridSearchCV
+        ranked = np.where(np.isnan(mean_scores), -np.inf, mean_scores)
+        self.cv_results_ = {
+            "params": candidates,
+            "mean_fit_time": np.array(
+                [np.mean([r["fit_time"] for r in folds]) for folds in results],
+            ),
+            "mean_score_time": np.array(
+                [np.mean([r["score_time"] for r in folds]) for folds in results],
+            ),
+            "mean_test_score": mean_scores,
+            "std_test_score": scores.std(axis=1),
+            "rank_test_score": (
+                np.argsort(np.argsort(-ranked, kind="stable")) + 1
+            ),
+        }
+        if all("cpu_time" in r for folds in results for r in folds):
+            self.cv_results_["mean_cpu_time"] = np.array(
+                [np.mean([r["cpu_time"] for r in folds]) for folds in results],
+            )
+        self.best_index_ = int(np.argmax(ranked))
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = float(mean_scores[self.best_index_])
+
+    def _with_names(self, X: np.ndarray):
+        """Restore the column names so the refit model records them."""
+        if self.feature_names_in_ is None:
+            return X
+        import pandas as pd
+
+        return pd.DataFrame(X, columns=self.feature_names_in_, copy=False)
+
+    def score(self, X, y) -> float:
+        """R^2 of the refit best estimator."""
+        return self.best_estimator_.score(X, y)
+
+
+class JoblibGridSearch(ProcessPoolGridSearch):
+    """
+    Exhaustive cross-validated grid search on sklearn's joblib backend.
+
+    Runs the memoized grid search with `train_executor = joblib`: the
+    candidates missing from the store are evaluated by a GridSearchCV
+    without refit, the results are then collected and the best candidate
+    refit like ProcessPoolGridSearch.
+
+    Attributes
+    ----------
+        n_jobs (int): Parallel jobs of the GridSearchCV.
+
+    Methods
+    -------
+        fit(self, X, y) : Runs the search and refits the best candidate
+    """
+
+    executor = "joblib"
+
+    def __init__(
+        self,
+        estimator,
+        param_grid: dict,
+        cv: int = 5,
+        n_jobs: int = -1,
+        store: CVResultStore | None = None,
+    ) -> None:
+        """Initializes the search"""
+        super().__init__(estimator, param_grid, cv=cv, store=store)
+        self.n_jobs = n_jobs
+
+    def _evaluate(self, X: np.ndarray, y: np.ndarray, candidates: list) -> list:
+        """
+        Fit and score every candidate on every fold with GridSearchCV.
+
+        GridSearchCV only reports the mean fit and score times, every
+        fold gets the mean.
+
+        Returns:
+            list: For every candidate, the list of its fold results.
+        """
+        logger.info(
+            f"searching {len(candidates)} candidates x {self.cv} folds with joblib",
+        )
+        search = GridSearchCV(
+            self.estimator,
+            # one single-point grid per candidate keeps the candidate order
+            param_grid=[
+                {name: [value] for name, value in params.items()}
+                for params in candidates
+            ],
+            cv=self.cv,
+            n_jobs=self.n_jobs,
+            refit=False,
+        ).fit(X, y)
+        results = search.cv_results_
+        return [
+            [
+                {
+                    "fit_time": float(results["mean_fit_time"][i]),
+                    "score_time": float(results["mean_score_time"][i]),
+                    "score": float(results[f"split{fold}_test_score"][i]),
+                }
+                for fold in range(self.cv)
+            ]
+            for i in range(len(candidates))
+        ]
@@ -0,0 +1,197 @@
+"""
+This module provides an on-disk cache of the prepared training data.
+
+Every entry is a directory of `.npy` files (the float32 feature matrix and
+the target), the pickled fitted transformer and a `meta.json`, named after
+the fingerprint of what it was prepared from:
+    - the row count, highest rowid and column schema of the source table,
+    - the source code of the feature transformer module (the class, its
+      constants such as GARDEN_PATTERN or CATEGORY_VALUES and
+      `prepare_data`) and the parameters of the transformer.
+A build whose fingerprint matches an entry memory-maps it instead of
+streaming and transforming the table again. Entries are evicted least
+recently used first once the store grows beyond `feature_store_max_bytes`.
+
+The fingerprint does not see rows updated in place (the row count and
+rowid do not change), force a rebuild after such edits.
+"""
+
+import hashlib
+import inspect
+import json
+import pickle as pkl
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sqlalchemy import func, inspect as sa_inspect, select
+
+from config import db_settings, get_engine, model_setting
+from db.db_model import RentApartments
+from models.pipe.data_collection import ROWID
+from models.pipe.data_preparation import RentFeatureTransformer, prepare_data
+
+
+def table_fingerprint(until_rowid: int) -> dict:
+    """
+    Cheap fingerprint of the RentApartments rows up to a rowid.
+
+    Args:
+        until_rowid (int): Highest rowid the build reads.
+
+    Returns:
+        dict: Row count, highest rowid and schema hash of the table.
+    """
+    engine = get_engine(read_only=True)
+    columns = sa_inspect(engine).get_columns(db_settings.rent_apart_table_name)
+    schema = [(col["name"], str(col["type"])) for col in columns]
+    query = (
+        select(func.count(), func.max(ROWID))
+        .select_from(RentApartments)
+        .where(ROWID <= until_rowid)
+    )
+    with engine.connect() as conn:
+        n_rows, max_rowid = conn.execute(query).one()
+    return {
+        "table": db_settings.rent_apart_table_name,
+        "n_rows": n_rows,
+        "max_rowid": max_rowid or 0,
+        "schema": hashlib.sha256(json.dumps(schema).encode()).hexdigest(),
+    }
+
+
+def preprocessing_version(transformer: RentFeatureTransformer) -> str:
+    """Hash of the transformer module and parameters, changes invalidate entries."""
+    source = inspect.getsource(inspect.getmodule(type(transformer)))
+    params = json.dumps(transformer.get_params(), sort_keys=True, default=str)
+    return hashlib.sha256((source + params).encode()).hexdigest()
+
+
+def load_prepared_data(
+    until_rowid: int,
+    transformer: RentFeatureTransformer | None = None,
+    rebuild: bool = False,
+) -> tuple[pd.DataFrame, np.ndarray, RentFeatureTransformer]:
+    """
+    Return the prepared training data, from the store when it is current.
+
+    On a miss the data is prepared with `prepare_data` and written to the
+    store; on a hit the arrays are memory-mapped read-only. Either way X
+    is a view of the float32 feature matrix, naming its columns so the
+    model records the feature names, and y the target array.
+
+    Args:
+        until_rowid (int): Highest rowid of the rows to prepare.
+        transformer (RentFeatureTransformer | None): Transformer to fit,
+            a default one if None.
+        rebuild (bool): Prepare the data again even if an entry matches.
+
+    Returns:
+        tuple: The features X, the target y and the fitted transformer.
+    """
+    transformer = transformer or RentFeatureTransformer()
+    fingerprint = {
+        **table_fingerprint(until_rowid),
+        "preprocessing": preprocessing_version(transformer),
+    }
+    key = hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode())
+    entry = Path(model_setting.feature_store_path) / key.hexdigest()[:16]
+
+    if entry.exists() and not rebuild:
+        logger.info(f"loading the prepared data from the feature store : {entry}")
+        (entry / "meta.json").touch()  # recency for the eviction
+        features, target, transformer = _read_entry(entry)
+        return _named(features, transformer), target, transformer
+
+    start = time.perf_counter()
+    data = prepare_data(transformer=transformer, until_rowid=until_rowid)
+    features, target = _write_entry(entry, data, transformer, fingerprint)
+    logger.info(
+        f"prepared data in {time.perf_counter() - start:.1f} s, "
+        f"saved to the feature store : {entry}",
+    )
+    evict(model_setting.feature_store_max_bytes)
+    return _named(features, transformer), target, transformer
+
+
+def evict(max_bytes: int) -> None:
+    """
+    Delete the least recently used entries until the store fits.
+
+    Args:
+        max_bytes (int): Largest total size of the store.
+
+    Returns:
+        None
+    """
+    root = Path(model_setting.feature_store_path)
+    entries = sorted(
+        (meta.parent for meta in root.glob("*/meta.json")),
+        key=lambda entry: (entry / "meta.json").stat().st_mtime,
+    )
+    sizes = {entry: _entry_size(entry) for entry in entries}
+    total = sum(sizes.values())
+    for entry in entries[:-1]:  # the newest entry is always kept
+        if total <= max_bytes:
+            break
+        logger.info(f"evicting feature store entry {entry} ({sizes[entry]} bytes)")
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= sizes[entry]
+
+
+def _read_entry(entry: Path) -> tuple[np.ndarray, np.ndarray, RentFeatureTransformer]:
+    """Memory-map the feature matrix and target of an entry."""
+    features = np.load(entry / "features.npy", mmap_mode="r")
+    target = np.load(entry / "target.npy", mmap_mode="r")
+    with open(entry / "transformer.pkl", "rb") as transformer_file:
+        transformer = pkl.load(transformer_file)
+    return features, target, transformer
+
+
+def _named(features: np.ndarray, transformer: RentFeatureTransformer) -> pd.DataFrame:
+    """View of the feature matrix with the transformer's column names."""
+    return pd.DataFrame(
+        features,
+        columns=transformer.get_feature_names_out(),
+        copy=False,
+    )
+
+
+def _write_entry(
+    entry: Path,
+    data: pd.DataFrame,
+    transformer: RentFeatureTransformer,
+    fingerprint: dict,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Write an entry to a temporary directory, then move it in place.
+
+    Returns:
+        tuple: The feature matrix and target written.
+    """
+    tmp = entry.with_name(f"{entry.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    features = data[list(transformer.get_feature_names_out())].to_numpy(
+        dtype=np.float32,
+    )
+    features = np.ascontiguousarray(features)
+    target = data["rent"].to_numpy()
+    np.save(tmp / "features.npy", features)
+    np.save(tmp / "target.npy", target)
+    with open(tmp / "transformer.pkl", "wb") as transformer_file:
+        pkl.dump(transformer, transformer_file)
+    (tmp / "meta.json").write_text(
+        json.dumps({**fingerprint, "shape": list(features.shape)}, indent=2),
+    )
+    shutil.rmtree(entry, ignore_errors=True)
+    tmp.rename(entry)
+    return features, target
+
+
+def _entry_size(entry: Path) -> int:
+    """Total size in bytes of the files of an entry."""
+    return sum(path.stat().st_size for path in entry.iterdir())
@@ -0,0 +1,202 @@
+"""
+This module provides incremental retraining of the saved model.
+
+`update_model` reads the training state saved by `build_model`, loads
+only the rows inserted after its rowid watermark and grows the saved forest
+with `warm_start`, adding trees fitted on those rows with the
+hyperparameters chosen by the last full search. The number of new trees
+keeps the trees-per-row ratio of the full build. A gradient boosting model
+gets its new boosting iterations the same way, fitted on the residuals of
+the saved model on the new rows.
+
+A full `build_model` (re-search included) runs instead when:
+    - there is no training state or saved model yet,
+    - the model backend changed since the last full build,
+    - the last full search is older than `full_search_every_days`,
+    - the R^2 of the saved model on the new rows is more than
+      `drift_threshold` below the test score of the last full search.
+
+The artifacts derived from the forest follow it: the ranges of the
+feature schema are widened to the new rows, and the compressed and
+distilled variants, which only a full build can derive again (they need
+the training and test split), are deleted with their report so that a
+service configured for a variant falls back to the updated full model.
+
+Rows are tracked by SQLite rowid since the table has no modification
+time: rows rewritten with a new rowid (delete and insert, INSERT OR
+REPLACE) are picked up, in-place UPDATEs only by the next full build.
+"""
+
+import math
+import pickle as pkl
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from config import model_setting
+from models.feature_schema import FeatureSchema
+from models.flat_forest import MODEL_VARIANTS, variant_model_name
+from models.pipe.backends import count_trees, n_trees_param
+from models.pipe.data_collection import load_data_from_db
+from models.pipe.model import (
+    _save_feature_schema,
+    _save_model,
+    _save_variants,
+    build_model,
+    load_training_state,
+    save_training_state,
+)
+
+
+def update_model(rebuild_features: bool = False) -> None:
+    """
+    Grows the saved forest with trees fitted on the rows added since the
+    last build or update, or rebuilds it when a full search is due.
+
+    Args:
+        rebuild_features (bool): Passed to the full builds, which then
+            prepare the training data again instead of loading it from
+            the feature store. The update itself transforms the new rows
+            with the saved transformer and never reads the store.
+
+    Returns:
+        None
+    """
+    logger.info("starting up incremental model update")
+    state = load_training_state()
+    model_dir = Path(model_setting.model_path)
+    if state is None or not (model_dir / model_setting.model_name).exists():
+        logger.info("no trained model or training state yet, running a full build")
+        build_model(rebuild_features=rebuild_features)
+        return
+
+    backend = state.get("backend", "random_forest")
+    if backend != model_setting.model_backend:
+        logger.info(
+            f"the saved model is a {backend} model, running a full build "
+            f"with the {model_setting.model_backend} backend",
+        )
+        build_model(rebuild_features=rebuild_features)
+        return
+
+    age_days = (time.time() - state["full_search_at"]) / 86_400
+    if age_days >= model_setting.full_search_every_days:
+        logger.info(
+            f"last full search is {age_days:.1f} days old "
+            f"(every {model_setting.full_search_every_days} days), "
+            f"running a full build",
+        )
+        build_model(rebuild_features=rebuild_features)
+        return
+
+    start = time.perf_counter()
+    new_rows = load_data_from_db(after_rowid=state["watermark"])
+    if len(new_rows) < model_setting.incremental_min_rows:
+        logger.info(
+            f"{len(new_rows)} new rows after rowid {state['watermark']}, "
+            f"waiting for {model_setting.incremental_min_rows} to update the model",
+        )
+        return
+
+    with open(model_dir / model_setting.model_name, "rb") as model_file:
+        model = pkl.load(model_file)
+    with open(model_dir / model_setting.preprocessor_name, "rb") as transformer_file:
+        transformer = pkl.load(transformer_file)
+    X = pd.DataFrame(
+        transformer.transform(new_rows),
+        columns=transformer.get_feature_names_out(),
+        copy=False,
+    )
+    y = new_rows["rent"]
+
+    # the new rows were never seen by the model: they measure drift
+    score = model.score(X, y)
+    logger.info(
+        f"R^2 on {len(X)} new rows : {score:.4f} "
+        f"(last full search : {state['score']:.4f})",
+    )
+    if state["score"] - score > model_setting.drift_threshold:
+        logger.info(
+            f"score dropped by more than {model_setting.drift_threshold}, "
+            f"running a full build",
+        )
+        build_model(rebuild_features=rebuild_features)
+        return
+
+    n_trees = count_trees(model)
+    built_trees = state.get("n_trees", state["params"].get("n_estimators"))
+    n_new_trees = max(1, math.ceil(built_trees * len(X) / state["n_rows"]))
+    # the saved forest keeps the hyperparameters of the last full search;
+    # early stopping would hold out part of the few new rows, it is off
+    # while they are added
+    saved_params = {
+        name: value
+        for name, value in model.get_params().items()
+        if name in ("warm_start", "early_stopping")
+    }
+    model.set_params(**{n_trees_param(model): n_trees + n_new_trees})
+    model.set_params(**{name: name == "warm_start" for name in saved_params})
+    model.fit(X, y)
+    model.set_params(**saved_params)
+    # the model file goes last, like in a full build
+    _refresh_artifacts(X)
+    _save_model(model)
+
+    state["watermark"] = int(new_rows["rowid"].max())
+    state["incremental_rows"] = state.get("incremental_rows", 0) + len(X)
+    save_training_state(state)
+
+    elapsed = time.perf_counter() - start
+    summary = (
+        f"added {n_new_trees} trees ({n_trees} -> {n_trees + n_new_trees}) "
+        f"fitted on {len(X)} new rows in {elapsed:.1f} s"
+    )
+    if state.get("search_cached"):
+        # the search results came from the CV result store, the build
+        # time says nothing about the time of a full search
+        logger.info(summary)
+        return
+    logger.info(
+        f"{summary}, {state['full_build_seconds'] - elapsed:.1f} s saved "
+        f"against a full build ({state['full_build_seconds']:.1f} s)",
+    )
+
+
+def _refresh_artifacts(X: pd.DataFrame) -> None:
+    """
+    Brings the artifacts saved next to the model in line with its update.
+
+    The feature schema keeps its names and kinds, its ranges are widened
+    to the new rows. The compressed and distilled variants were derived
+    from the forest before the update, they are deleted with their
+    compression report until the next full build derives them again.
+
+    Args:
+        X (pd.DataFrame): The new rows the model was updated with.
+
+    Returns:
+        None
+    """
+    path = Path(model_setting.model_path) / model_setting.feature_schema_name
+    if path.exists():
+        schema = FeatureSchema.load(path)
+        if schema.minimums is not None and schema.maximums is not None:
+            values = np.asarray(X, dtype=np.float64)
+            schema.minimums = np.minimum(schema.minimums, values.min(axis=0)).tolist()
+            schema.maximums = np.maximum(schema.maximums, values.max(axis=0)).tolist()
+        _save_feature_schema(schema)
+
+    stale = [
+        variant
+        for variant in MODEL_VARIANTS[1:]  # all but the full model
+        if Path(model_setting.model_path, variant_model_name(variant)).exists()
+    ]
+    if stale:
+        logger.warning(
+            f"deleting the {', '.join(stale)} variants of the model before the "
+            f"update, the next full build derives them again",
+        )
+    _save_variants({}, None)
@@ -0,0 +1,267 @@
+"""
+This module provides bulk ingestion of listings into the database.
+
+`ingest_file` streams a CSV or Parquet file in chunks, coerces every chunk
+to the column types of the RentApartments model and upserts the valid
+rows on `address`, one transaction per chunk. Rows that cannot be coerced,
+or miss a column the training pipeline needs, are rejected, counted by
+reason and optionally written to a rejects CSV file with the reason.
+
+The upsert replaces: the rows of the table with the address of an
+ingested row are deleted and the new row is inserted, with a new rowid.
+Replaced listings are therefore seen as new rows by the incremental
+training and the feature store fingerprint, which both track rowids.
+Within one file the last row of an address wins.
+"""
+
+import time
+from collections import Counter
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sqlalchemy import bindparam, delete, insert
+from sqlalchemy import inspect as sa_inspect
+
+from config import db_settings, get_engine
+from db.db_model import RentApartments
+from models.instrumentation import emit_metric
+from models.pipe.data_collection import PIPELINE_COLUMNS
+from models.pipe.data_preparation import (
+    CATEGORICAL_COLS,
+    CATEGORY_VALUES,
+    GARDEN_PATTERN,
+    NO_GARDEN,
+)
+
+# python type of every column of the table, in table order
+LISTING_COLUMNS = {
+    column.name: column.type.python_type for column in RentApartments.__table__.columns
+}
+# columns a row must have, the others are stored as NULL when missing
+REQUIRED_COLUMNS = ("address", *PIPELINE_COLUMNS)
+
+
+def read_listings(path: str | Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV (optionally compressed) or Parquet file in chunks.
+
+    Args:
+        path (str | Path): File to read, by suffix `.csv[.gz|.bz2|.zip|.xz]`
+            or `.parquet`.
+        chunk_size (int): Rows per chunk.
+
+    Yields:
+        pd.DataFrame: The next chunk of at most `chunk_size` rows.
+
+    Raises:
+        ValueError: on an unsupported suffix or missing required columns.
+    """
+    path = Path(path)
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    if suffixes[-1:] == [".parquet"]:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("reading Parquet files requires pyarrow") from exc
+
+        parquet = pq.ParquetFile(path)
+        _check_columns(parquet.schema_arrow.names, path)
+        columns = [col for col in parquet.schema_arrow.names if col in LISTING_COLUMNS]
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    elif ".csv" in suffixes[-2:]:
+        _check_columns(pd.read_csv(path, nrows=0).columns, path)
+        yield from pd.read_csv(
+            path,
+            chunksize=chunk_size,
+            usecols=lambda col: col in LISTING_COLUMNS,
+        )
+    else:
+        raise ValueError(f"unsupported file type, expected CSV or Parquet: {path}")
+
+
+def _check_columns(columns, path: Path) -> None:
+    """Raise a ValueError when the file misses required columns."""
+    missing = [col for col in REQUIRED_COLUMNS if col not in set(columns)]
+    if missing:
+        raise ValueError(f"{path} misses the required columns {missing}")
+
+
+def coerce_listings(chunk: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Coerce a chunk of raw listings to the RentApartments column types.
+
+    Text columns are stripped, blank values become missing; numeric
+    columns are parsed, integer columns must hold whole numbers. The
+    yes/no amenity columns must hold a value of the feature transformer's
+    vocabulary and the garden a size (`GARDEN_PATTERN`) or "Not present",
+    otherwise the next build would fail to prepare the table.
+
+    Args:
+        chunk (pd.DataFrame): Raw rows, as read from a file.
+
+    Returns:
+        tuple[pd.DataFrame, pd.Series]: The coerced chunk, with the
+        columns of the table in table order, and the reason every row is
+        rejected for (missing for the valid rows).
+    """
+    reasons = pd.Series(None, index=chunk.index, dtype=object)
+
+    def reject(mask: pd.Series, reason: str) -> None:
+        """Record the reason of the rows not rejected for another one."""
+        reasons[mask & reasons.isna()] = reason
+
+    coerced = {}
+    for col, python_type in LISTING_COLUMNS.items():
+        if col not in chunk:
+            coerced[col] = pd.Series(None, index=chunk.index, dtype=object)
+        elif python_type is str:
+            text = chunk[col].astype("string").str.strip()
+            coerced[col] = text.mask(text == "")
+            present = coerced[col].notna()
+            if col in CATEGORICAL_COLS:
+                unknown = present & ~coerced[col].isin(CATEGORY_VALUES)
+                reject(unknown, f"{col} is not one of {CATEGORY_VALUES}")
+            elif col == "garden":
+                size = coerced[col].str.extract(GARDEN_PATTERN, expand=False)
+                unparsed = present & size.isna() & (coerced[col] != NO_GARDEN)
+                reject(unparsed, f"garden has no size and is not {NO_GARDEN!r}")
+        else:
+            values = chunk[col]
+            numbers = pd.to_numeric(values, errors="coerce").astype("float64")
+            reject(numbers.isna() & values.notna(), f"{col} is not a number")
+            reject(np.isinf(numbers), f"{col} is not finite")
+            finite = numbers.where(np.isfinite(numbers))
+            if python_type is int:
+                fractional = finite.notna() & (finite != finite.round())
+                reject(fractional, f"{col} is not a whole number")
+                finite = finite.round().astype("Int64")
+            coerced[col] = finite
+        if col in REQUIRED_COLUMNS:
+            reject(coerced[col].isna(), f"missing {col}")
+    return pd.DataFrame(coerced), reasons
+
+
+def ingest_file(
+    path: str | Path,
+    chunk_size: int | None = None,
+    rejects_path: str | Path | None = None,
+) -> dict:
+    """
+    Upsert the listings of a CSV or Parquet file into the table.
+
+    Every chunk is coerced, deduplicated on address (last row wins) and
+    written in its own transaction: the rows with the same addresses
+    are deleted, then the chunk is inserted with one executemany call.
+    An interrupted run keeps the chunks already committed.
+
+    Args:
+        path (str | Path): CSV or Parquet file of listings.
+        chunk_size (int | None): Rows per chunk and transaction, defaults
+            to `db_settings.ingest_chunk_size`.
+        rejects_path (str | Path | None): CSV file the rejected rows are
+            appended to, with a `reject_reason` column.
+
+    Returns:
+        dict: Rows read, inserted, replaced and rejected, rejections by
+        reason, elapsed seconds and rows per second.
+    """
+    chunk_size = chunk_size or db_settings.ingest_chunk_size
+    table = RentApartments.__table__
+    engine = get_engine()
+    _index_addresses(engine)
+    insert_sql = str(insert(table).compile(dialect=engine.dialect))
+    delete_sql = str(
+        delete(table)
+        .where(table.c.address == bindparam("address"))
+        .compile(dialect=engine.dialect),
+    )
+
+    logger.info(f"ingesting {path} in chunks of {chunk_size} rows ...")
+    stats = Counter()
+    rejected_by = Counter()
+    start = time.perf_counter()
+    for chunk in read_listings(path, chunk_size):
+        listings, reasons = coerce_listings(chunk)
+        invalid = reasons.notna()
+        if invalid.any():
+            rejected_by.update(reasons[invalid])
+            if rejects_path is not None:
+                _write_rejects(chunk[invalid], reasons[invalid], rejects_path)
+        listings = listings[~invalid].drop_duplicates("address", keep="last")
+        rows = list(
+            listings.astype(object)
+            .where(listings.notna(), None)
+            .itertuples(index=False, name=None),
+        )
+        replaced = 0
+        # a chunk rejected as a whole has nothing to write, and an empty
+        # executemany is a driver error
+        if rows:
+            with engine.begin() as conn:
+                replaced = conn.exec_driver_sql(
+                    delete_sql,
+                    [(address,) for address in listings["address"]],
+                ).rowcount
+                conn.exec_driver_sql(insert_sql, rows)
+        stats.update(
+            read=len(chunk),
+            inserted=len(rows),
+            replaced=max(replaced, 0),
+            rejected=int(invalid.sum()),
+        )
+        elapsed = time.perf_counter() - start
+        logger.debug(
+            f"ingested {stats['read']} rows at {stats['read'] / elapsed:.0f} "
+            f"rows/s, {stats['rejected']} rejected",
+        )
+
+    elapsed = time.perf_counter() - start
+    result = {
+        **{key: stats[key] for key in ("read", "inserted", "replaced", "rejected")},
+        "rejected_by": dict(rejected_by),
+        "elapsed": round(elapsed, 3),
+        "rows_per_sec": round(stats["read"] / elapsed, 1) if elapsed else 0.0,
+    }
+    emit_metric("job", "ingestion", path=str(path), **result)
+    logger.info(
+        f"ingested {result['read']} rows of {path} in {elapsed:.1f} s "
+        f"({result['rows_per_sec']:.0f} rows/s): {result['inserted']} "
+        f"inserted, {result['replaced']} replaced, {result['rejected']} rejected",
+    )
+    for reason, count in rejected_by.most_common():
+        logger.warning(f"rejected {count} rows: {reason}")
+    return result
+
+
+def _write_rejects(rows: pd.DataFrame, reasons: pd.Series, path: str | Path) -> None:
+    """Append rejected raw rows and their reason to a CSV file."""
+    path = Path(path)
+    rows.assign(reject_reason=reasons).to_csv(
+        path,
+        mode="a",
+        header=not path.exists(),
+        index=False,
+    )
+
+
+def _index_addresses(engine) -> None:
+    """
+    Index the address column if the table has no key on it.
+
+    The upsert deletes by address; a table created from the model has
+    its primary key index, the bundled table has no key at all and a
+    delete would scan it once per row.
+    """
+    name = db_settings.rent_apart_table_name
+    inspector = sa_inspect(engine)
+    keys = [index["column_names"] for index in inspector.get_indexes(name)]
+    keys.append(inspector.get_pk_constraint(name)["constrained_columns"])
+    if ["address"] in keys:
+        return
+    logger.info(f"creating index ix_{name}_address ...")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"CREATE INDEX ix_{name}_address ON {name} (address)")
@@ -2,68 +2,142 @@
 This module creates the pipeline for building, training and saving ML model.
 
 It includes the process of data preparation, model training using
-RandomForestRegressor, hyperparameter tuning with GridSearchCV,
-model evaluation, and serialization of the trained model.
+RandomForestRegressor or HistGradientBoostingRegressor (the backend set by
+`model_setting.model_backend`), hyperparameter tuning with GridSearchCV,
+model evaluation, compression into smaller variants (see
+`models.pipe.compression`), and serialization of the trained model.
 """
 
+import json
+import os
 import pandas as pd
 import pickle as pkl
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
 
 from loguru import logger
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import GridSearchCV
 
 from config import model_setting
-from models.pipe.data_preparation import prepare_data
-
-
-def build_model() -> None:
+from models.feature_schema import FeatureSchema
+from models.flat_forest import (
+    MODEL_VARIANTS,
+    FlatForest,
+    flat_model_path,
+    variant_model_name,
+)
+from models.instrumentation import Stage
+from models.pipe.backends import count_trees, make_estimator, n_trees_param
+from models.pipe.compression import compress_model, compression_report_path
+from models.pipe.data_collection import max_rowid
+from models.pipe.data_preparation import RentFeatureTransformer, prepare_data
+from models.pipe.feature_store import load_prepared_data
+from models.pipe.search import log_search_results, make_search
+
+
+def build_model(rebuild_features: bool = False) -> None:
     """
     Coordinates the end-to-end process of building, training, and saving
     the machine learning model.
     The `build_model` function orchestrates the entire model building process
 
+    Args:
+        rebuild_features (bool): Prepare the data again even if the
+            feature store holds it for the current table.
+
     Returns:
         None
     """
     # we need to train and save the model
     logger.info("starting up model building pipleline")
-    # 1 - loading the data from prepare script
-    data = prepare_data()
-    feature_names = [
-        "area",
-        "constraction_year",
-        "bedrooms",
-        "garden",
-        "balcony_yes",
-        "parking_yes",
-        "furnished_yes",
-        "garage_yes",
-        "storage_yes",
-    ]
-    # 2- identify the X and y variables
-    # print("Building model...")
-    X, y = _get_X_y(
-        data,
-        col_x=feature_names,
-    )
-    X_train, X_test, y_train, y_test = _split_train_test(
-        X,
-        y,
-    )
-    Grid_rf = _train_model(
-        X_train,
-        y_train,
-    )
-    _evalute_model(
-        Grid_rf,
-        X_test,
-        y_test,
+    # every step emits a metric record (wall/CPU time, peak RSS, rows)
+    with Stage("build_model") as build:
+        # 1 - loading the data from prepare script, up to a fixed watermark
+        # so rows inserted meanwhile are left to the next incremental run
+        with Stage("prepare_data") as stage:
+            watermark = max_rowid()
+            if model_setting.feature_store_enabled:
+                # X and y straight from the stored arrays, no prepared frame
+                X, y, transformer = load_prepared_data(
+                    watermark,
+                    rebuild=rebuild_features,
+                )
+            else:
+                transformer = RentFeatureTransformer()
+                data = prepare_data(transformer=transformer, until_rowid=watermark)
+                # 2- identify the X and y variables
+                X, y = _get_X_y(
+                    data,
+                    col_x=list(transformer.get_feature_names_out()),
+                )
+            stage.rows = len(X)
+        feature_names = list(transformer.get_feature_names_out())
+        with Stage("split_train_test", rows=len(X)):
+            X_train, X_test, y_train, y_test = _split_train_test(
+                X,
+                y,
+            )
+        with Stage("train_model", rows=len(X_train)) as stage:
+            Grid_rf, n_cached = _train_model(
+                X_train,
+                y_train,
+            )
+            stage.extra["cached_candidates"] = n_cached
+        with Stage("evaluate_model", rows=len(X_test)):
+            score = _evalute_model(
+                Grid_rf,
+                X_test,
+                y_test,
+            )
+        # smaller variants of the model, saved next to it
+        variants, report = {}, None
+        if model_setting.compression_enabled:
+            with Stage("compress_model", rows=len(X_train)):
+                variants, report = compress_model(
+                    Grid_rf,
+                    X_train,
+                    y_train,
+                    X_test,
+                    y_test,
+                )
+        # print(r'Model Evalute Score : ' , evalute_score)
+        # Saving Model as pickle file we can load it any time we wanna to use it
+        # the model file goes last: a watching inference service reloads
+        # once it changed, the artifacts it goes with are in place by then
+        with Stage("save_model"):
+            _save_preprocessor(transformer)
+            _save_feature_schema(
+                FeatureSchema.from_training(
+                    X_train,
+                    feature_names,
+                    kinds=transformer.get_feature_kinds_out(),
+                ),
+            )
+            _save_variants(variants, report)
+            _save_model(Grid_rf)
+        build.rows = len(X)
+        build.extra["test_score"] = float(score)
+    _, param_grid = make_estimator()
+    save_training_state(
+        {
+            "watermark": int(watermark),
+            "backend": model_setting.model_backend,
+            "params": {
+                name: Grid_rf.get_params()[name]
+                for name in (*param_grid, n_trees_param(Grid_rf))
+            },
+            "n_trees": count_trees(Grid_rf),
+            "n_rows": len(X_train),
+            "score": float(score),
+            "full_search_at": time.time(),
+            "full_build_seconds": build.record["wall_time"],
+            # a build served from the CV result store is no full search
+            "search_cached": n_cached > 0,
+        },
     )
-    # print(r'Model Evalute Score : ' , evalute_score)
-    # Saving Model as pickle file we can load it any time we wanna to use it
-    _save_model(Grid_rf)
     # return r'Model Evalute Score : ' , evalute_score
 
 
@@ -124,43 +198,43 @@ def _split_train_test(
 def _train_model(
     X_train: pd.DataFrame,
     y_train: pd.Series,
-) -> RandomForestRegressor:
+) -> tuple[RandomForestRegressor, int]:
     """
-    Trains a Random Forest Regressor with hyperparameter using GridSearchCV.
+    Trains the backend regressor with hyperparameter search.
 
-    The function searches for the best hyperparameters for the Random Forest
-    Regressor model from specified trains the model in the training data.
+    The function searches for the best hyperparameters for the estimator
+    of the configured backend (`model_setting.model_backend`, a Random
+    Forest or a histogram gradient boosting regressor) and trains it on
+    the training data.
+    The search strategy (exhaustive grid, successive halving or time-boxed
+    random search) is selected by `model_setting.search_strategy`.
 
     Args:
         X_train (pd.DataFrame): The Training set features.
         y_train (pd.Series): The Training set target variable.
 
     Returns:
-        RandomForestRegressor:  The best-performed model hyperparameter.
-    """
-    logger.info("training a model with hyperparameters")
-    grid_param = {
-        "n_estimators": range(50, 100, 20),
-        "criterion": [
-                      "squared_error",
-                      "poisson",
-                      "absolute_error",
-                      "friedman_mse"
-                      ],
-        "max_depth": range(6, 12, 2),
-    }
-    logger.debug(f"grid param : {grid_param}")
-    grid = GridSearchCV(
-                        RandomForestRegressor(),
-                        param_grid=grid_param,
-                        cv=5,
-                        n_jobs=-1
-                        )
+        tuple[RandomForestRegressor, int]:  The best-performed model
+        hyperparameter (a HistGradientBoostingRegressor with the boosting
+        backend), and the number of candidates read from the CV result
+        store instead of fitted.
+    """
+    estimator, param_grid = make_estimator()
+    logger.info(f"training a {type(estimator).__name__} with hyperparameters")
+    logger.debug(f"grid param : {param_grid}")
+    grid = make_search(
+                       estimator,
+                       param_grid=param_grid,
+                       cv=5,
+                       n_jobs=-1
+                       )
+    start = time.perf_counter()
     model_grid = grid.fit(X_train, y_train)
+    log_search_results(model_grid, time.perf_counter() - start, len(X_train))
     # best_model_param = model_grid.best_params_
     # best_model_score = model_grid.best_score_
     # print("Train score: " , model_grid.best_score_)
-    return model_grid.best_estimator_
+    return model_grid.best_estimator_, getattr(model_grid, "n_cached_", 0)
 
 
 def _evalute_model(
@@ -190,25 +264,153 @@ def _evalute_model(
     return model_score
 
 
-def _save_model(model: RandomForestRegressor) -> None:
+def _save_model(
+    model: RandomForestRegressor,
+    model_name: str | None = None,
+) -> None:
     """
     Saves the trained model to a specified directory as a pickle file.
 
     The function uses the path and file name defined in the settings
-    configuration to save the model.
+    configuration to save the model. With `model_format = npy` the
+    forest (or boosted ensemble) is also saved as flat `.npy` node arrays.
 
     Args:
         model (RandomForestRegressor): The trained model to be saved.
+        model_name (str | None): File name of the model, defaults to
+            `model_setting.model_name`.
 
     Returns:
         None
     """
-    model_path = f"{model_setting.model_path}/{model_setting.model_name}"
+    model_name = model_name or model_setting.model_name
+    model_path = f"{model_setting.model_path}/{model_name}"
     logger.info(f"saving the model to directory : {model_path}")
-    with open(model_path, "wb") as model_file:
+    with _atomic_open(model_path) as model_file:
         pkl.dump(model, model_file)
 
+    # the pickle stays the fallback, the flat arrays are memory-mappable
+    if model_setting.model_format == "npy":
+        FlatForest.from_estimator(model).save(flat_model_path(model_name))
+
 
-# test
-df_get = build_model()
-# print(df_get)
+def _save_variants(variants: dict, report: dict | None) -> None:
+    """
+    Saves the compressed variants of the model and their trade-off report.
+
+    Variants not produced by this build are deleted, so the inference
+    service never serves a variant of an older model.
+
+    Args:
+        variants (dict): Fitted variants by name (see `compress_model`).
+        report (dict | None): Accuracy, size and latency of every variant,
+            None if the compression stage did not run.
+
+    Returns:
+        None
+    """
+    for variant in MODEL_VARIANTS[1:]:  # all but the full model
+        model_name = variant_model_name(variant)
+        if variant in variants:
+            _save_model(variants[variant], model_name)
+            continue
+        Path(model_setting.model_path, model_name).unlink(missing_ok=True)
+        shutil.rmtree(flat_model_path(model_name), ignore_errors=True)
+
+    path = compression_report_path()
+    if report is None:
+        path.unlink(missing_ok=True)
+        return
+    logger.info(f"saving the compression report to : {path}")
+    path.write_text(json.dumps(report, indent=2))
+
+
+@contextmanager
+def _atomic_open(path: str | Path):
+    """
+    Open a temporary file renamed over `path` once fully written.
+
+    A serving process watching the artifacts (hot reload) then never
+    reads a half-written file, and keeps reading the previous one until
+    the rename.
+    """
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, "wb") as file:
+        yield file
+    os.replace(tmp_path, path)
+
+
+def _save_preprocessor(transformer: RentFeatureTransformer) -> None:
+    """
+    Saves the fitted feature transformer next to the model.
+
+    The inference service loads it to prepare raw listings exactly
+    the way the training data was prepared.
+
+    Args:
+        transformer (RentFeatureTransformer): The fitted transformer.
+
+    Returns:
+        None
+    """
+    path = f"{model_setting.model_path}/{model_setting.preprocessor_name}"
+    logger.info(f"saving the feature transformer to : {path}")
+    with _atomic_open(path) as transformer_file:
+        pkl.dump(transformer, transformer_file)
+
+
+def _save_feature_schema(schema: FeatureSchema) -> None:
+    """
+    Saves the feature schema next to the model.
+
+    The inference service maps named inputs onto the training column
+    order and checks their kinds with it.
+
+    Args:
+        schema (FeatureSchema): The schema derived from the training data.
+
+    Returns:
+        None
+    """
+    path = f"{model_setting.model_path}/{model_setting.feature_schema_name}"
+    logger.info(f"saving the feature schema to : {path}")
+    schema.save(path)
+
+
+def training_state_path() -> Path:
+    """Return the path of the training state file next to the model."""
+    return Path(model_setting.model_path) / model_setting.training_state_name
+
+
+def load_training_state() -> dict | None:
+    """
+    Loads the training state written by the last build or update.
+
+    Returns:
+        dict | None: The state, None if no model was built yet.
+    """
+    path = training_state_path()
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_training_state(state: dict) -> None:
+    """
+    Saves the training state next to the model.
+
+    The state records the rowid watermark of the rows trained on, the
+    hyperparameters and test score of the last full search, when it ran,
+    how long the full build took and whether the CV result store served
+    part of its search; `update_model` reads it to train
+    on the new rows only.
+
+    Args:
+        state (dict): The JSON-serializable training state.
+
+    Returns:
+        None
+    """
+    path = training_state_path()
+    logger.info(f"saving the training state to : {path}")
+    path.write_text(json.dumps(state, indent=2))
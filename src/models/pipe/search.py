@@ -0,0 +1,286 @@
+"""
+This module provides the hyperparameter search strategies for training.
+
+The strategy is selected by configuration (`model_setting.search_strategy`):
+    - "grid": exhaustive GridSearchCV over every combination, or
+      ProcessPoolGridSearch with `train_executor = process_pool`; with
+      `cv_cache_enabled` the candidates already cross-validated on the
+      same data are read from the CVResultStore instead of fitted.
+    - "halving": successive halving, evaluating all candidates on a small
+      budget of samples or trees and keeping only the best for larger ones.
+    - "random": randomized search that stops sampling candidates once a
+      wall-clock time budget is spent.
+"""
+
+import math
+import time
+from numbers import Integral, Real
+
+from loguru import logger
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GridSearchCV,
+    HalvingGridSearchCV,
+    ParameterGrid,
+    ParameterSampler,
+)
+from sklearn.model_selection._search import BaseSearchCV
+from sklearn.utils._param_validation import Interval, StrOptions
+
+from config import model_setting
+from models.instrumentation import emit_metric
+from models.pipe.backends import n_trees_param
+from models.pipe.cv_cache import CVResultStore
+from models.pipe.executor import JoblibGridSearch, ProcessPoolGridSearch
+
+SEARCH_STRATEGIES = ("grid", "halving", "random")
+
+
+class TimeBudgetSearchCV(BaseSearchCV):
+    """
+    Randomized search over hyperparameters bounded by a time budget.
+
+    Candidates are sampled like RandomizedSearchCV and evaluated in small
+    batches; no new batch starts once `time_budget` seconds have elapsed.
+    The first batch always runs, so the search always has a best model.
+
+    Attributes
+    ----------
+        param_distributions (dict): Parameter names mapped to lists or
+            distributions to sample from.
+        time_budget (float): Seconds after which sampling stops.
+        n_iter (int | None): Maximum number of candidates, defaults to
+            the size of the grid.
+        batch_size (int): Candidates evaluated per batch.
+        random_state (int | None): Seed for the candidate sampler.
+    """
+
+    _parameter_constraints: dict = {
+        **BaseSearchCV._parameter_constraints,
+        "param_distributions": [dict, list],
+        "time_budget": [Interval(Real, 0, None, closed="neither")],
+        "n_iter": [Interval(Integral, 1, None, closed="left"), None],
+        "batch_size": [Interval(Integral, 1, None, closed="left")],
+        "random_state": ["random_state"],
+    }
+
+    def __init__(
+        self,
+        estimator,
+        param_distributions: dict,
+        *,
+        time_budget: float = 300.0,
+        n_iter: int | None = None,
+        batch_size: int = 4,
+        random_state: int | None = None,
+        scoring=None,
+        n_jobs: int | None = None,
+        refit: bool = True,
+        cv=None,
+        verbose: int = 0,
+        pre_dispatch: str = "2*n_jobs",
+        error_score=float("nan"),
+        return_train_score: bool = False,
+    ) -> None:
+        """Initializes the search with its sampling space and budget"""
+        super().__init__(
+            estimator=estimator,
+            scoring=scoring,
+            n_jobs=n_jobs,
+            refit=refit,
+            cv=cv,
+            verbose=verbose,
+            pre_dispatch=pre_dispatch,
+            error_score=error_score,
+            return_train_score=return_train_score,
+        )
+        self.param_distributions = param_distributions
+        self.time_budget = time_budget
+        self.n_iter = n_iter
+        self.batch_size = batch_size
+        self.random_state = random_state
+
+    def _run_search(self, evaluate_candidates) -> None:
+        """Evaluate sampled candidates batch by batch until out of time."""
+        n_iter = self.n_iter or len(ParameterGrid(self.param_distributions))
+        candidates = list(
+            ParameterSampler(
+                self.param_distributions,
+                n_iter,
+                random_state=self.random_state,
+            ),
+        )
+        start = time.perf_counter()
+        for i in range(0, len(candidates), self.batch_size):
+            if i and time.perf_counter() - start >= self.time_budget:
+                logger.info(
+                    f"time budget of {self.time_budget} s spent after "
+                    f"{i} of {len(candidates)} candidates",
+                )
+                break
+            evaluate_candidates(candidates[i : i + self.batch_size])
+
+
+def make_search(
+    estimator,
+    param_grid: dict,
+    strategy: str | None = None,
+    cv: int = 5,
+    n_jobs: int = -1,
+) -> "BaseSearchCV | ProcessPoolGridSearch":
+    """
+    Build the hyperparameter search selected by configuration.
+
+    The memoized grid searches return a ProcessPoolGridSearch (or its
+    JoblibGridSearch subclass) rather than a GridSearchCV.
+
+    Args:
+        estimator: The estimator to tune.
+        param_grid (dict): Parameter names mapped to the values to try.
+        strategy (str | None): One of `SEARCH_STRATEGIES`, defaults to
+            `model_setting.search_strategy`.
+        cv (int): Number of cross-validation folds.
+        n_jobs (int): Number of parallel jobs for the search.
+
+    Returns:
+        BaseSearchCV | ProcessPoolGridSearch: The unfitted search object.
+    """
+    strategy = strategy or model_setting.search_strategy
+    logger.info(f"using the {strategy!r} hyperparameter search strategy")
+    store = CVResultStore() if model_setting.cv_cache_enabled else None
+
+    if strategy == "grid" and model_setting.train_executor == "process_pool":
+        return ProcessPoolGridSearch(
+            estimator,
+            param_grid=param_grid,
+            cv=cv,
+            outer_jobs=model_setting.train_outer_jobs,
+            inner_jobs=model_setting.train_inner_jobs,
+            store=store,
+        )
+    if model_setting.train_executor == "process_pool":
+        logger.warning(
+            f"the process pool executor only runs the grid strategy, "
+            f"running {strategy!r} with joblib",
+        )
+
+    if strategy == "grid" and store is not None:
+        return JoblibGridSearch(
+            estimator,
+            param_grid=param_grid,
+            cv=cv,
+            n_jobs=n_jobs,
+            store=store,
+        )
+    if strategy == "grid":
+        return GridSearchCV(estimator, param_grid=param_grid, cv=cv, n_jobs=n_jobs)
+
+    if strategy == "halving":
+        return _make_halving_search(estimator, param_grid, cv, n_jobs)
+
+    if strategy == "random":
+        return TimeBudgetSearchCV(
+            estimator,
+            param_distributions=param_grid,
+            time_budget=model_setting.search_time_budget,
+            n_iter=model_setting.search_n_iter,
+            random_state=model_setting.search_random_state,
+            cv=cv,
+            n_jobs=n_jobs,
+        )
+
+    raise ValueError(
+        f"unknown search strategy {strategy!r}, "
+        f"expected one of {SEARCH_STRATEGIES}",
+    )
+
+
+def _make_halving_search(
+    estimator,
+    param_grid: dict,
+    cv: int,
+    n_jobs: int,
+) -> HalvingGridSearchCV:
+    """
+    Build a successive halving search on samples or on trees.
+
+    With `search_resource = n_estimators` the tree counts are taken out of
+    the grid and become the budget: every candidate starts with a few trees
+    and the survivors of each round get `search_factor` times more, up to
+    the largest n_estimators of the grid. A boosted ensemble, whose tree
+    count (`max_iter`) is not searched, grows up to its own `max_iter`.
+    """
+    factor = model_setting.search_factor
+    resource = model_setting.search_resource
+
+    if resource != "n_estimators":
+        return HalvingGridSearchCV(
+            estimator,
+            param_grid=param_grid,
+            factor=factor,
+            resource=resource,
+            min_resources="exhaust",
+            cv=cv,
+            n_jobs=n_jobs,
+            random_state=model_setting.search_random_state,
+        )
+
+    param_grid = dict(param_grid)
+    trees = n_trees_param(estimator)
+    max_resources = (
+        max(param_grid.pop(trees))
+        if trees in param_grid
+        else estimator.get_params()[trees]
+    )
+    n_rounds = math.ceil(math.log(len(ParameterGrid(param_grid)), factor))
+    return HalvingGridSearchCV(
+        estimator,
+        param_grid=param_grid,
+        factor=factor,
+        resource=trees,
+        max_resources=max_resources,
+        min_resources=max(1, max_resources // factor**n_rounds),
+        cv=cv,
+        n_jobs=n_jobs,
+        random_state=model_setting.search_random_state,
+    )
+
+
+def log_search_results(
+    search: "BaseSearchCV | ProcessPoolGridSearch",
+    elapsed: float,
+    n_rows: int | None = None,
+) -> None:
+    """
+    Emit a metric record with the fit time and score of every candidate.
+
+    Args:
+        search (BaseSearchCV | ProcessPoolGridSearch): A fitted search.
+        elapsed (float): Wall-clock seconds the search took.
+        n_rows (int | None): Number of rows the search was fitted on.
+
+    Returns:
+        None
+    """
+    results = search.cv_results_
+    for i, params in enumerate(results["params"]):
+        fields = {
+            "params": params,
+            "rows": n_rows,
+            "mean_fit_time": float(results["mean_fit_time"][i]),
+            "mean_score_time": float(results["mean_score_time"][i]),
+            "mean_test_score": float(results["mean_test_score"][i]),
+            "std_test_score": float(results["std_test_score"][i]),
+        }
+        if "mean_cpu_time" in results:
+            fields["mean_cpu_time"] = float(results["mean_cpu_time"][i])
+        if "n_resources" in results:
+            fields["round"] = int(results["iter"][i])
+            fields["resource"] = search.resource
+            fields["n_resources"] = int(results["n_resources"][i])
+        emit_metric("search_candidate", f"candidate {i}", **fields)
+    logger.info(
+        f"search evaluated {len(results['params'])} candidates in "
+        f"{elapsed:.1f} s, best score {search.best_score_:.4f} "
+        f"with {search.best_params_}",
+    )
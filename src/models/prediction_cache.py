@@ -0,0 +1,136 @@
+"""
+This module provides an in-process cache of model predictions.
+
+It contains the PredictionCache class, a bounded LRU mapping from the
+canonical bytes of a feature vector to its prediction, with an optional
+time to live and hit/miss/eviction counters. The cache belongs to one
+model artifact: its owner clears it when a different artifact is loaded.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    PredictionCache class holding recent predictions in LRU order.
+
+    Attributes
+    ----------
+        max_size (int): Most predictions kept, the least recently used
+            one is evicted beyond that.
+        ttl (float | None): Seconds a prediction stays valid, None keeps
+            it until evicted.
+        model_id (str | None): Identity of the artifact the cached
+            predictions were made with.
+        hits, misses, evictions, expirations (int): Counters since the
+            cache was created.
+
+    Methods
+    -------
+        key(row) : Canonical cache key of one feature row
+        get(self, key) : Returns a cached prediction or None
+        put(self, key, value, model_id) : Stores a prediction
+        reset(self, model_id) : Empties the cache for a new artifact
+        stats(self) : Returns the counters as a dict
+    """
+
+    def __init__(self, max_size: int, ttl: float | None = None) -> None:
+        """Initializes an empty cache"""
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.model_id = None
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self._entries: OrderedDict[bytes, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(row: np.ndarray) -> bytes:
+        """
+        Canonical key of one feature row.
+
+        The row is cast to float32, the dtype the forest predicts on, so
+        85, 85.0 and np.int64(85) share a key; adding 0.0 folds -0.0 into
+        0.0.
+
+        Args:
+            row (np.ndarray): 1-D feature row in training column order.
+
+        Returns:
+            bytes: The key.
+        """
+        return (np.asarray(row, dtype=np.float32) + np.float32(0.0)).tobytes()
+
+    def get(self, key: bytes) -> float | None:
+        """Return the cached prediction for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, value: float, model_id: str | None = None) -> None:
+        """
+        Store a prediction, evicting the least recently used if full.
+
+        Args:
+            key (bytes): Key of the feature row.
+            value (float): The prediction.
+            model_id (str | None): Artifact the prediction was made with;
+                it is dropped if the cache was reset for another one since.
+        """
+        expires_at = float("inf") if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if model_id is not None and model_id != self.model_id:
+                return
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def reset(self, model_id: str) -> None:
+        """
+        Empty the cache if `model_id` differs from the cached artifact.
+
+        Args:
+            model_id (str): Identity of the artifact now loaded.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if model_id != self.model_id:
+                self._entries.clear()
+                self.model_id = model_id
+
+    def stats(self) -> dict:
+        """Return the size and counters of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        """Number of cached predictions."""
+        return len(self._entries)
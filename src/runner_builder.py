@@ -7,8 +7,11 @@ It demostrates the typical workflow of using the ModelBuilderService in Practica
 application context.
 """
 
+import argparse
+
 from loguru import logger
 
+from config import configure_logging
 from models.model_builder import ModelBuilderService
 
 
@@ -18,9 +21,32 @@ def main():
     Run the application.
     Train the model and save it to model config folder.
     """
+    parser = argparse.ArgumentParser(description="Train and save the model.")
+    parser.add_argument(
+        "--rebuild-features",
+        action="store_true",
+        help="prepare the training data again, ignoring the feature store",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="logs/profile.prof",
+        metavar="PATH",
+        help="run under cProfile and dump the profile and a sorted report",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
     logger.info("running the runner builder script ...")
     ml_svc = ModelBuilderService()
-    ml_svc.train_model()
+    if args.profile:
+        # imported here so regular runs do not load the profiler
+        from models.instrumentation import profiled
+
+        with profiled(args.profile):
+            ml_svc.train_model(rebuild_features=args.rebuild_features)
+    else:
+        ml_svc.train_model(rebuild_features=args.rebuild_features)
 
 
 if __name__ == "__main__":
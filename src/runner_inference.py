@@ -11,6 +11,7 @@ application context.
 
 from loguru import logger
 
+from config import configure_logging
 from models.model_inference import ModelInferenceService
 
 
@@ -29,22 +30,24 @@ def main():
     This function decrated with the Loguru's @logger.catch to automatically
     log any exceptions that accur during the script execution.
     """
+    configure_logging()
     logger.info("running the runner script ...")
     ml_svc = ModelInferenceService()
     ml_svc.load_model()
 
+    # keyed by the training feature names, mapped through the feature schema
     feature_values = {
         "area": 85,
         "constraction_year": 2015,
         "bedrooms": 2,
-        "garden_area": 20,
-        "balcony_present": 1,
-        "parking_present": 1,
-        "furnished": 0,
-        "garage_present": 0,
-        "storage_present": 1,
+        "garden": 20,
+        "balcony_yes": 1,
+        "parking_yes": 1,
+        "furnished_yes": 0,
+        "garage_yes": 0,
+        "storage_yes": 1,
     }
-    pred = ml_svc.predict(list(feature_values.values()))
+    pred = ml_svc.predict(feature_values)
     logger.info(f"Prediction: {pred}")
 
 
@@ -0,0 +1,44 @@
+"""
+Main application script for bulk loading listings into the database.
+
+This script streams CSV or Parquet files of listings in chunks, coerces
+them to the rent apartments table schema and upserts them on the address,
+one transaction per chunk, then reports the throughput and the rejected
+rows.
+
+Example:
+    python runner_ingestion.py new_listings.csv --rejects logs/rejects.csv
+"""
+
+import argparse
+
+from loguru import logger
+
+from config import configure_logging
+from models.pipe.ingestion import ingest_file
+
+
+@logger.catch
+def main():
+    """
+    Run the application.
+    Ingest every file and report the throughput and the rejected rows.
+    """
+    parser = argparse.ArgumentParser(description="Load listings into the table.")
+    parser.add_argument("paths", nargs="+", help="CSV or Parquet files")
+    parser.add_argument("--chunk-size", type=int, help="rows per transaction")
+    parser.add_argument(
+        "--rejects",
+        metavar="PATH",
+        help="CSV file the rejected rows are appended to, with the reason",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    logger.info("running the runner ingestion script ...")
+    for path in args.paths:
+        ingest_file(path, chunk_size=args.chunk_size, rejects_path=args.rejects)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Main application script for re-scoring the whole table with the ML model.
+
+This script intializes the batch scoring service 'BatchScoringService',
+which loads the ML model, scores every row of the rent apartments table
+not scored yet by this model version and writes the predictions, with the
+model version and the scoring time, to the predictions table. Interrupted
+runs resume where they stopped.
+
+Example:
+    python runner_scoring.py --workers 4 --chunk-size 20000
+"""
+
+import argparse
+
+from loguru import logger
+
+from config import configure_logging
+from models.batch_scoring import BatchScoringService
+
+
+@logger.catch
+def main():
+    """
+    Run the application.
+    Score the table and report the throughput.
+    """
+    parser = argparse.ArgumentParser(description="Score the whole table.")
+    parser.add_argument("--workers", type=int, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, help="rows per chunk")
+    parser.add_argument(
+        "--model-version",
+        help="version written with the predictions, defaults to a hash "
+        "of the model artifact",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="delete the predictions of this model version and start over",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    logger.info("running the runner scoring script ...")
+    job = BatchScoringService(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        model_version=args.model_version,
+    )
+    job.run(restart=args.restart)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Main application script for serving the ML model over HTTP.
+
+This script intializes the model inference services 'ModelInferenceService',
+loads the ML model once and serves predictions with the 'PredictionServer',
+coalescing concurrent requests into micro-batches.
+
+Example request:
+    curl -X POST localhost:8000/predict -H "X-Deadline-Ms: 200" \
+        -d '{"area": 85, "constraction_year": 2015, "bedrooms": 2,
+             "garden": 20, "balcony_yes": 1, "parking_yes": 1,
+             "furnished_yes": 0, "garage_yes": 0, "storage_yes": 1}'
+"""
+
+import asyncio
+
+from loguru import logger
+
+from config import configure_logging
+from models.model_inference import ModelInferenceService
+from models.model_server import PredictionServer
+
+
+@logger.catch
+def main():
+    """
+    Run the application.
+    Load the model and serve predictions until interrupted.
+    """
+    # sampled per-request records on the hot path
+    configure_logging(mode="serving")
+    logger.info("running the runner server script ...")
+    ml_svc = ModelInferenceService()
+    ml_svc.load_model()
+    # new artifacts are loaded in the background and swapped in
+    ml_svc.start_watching()
+    try:
+        asyncio.run(PredictionServer(ml_svc).serve_forever())
+    except KeyboardInterrupt:
+        logger.info("prediction server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Shared fixtures of the test suite.
+
+The settings are read once, when the config package is imported, so the
+environment is pointed at a scratch directory before anything imports
+it: the model artifacts, the stores and a copy of the bundled database
+all live there and the working tree is never written to. The settings
+files are found relative to the src directory, the suite runs from it
+whatever the directory pytest was started from.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+SRC = Path(__file__).parents[1]
+os.chdir(SRC)
+SCRATCH = Path(tempfile.mkdtemp(prefix="rent_tests_"))
+(SCRATCH / "model").mkdir()
+shutil.copy(SRC / "db" / "db.sqlite", SCRATCH / "db.sqlite")
+os.environ.update(
+    {
+        "MODEL_PATH": str(SCRATCH / "model"),
+        "DB_CONN_STR": f"sqlite:///{SCRATCH / 'db.sqlite'}",
+        "feature_store_path": str(SCRATCH / "feature_store"),
+        "cv_cache_path": str(SCRATCH / "cv_cache"),
+        # a quick search, the tests check the pipeline, not the model
+        "search_strategy": "random",
+        "search_n_iter": "2",
+    },
+)
+
+
+def pytest_sessionfinish(session, exitstatus) -> None:
+    """Remove the scratch directory."""
+    shutil.rmtree(SCRATCH, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def regression_data() -> tuple[np.ndarray, np.ndarray]:
+    """Small float32 regression problem with a binary feature."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 5)).astype(np.float32)
+    X[:, 4] = rng.integers(0, 2, size=400)
+    y = 3 * X[:, 0] - 2 * X[:, 1] * X[:, 4] + np.sin(X[:, 2]) + rng.normal(size=400)
+    return X, y
+
+
+@pytest.fixture(scope="session")
+def built_model() -> Path:
+    """Model, transformer and schema built from the database copy."""
+    from models.pipe.model import build_model
+
+    build_model()
+    return SCRATCH / "model"
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch) -> Path:
+    """An empty model directory of the test's own to build in."""
+    from config import model_setting
+
+    monkeypatch.setattr(model_setting, "model_path", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def record_saves(monkeypatch):
+    """Record the order a module of the pipeline saves the artifacts in."""
+
+    def record(module) -> list[str]:
+        calls = []
+        for name in (
+            "_save_preprocessor",
+            "_save_feature_schema",
+            "_save_variants",
+            "_save_model",
+        ):
+            if hasattr(module, name):
+                save = getattr(module, name)
+
+                def recorded(*args, _name=name, _save=save, **kwargs):
+                    calls.append(_name)
+                    return _save(*args, **kwargs)
+
+                monkeypatch.setattr(module, name, recorded)
+        return calls
+
+    return record
@@ -0,0 +1,57 @@
+"""Estimator backends of the training pipeline."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+from config import model_setting
+from models.model_inference import ModelInferenceService
+from models.pipe.backends import count_trees, make_estimator, n_trees_param
+from models.pipe.model import build_model, load_training_state
+
+
+@pytest.mark.parametrize(
+    ("backend", "estimator_type", "trees"),
+    [
+        ("random_forest", RandomForestRegressor, "n_estimators"),
+        ("hist_gradient_boosting", HistGradientBoostingRegressor, "max_iter"),
+    ],
+)
+def test_backend_estimators_count_their_trees(
+    backend,
+    estimator_type,
+    trees,
+    regression_data,
+):
+    estimator, param_grid = make_estimator(backend)
+    assert isinstance(estimator, estimator_type)
+    assert set(param_grid) <= set(estimator.get_params())
+    assert n_trees_param(estimator) == trees
+
+    X, y = regression_data
+    fitted = estimator.set_params(**{trees: 20}).fit(X, y)
+    n_trees = getattr(fitted, "n_iter_", len(getattr(fitted, "estimators_", [])))
+    assert count_trees(fitted) == n_trees <= 20
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="unknown model backend"):
+        make_estimator("xgboost")
+
+
+def test_boosting_backend_is_built_and_served(model_dir, monkeypatch):
+    monkeypatch.setattr(model_setting, "model_backend", "hist_gradient_boosting")
+    build_model()
+    assert load_training_state()["backend"] == "hist_gradient_boosting"
+
+    service = ModelInferenceService()
+    service.load_model()
+    assert isinstance(service.model, HistGradientBoostingRegressor)
+    rows = np.zeros((3, service.model.n_features_in_))
+    rows[:, 0] = [40, 80, 120]
+    predictions = service.predict_batch(rows)
+
+    monkeypatch.setattr(model_setting, "inference_engine", "flat")
+    flat = ModelInferenceService()
+    flat.load_model()
+    np.testing.assert_allclose(flat.predict_batch(rows), predictions, rtol=1e-9)
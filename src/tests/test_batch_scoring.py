@@ -0,0 +1,28 @@
+"""Offline scoring of the whole table."""
+
+from sqlalchemy import func, select
+
+from config import get_engine
+from db.db_model import RentApartments, RentPredictions
+from models.batch_scoring import BatchScoringService
+from models.pipe.data_collection import ROWID
+
+
+def count(query) -> int:
+    with get_engine().connect() as conn:
+        return conn.execute(query).scalar()
+
+
+def test_scoring_resumes_after_the_last_scored_row(built_model):
+    n_rows = count(select(func.count()).select_from(RentApartments))
+    job = BatchScoringService(workers=1, chunk_size=500, model_version="test")
+    assert job.run(restart=True)["rows"] == n_rows
+    assert job.resume_point() == count(
+        select(func.max(ROWID)).select_from(RentApartments),
+    )
+
+    # nothing left to score, then everything again on restart
+    assert job.run()["rows"] == 0
+    assert job.run(restart=True)["rows"] == n_rows
+    scored = select(func.count()).where(RentPredictions.model_version == "test")
+    assert count(scored) == n_rows
@@ -0,0 +1,72 @@
+"""Compression of the trained forest into smaller variants."""
+
+import json
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+from config import model_setting
+from models.flat_forest import variant_model_name
+from models.model_inference import ModelInferenceService
+from models.pipe.compression import (
+    compress_model,
+    compression_report_path,
+    distill,
+    select_trees,
+)
+from models.pipe.model import build_model
+
+
+@pytest.fixture(scope="module")
+def forest(regression_data) -> RandomForestRegressor:
+    X, y = regression_data
+    return RandomForestRegressor(n_estimators=60, random_state=0).fit(X, y)
+
+
+def test_selection_keeps_the_first_trees_within_tolerance(forest, regression_data):
+    X, y = regression_data
+    compressed, selection = select_trees(forest, X, y, tolerance=0.02, max_rows=400)
+    n_trees = selection["trees"][1]
+    assert selection["trees"][0] == 60
+    assert n_trees < 60
+    assert compressed.estimators_ == forest.estimators_[:n_trees]
+    # the forest itself keeps all its trees
+    assert len(forest.estimators_) == 60
+    all_trees, kept = selection["oob_score"]
+    assert kept >= all_trees - 0.02
+
+
+def test_distilled_tree_follows_the_model(forest, regression_data):
+    X, _ = regression_data
+    student = distill(forest, X, max_depth=4)
+    assert student.get_depth() <= 4
+    assert np.corrcoef(student.predict(X), forest.predict(X))[0, 1] > 0.9
+
+
+def test_boosted_model_is_only_distilled(regression_data, monkeypatch):
+    monkeypatch.setattr(model_setting, "compression_distill", True)
+    X, y = regression_data
+    model = HistGradientBoostingRegressor(max_iter=20).fit(X[:300], y[:300])
+    variants, report = compress_model(model, X[:300], y[:300], X[300:], y[300:])
+    assert set(variants) == {"distilled"}
+    assert set(report["variants"]) == {"full", "distilled"}
+    assert report["variants"]["distilled"]["n_trees"] == 1
+
+
+def test_build_saves_the_variants_served_by_name(model_dir, monkeypatch):
+    monkeypatch.setattr(model_setting, "compression_enabled", True)
+    build_model()
+    report = json.loads(compression_report_path().read_text())
+    assert (model_dir / variant_model_name("compressed")).exists()
+    assert not (model_dir / variant_model_name("distilled")).exists()
+
+    monkeypatch.setattr(model_setting, "model_variant", "compressed")
+    service = ModelInferenceService()
+    service.load_model()
+    assert service.model_name == variant_model_name("compressed")
+    assert len(service.model.estimators_) == report["variants"]["compressed"]["n_trees"]
+    assert (
+        report["variants"]["compressed"]["n_trees"]
+        <= report["variants"]["full"]["n_trees"]
+    )
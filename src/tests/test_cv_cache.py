@@ -0,0 +1,76 @@
+"""On-disk store of cross-validation results."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import KFold
+
+from models.pipe.cv_cache import CVResultStore, _candidate_key
+from models.pipe.executor import JoblibGridSearch
+
+PARAM_GRID = {"n_estimators": [5, 10], "max_depth": [2, 4]}
+
+
+@pytest.fixture
+def store(tmp_path) -> CVResultStore:
+    return CVResultStore(tmp_path / "cv_cache")
+
+
+class RecordingSearch(JoblibGridSearch):
+    """Joblib search recording the candidates it had to fit."""
+
+    fitted_candidates = ()
+
+    def _evaluate(self, X, y, candidates):
+        self.fitted_candidates = candidates
+        return super()._evaluate(X, y, candidates)
+
+
+def search(store: CVResultStore, param_grid: dict) -> RecordingSearch:
+    return RecordingSearch(
+        RandomForestRegressor(random_state=0),
+        param_grid,
+        cv=3,
+        n_jobs=1,
+        store=store,
+    )
+
+
+def test_second_search_is_served_from_the_store(store, regression_data):
+    X, y = regression_data
+    first = search(store, PARAM_GRID).fit(X, y)
+    assert len(first.fitted_candidates) == 4
+
+    second = search(store, PARAM_GRID).fit(X, y)
+    assert len(second.fitted_candidates) == 0
+    assert (first.n_cached_, second.n_cached_) == (0, 4)
+    for key in ("params", "mean_test_score", "rank_test_score"):
+        np.testing.assert_array_equal(second.cv_results_[key], first.cv_results_[key])
+    assert second.best_params_ == first.best_params_
+
+
+def test_grown_grid_only_fits_the_new_candidates(store, regression_data):
+    X, y = regression_data
+    search(store, PARAM_GRID).fit(X, y)
+    grown = search(store, {**PARAM_GRID, "max_depth": [2, 4, 6]}).fit(X, y)
+    assert all(params["max_depth"] == 6 for params in grown.fitted_candidates)
+    assert len(grown.fitted_candidates) == 2
+    assert grown.n_cached_ == 4
+    assert len(grown.cv_results_["params"]) == 6
+
+
+def test_context_follows_the_data_and_the_folds(regression_data):
+    X, y = regression_data
+    context = CVResultStore.context(X, y, KFold(3))
+    assert CVResultStore.context(X.copy(), y.copy(), KFold(3)) == context
+    assert CVResultStore.context(X, y + 1, KFold(3)) != context
+    assert CVResultStore.context(X, y, KFold(5)) != context
+    assert CVResultStore.context(X, y, KFold(3), ["a", "b", "c", "d", "e"]) != context
+
+
+def test_candidate_key_ignores_the_number_of_jobs():
+    forest = RandomForestRegressor(random_state=0)
+    key = _candidate_key(forest, {"max_depth": 2})
+    assert _candidate_key(forest.set_params(n_jobs=4), {"max_depth": 2}) == key
+    assert _candidate_key(forest, {"max_depth": 4}) != key
+    assert _candidate_key(forest.set_params(random_state=1), {"max_depth": 2}) != key
@@ -0,0 +1,106 @@
+"""Streaming and preparation of the training data."""
+
+import pickle as pkl
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelBinarizer
+
+from models.pipe.data_collection import (
+    PIPELINE_COLUMNS,
+    load_data_from_db,
+    stream_data_from_db,
+)
+from models.pipe.data_preparation import RentFeatureTransformer, prepare_data
+
+BINARY_COLS = [
+    "balcony_yes",
+    "storage_yes",
+    "parking_yes",
+    "furnished_yes",
+    "garage_yes",
+]
+
+
+@pytest.fixture(scope="module")
+def legacy() -> pd.DataFrame:
+    """The whole table prepared the way the pipeline did before streaming."""
+    df = pd.get_dummies(
+        load_data_from_db(),
+        columns=["balcony", "parking", "furnished", "garage", "storage"],
+        drop_first=True,
+    )
+    df["garden"] = df["garden"].apply(
+        lambda x: 0 if x == "Not present" else int(re.findall(r"\d+", x)[0])
+    )
+    for col in BINARY_COLS:
+        df[col] = LabelBinarizer().fit_transform(df[col]).ravel()
+    return df
+
+
+def test_streamed_chunks_hold_the_typed_table():
+    chunks = list(stream_data_from_db(chunk_size=100))
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(dict(chunk.dtypes) == PIPELINE_COLUMNS for chunk in chunks)
+
+    whole = load_data_from_db()[list(PIPELINE_COLUMNS)]
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True).astype(object),
+        whole.astype(object),
+    )
+
+
+def test_chunked_preparation_matches_the_legacy_one(legacy):
+    prepared = prepare_data(chunk_size=100)
+    assert set(prepared.columns) == {
+        "area",
+        "constraction_year",
+        "bedrooms",
+        "garden",
+        *BINARY_COLS,
+        "rent",
+    }
+    pd.testing.assert_frame_equal(
+        prepared,
+        legacy[prepared.columns],
+        check_dtype=False,
+        rtol=1e-6,
+    )
+
+
+@pytest.fixture(scope="module")
+def raw_rows() -> pd.DataFrame:
+    return next(stream_data_from_db(chunk_size=200))
+
+
+def test_output_layout_does_not_depend_on_the_values_seen(raw_rows):
+    transformer = RentFeatureTransformer().fit(raw_rows)
+    only_no = raw_rows.copy()
+    for col in ["balcony", "parking", "furnished", "garage", "storage"]:
+        only_no[col] = "no"
+    features = RentFeatureTransformer().fit(only_no).transform(only_no)
+    assert features.shape == (len(raw_rows), len(transformer.feature_names_out_))
+    assert features.dtype == np.float32
+    assert features.flags.c_contiguous
+    np.testing.assert_array_equal(features[:, -len(BINARY_COLS) :], 0)
+
+
+def test_unknown_category_is_rejected(raw_rows):
+    transformer = RentFeatureTransformer().fit(raw_rows)
+    rows = raw_rows.head(3).copy()
+    rows["balcony"] = rows["balcony"].astype(object)
+    rows.loc[rows.index[1], "balcony"] = "maybe"
+    with pytest.raises(ValueError, match="balcony"):
+        transformer.transform(rows)
+
+
+def test_pickled_transformer_gives_the_same_features(raw_rows):
+    transformer = RentFeatureTransformer().fit(raw_rows)
+    restored = pkl.loads(pkl.dumps(transformer))
+    np.testing.assert_array_equal(
+        restored.transform(raw_rows),
+        transformer.transform(raw_rows),
+    )
@@ -0,0 +1,69 @@
+"""SQLite engines, indexes and filtered extraction."""
+
+import shutil
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+from config import db_settings, get_engine
+from config.db import dispose_engines
+from models.pipe.data_collection import create_indexes, load_data_from_db
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Engines on a copy of the database of their own."""
+    path = tmp_path / "db.sqlite"
+    shutil.copy(make_url(db_settings.db_conn_str).database, path)
+    monkeypatch.setattr(db_settings, "db_conn_str", f"sqlite:///{path}")
+    dispose_engines()
+    yield path
+    dispose_engines()
+
+
+def pragma(name: str, read_only: bool = False):
+    with get_engine(read_only=read_only).connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_read_only_engine_cannot_write(database):
+    with pytest.raises(OperationalError, match="readonly"):
+        with get_engine(read_only=True).begin() as conn:
+            conn.execute(text("CREATE TABLE scratch (a INTEGER)"))
+
+
+def test_connections_are_tuned_by_the_settings(database, monkeypatch):
+    monkeypatch.setattr(db_settings, "sqlite_journal_mode", "wal")
+    monkeypatch.setattr(db_settings, "sqlite_synchronous", "normal")
+    monkeypatch.setattr(db_settings, "sqlite_busy_timeout", 1234)
+    assert pragma("journal_mode") == "wal"
+    for read_only in (False, True):
+        assert pragma("synchronous", read_only) == 1
+        assert pragma("busy_timeout", read_only) == 1234
+        assert pragma("cache_size", read_only) == db_settings.sqlite_cache_size
+
+
+def test_journal_mode_of_the_file_is_kept_by_default(database):
+    assert db_settings.sqlite_journal_mode is None
+    assert pragma("journal_mode") == "delete"
+
+
+def test_missing_indexes_are_created_once(database):
+    table = db_settings.rent_apart_table_name
+    created = create_indexes()
+    assert {f"ix_{table}_zip", f"ix_{table}_neighborhood"} <= set(created)
+    assert create_indexes() == []
+
+
+def test_filters_select_the_matching_rows(database):
+    table = load_data_from_db()
+    zips = list(table["zip"].unique()[:2])
+    neighborhood = table["neighborhood"].iloc[0]
+
+    selected = load_data_from_db(filters={"zip": zips})
+    assert len(selected) == table["zip"].isin(zips).sum()
+    assert set(selected["zip"]) == set(zips)
+    selected = load_data_from_db(filters={"neighborhood": neighborhood})
+    assert len(selected) == (table["neighborhood"] == neighborhood).sum()
@@ -0,0 +1,72 @@
+"""Grid search on a process pool over shared-memory data."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.exceptions import FitFailedWarning
+from sklearn.model_selection import GridSearchCV
+
+from models.pipe.executor import ProcessPoolGridSearch
+
+PARAM_GRID = {"n_estimators": [5, 10], "max_depth": [2, 4]}
+
+
+def test_process_pool_scores_like_grid_search_cv(regression_data):
+    X, y = regression_data
+    estimator = RandomForestRegressor(random_state=0)
+    search = ProcessPoolGridSearch(
+        estimator,
+        PARAM_GRID,
+        cv=3,
+        outer_jobs=2,
+        inner_jobs=1,
+    ).fit(X, y)
+    reference = GridSearchCV(estimator, PARAM_GRID, cv=3).fit(X, y)
+
+    assert search.cv_results_["params"] == reference.cv_results_["params"]
+    np.testing.assert_allclose(
+        search.cv_results_["mean_test_score"],
+        reference.cv_results_["mean_test_score"],
+        rtol=1e-12,
+    )
+    np.testing.assert_array_equal(
+        search.cv_results_["rank_test_score"],
+        reference.cv_results_["rank_test_score"],
+    )
+    assert search.best_params_ == reference.best_params_
+    np.testing.assert_array_equal(
+        search.best_estimator_.predict(X),
+        reference.best_estimator_.predict(X),
+    )
+
+
+def test_failed_fits_score_nan_and_rank_last(regression_data):
+    X, y = regression_data
+    param_grid = {"n_estimators": [5], "max_depth": [2, -1]}
+    search = ProcessPoolGridSearch(
+        RandomForestRegressor(random_state=0),
+        param_grid,
+        cv=3,
+        outer_jobs=2,
+        inner_jobs=1,
+    )
+    with pytest.warns(FitFailedWarning, match="3 fits failed out of a total of 6"):
+        search.fit(X, y)
+
+    scores = search.cv_results_["mean_test_score"]
+    assert np.isnan(scores[1]) and np.isfinite(scores[0])
+    assert list(search.cv_results_["rank_test_score"]) == [1, 2]
+    assert search.best_params_ == {"max_depth": 2, "n_estimators": 5}
+
+
+def test_search_fails_when_every_fit_failed(regression_data):
+    X, y = regression_data
+    search = ProcessPoolGridSearch(
+        RandomForestRegressor(random_state=0),
+        {"max_depth": [-1]},
+        cv=3,
+        outer_jobs=1,
+        inner_jobs=1,
+    )
+    with pytest.raises(ValueError, match="all the 3 fits failed"):
+        search.fit(X, y)
@@ -0,0 +1,102 @@
+"""Typed feature schema of the model input."""
+
+import numpy as np
+import pytest
+
+from models.feature_schema import FeatureSchema
+from models.model_inference import ModelInferenceService
+
+
+@pytest.fixture
+def schema() -> FeatureSchema:
+    return FeatureSchema(
+        ["area", "bedrooms", "balcony_yes"],
+        ["float", "int", "binary"],
+        minimums=[20.0, 0.0, 0.0],
+        maximums=[200.0, 5.0, 1.0],
+    )
+
+
+def test_named_rows_are_assembled_in_training_order(schema):
+    features = schema.assemble(
+        [
+            {"balcony_yes": 1, "area": 52.5, "bedrooms": 2},
+            {"bedrooms": 1, "balcony_yes": 0, "area": 300},
+        ],
+    )
+    assert features.dtype == np.float32
+    assert features.flags.c_contiguous
+    # values outside the training range are accepted
+    np.testing.assert_array_equal(features, [[52.5, 2, 1], [300, 1, 0]])
+
+
+@pytest.mark.parametrize(
+    ("row", "message"),
+    [
+        ({"area": 52.5, "bedrooms": 2}, r"row 1: missing features \['balcony_yes'\]"),
+        (
+            {"area": 52.5, "bedrooms": 2, "balcony_yes": 1, "rooms": 3},
+            r"row 1: unexpected features \['rooms'\]",
+        ),
+        (
+            {"area": "big", "bedrooms": 2, "balcony_yes": 1},
+            "row 1: feature 'area' must be numeric",
+        ),
+        (
+            {"area": "12", "bedrooms": 2, "balcony_yes": 1},
+            "row 1: feature 'area' must be numeric, got '12'",
+        ),
+        (
+            {"area": 52.5, "bedrooms": 2.5, "balcony_yes": 1},
+            "row 1: feature 'bedrooms' must be a whole number",
+        ),
+        (
+            {"area": 52.5, "bedrooms": 2, "balcony_yes": 2},
+            "row 1: feature 'balcony_yes' must be 0 or 1",
+        ),
+        (
+            {"area": float("nan"), "bedrooms": 2, "balcony_yes": 1},
+            "row 1: feature 'area' must be a finite number",
+        ),
+    ],
+)
+def test_bad_rows_are_rejected_with_their_row_and_feature(schema, row, message):
+    good = {"area": 52.5, "bedrooms": 2, "balcony_yes": 1}
+    with pytest.raises(ValueError, match=message):
+        schema.assemble([good, row])
+
+
+def test_single_feature_rows_are_assembled():
+    schema = FeatureSchema(["area"], ["float"])
+    features = schema.assemble([{"area": 52.5}, {"area": 30}])
+    np.testing.assert_array_equal(features, [[52.5], [30]])
+    with pytest.raises(ValueError, match="row 0: feature 'area' must be numeric"):
+        schema.assemble({"area": "52.5"})
+
+
+def test_matrix_of_another_width_is_rejected(schema):
+    with pytest.raises(ValueError, match="expected a 2-D input with 3 features"):
+        schema.validate(np.zeros((2, 4), dtype=np.float32))
+
+
+def test_saved_schema_loads_unchanged(schema, tmp_path):
+    schema.save(tmp_path / "schema.json")
+    loaded = FeatureSchema.load(tmp_path / "schema.json")
+    assert (loaded.names, loaded.kinds) == (schema.names, schema.kinds)
+    assert (loaded.minimums, loaded.maximums) == (schema.minimums, schema.maximums)
+
+
+def test_service_predicts_named_and_positional_rows_alike(built_model):
+    service = ModelInferenceService()
+    service.load_model()
+    row = np.zeros(service.schema.n_features)
+    row[0] = 60
+    named = dict(zip(service.schema.names, row.tolist()))
+    np.testing.assert_array_equal(
+        service.predict(named),
+        service.predict(row.tolist()),
+    )
+    np.testing.assert_array_equal(
+        service.predict_batch([named, named]),
+        service.predict_batch(np.array([row, row])),
+    )
@@ -0,0 +1,77 @@
+"""On-disk cache of the prepared training data."""
+
+import mmap
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import model_setting
+from models.pipe import feature_store
+from models.pipe.data_collection import max_rowid
+from models.pipe.feature_store import evict, load_prepared_data, table_fingerprint
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    """An empty feature store of its own."""
+    monkeypatch.setattr(model_setting, "feature_store_path", str(tmp_path))
+    return tmp_path
+
+
+def fail(*args, **kwargs):
+    raise AssertionError("the data was prepared again")
+
+
+def test_second_build_reads_the_same_data_from_the_store(store, monkeypatch):
+    watermark = max_rowid()
+    X, y, _ = load_prepared_data(watermark)
+    assert len(list(store.iterdir())) == 1
+
+    monkeypatch.setattr(feature_store, "prepare_data", fail)
+    stored_X, stored_y, transformer = load_prepared_data(watermark)
+    pd.testing.assert_frame_equal(stored_X, X)
+    np.testing.assert_array_equal(stored_y, y)
+    assert list(transformer.get_feature_names_out()) == list(X.columns)
+
+
+def is_mapped(array: np.ndarray) -> bool:
+    """Whether the array is a view of a memory-mapped file."""
+    while isinstance(array, np.ndarray):
+        array = array.base
+    return isinstance(array, mmap.mmap)
+
+
+def test_stored_arrays_are_not_copied():
+    load_prepared_data(max_rowid())
+    X, y, _ = load_prepared_data(max_rowid())
+    assert is_mapped(X.to_numpy())
+    assert is_mapped(y)
+
+
+def test_rebuild_prepares_the_data_again(monkeypatch):
+    load_prepared_data(max_rowid())
+    monkeypatch.setattr(feature_store, "prepare_data", fail)
+    with pytest.raises(AssertionError, match="prepared again"):
+        load_prepared_data(max_rowid(), rebuild=True)
+
+
+def test_fingerprint_follows_the_rows_read():
+    watermark = max_rowid()
+    assert table_fingerprint(watermark) == table_fingerprint(watermark)
+    assert table_fingerprint(watermark - 1) != table_fingerprint(watermark)
+
+
+def test_least_recently_used_entries_are_evicted(store):
+    watermark = max_rowid()
+    load_prepared_data(watermark - 1)
+    (old,) = store.iterdir()
+    os.utime(old / "meta.json", (0, 0))
+    load_prepared_data(watermark)
+    assert len(list(store.iterdir())) == 2
+
+    evict(max_bytes=1)
+    # the newest entry is always kept
+    (entry,) = store.iterdir()
+    assert entry != old
@@ -0,0 +1,70 @@
+"""Flat inference arrays against the sklearn models they flatten."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+from models.flat_forest import FlatForest
+
+ESTIMATORS = {
+    "random_forest": lambda: RandomForestRegressor(n_estimators=20, random_state=0),
+    "hist_gradient_boosting": lambda: HistGradientBoostingRegressor(
+        max_iter=30,
+        random_state=0,
+    ),
+    "decision_tree": lambda: DecisionTreeRegressor(max_depth=6, random_state=0),
+}
+
+
+@pytest.fixture(params=list(ESTIMATORS))
+def fitted(request, regression_data):
+    X, y = regression_data
+    return ESTIMATORS[request.param]().fit(X, y)
+
+
+def test_flat_predictions_match_sklearn(fitted, regression_data):
+    X, _ = regression_data
+    np.testing.assert_allclose(
+        FlatForest.from_estimator(fitted).predict(X),
+        fitted.predict(X),
+        rtol=1e-9,
+        atol=1e-9,
+    )
+
+
+def test_single_rows_and_small_blocks_match_sklearn(fitted, regression_data):
+    X, _ = regression_data
+    forest = FlatForest.from_estimator(fitted)
+    for row in X[:20]:
+        np.testing.assert_allclose(
+            forest.predict(row[None, :]),
+            fitted.predict(row[None, :]),
+            rtol=1e-9,
+            atol=1e-9,
+        )
+    np.testing.assert_allclose(
+        forest.predict(X, block_rows=64),
+        fitted.predict(X),
+        rtol=1e-9,
+        atol=1e-9,
+    )
+
+
+def test_per_tree_outputs_combine_into_prediction(fitted, regression_data):
+    X, _ = regression_data
+    forest = FlatForest.from_estimator(fitted)
+    trees = forest.predict_trees(X)
+    combined = trees.mean(axis=0) if forest.average else forest.baseline + trees.sum(0)
+    np.testing.assert_allclose(combined, forest.predict(X), rtol=1e-9, atol=1e-9)
+
+
+def test_saved_forest_loads_memory_mapped(fitted, regression_data, tmp_path):
+    X, _ = regression_data
+    forest = FlatForest.from_estimator(fitted)
+    forest.save(tmp_path / "flat")
+    loaded = FlatForest.load(tmp_path / "flat", mmap_mode="r")
+    # views of the maps, not copies
+    assert not loaded.threshold.flags.owndata
+    np.testing.assert_array_equal(loaded.predict(X), forest.predict(X))
+    np.testing.assert_array_equal(loaded.cover, forest.cover)
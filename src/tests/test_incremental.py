@@ -0,0 +1,124 @@
+"""Incremental warm-start retraining on the rows added since the build."""
+
+import math
+import pickle as pkl
+
+from sqlalchemy import text
+
+from config import db_settings, get_engine, model_setting
+from models.feature_schema import FeatureSchema
+from models.flat_forest import variant_model_name
+from models.pipe.compression import compression_report_path
+from models.pipe.data_collection import max_rowid
+from models.pipe import incremental
+from models.pipe.incremental import update_model
+from models.pipe.model import build_model, load_training_state
+
+# the columns copied as they are, the address and area are set apart
+COLUMNS = (
+    "constraction_year, rooms, bedrooms, bathrooms, balcony, storage, "
+    "parking, furnished, garage, garden, energy, facilities, zip, "
+    "neighborhood, rent"
+)
+
+
+def append_rows(n_rows: int, area_factor: float = 1.0) -> None:
+    """Append copies of the first rows of the table under new addresses."""
+    with get_engine().begin() as conn:
+        conn.execute(
+            text(
+                f"INSERT INTO {db_settings.rent_apart_table_name} "
+                f"(address, area, {COLUMNS}) "
+                f"SELECT 'Update ' || rowid || ' ' || :tag, area * :factor, "
+                f"{COLUMNS} "
+                f"FROM {db_settings.rent_apart_table_name} "
+                f"WHERE rowid <= :n_rows",
+            ),
+            {"tag": max_rowid(), "n_rows": n_rows, "factor": area_factor},
+        )
+
+
+def load_model(model_dir):
+    with open(model_dir / model_setting.model_name, "rb") as model_file:
+        return pkl.load(model_file)
+
+
+def test_without_a_state_the_update_runs_a_full_build(model_dir):
+    update_model()
+    assert (model_dir / model_setting.model_name).exists()
+    assert load_training_state()["watermark"] == max_rowid()
+
+
+def test_full_build_fallback_passes_rebuild_features(model_dir, monkeypatch):
+    builds = []
+    monkeypatch.setattr(
+        incremental, "build_model", lambda **kwargs: builds.append(kwargs)
+    )
+    update_model(rebuild_features=True)
+    assert builds == [{"rebuild_features": True}]
+
+
+def test_update_adds_trees_fitted_on_the_new_rows(model_dir):
+    build_model()
+    state = load_training_state()
+    n_trees = len(load_model(model_dir).estimators_)
+
+    append_rows(model_setting.incremental_min_rows)
+    update_model()
+    n_new_trees = math.ceil(
+        n_trees * model_setting.incremental_min_rows / state["n_rows"],
+    )
+    assert len(load_model(model_dir).estimators_) == n_trees + n_new_trees
+    assert load_training_state()["watermark"] == max_rowid()
+
+
+def test_update_writes_the_model_file_last(model_dir, record_saves):
+    build_model()
+    append_rows(model_setting.incremental_min_rows)
+    calls = record_saves(incremental)
+    update_model()
+    assert calls[-1] == "_save_model"
+    assert "_save_feature_schema" in calls
+
+
+def test_too_few_new_rows_are_left_for_the_next_run(model_dir):
+    build_model()
+    watermark = load_training_state()["watermark"]
+    n_trees = len(load_model(model_dir).estimators_)
+
+    append_rows(model_setting.incremental_min_rows - 1)
+    update_model()
+    assert len(load_model(model_dir).estimators_) == n_trees
+    assert load_training_state()["watermark"] == watermark
+
+
+def test_update_widens_the_schema_and_drops_the_variants(model_dir, monkeypatch):
+    monkeypatch.setattr(model_setting, "compression_enabled", True)
+    # larger apartments than any seen, not a drift to rebuild for here
+    monkeypatch.setattr(model_setting, "drift_threshold", math.inf)
+    build_model()
+    schema_path = model_dir / model_setting.feature_schema_name
+    max_area = FeatureSchema.load(schema_path).maximums[0]
+    assert (model_dir / variant_model_name("compressed")).exists()
+
+    append_rows(model_setting.incremental_min_rows, area_factor=100)
+    update_model()
+    assert FeatureSchema.load(schema_path).maximums[0] > max_area
+    assert not (model_dir / variant_model_name("compressed")).exists()
+    assert not compression_report_path().exists()
+
+
+def test_boosting_update_adds_iterations(model_dir, monkeypatch):
+    monkeypatch.setattr(model_setting, "model_backend", "hist_gradient_boosting")
+    build_model()
+    state = load_training_state()
+
+    append_rows(model_setting.incremental_min_rows)
+    update_model()
+    model = load_model(model_dir)
+    n_new_trees = math.ceil(
+        state["n_trees"] * model_setting.incremental_min_rows / state["n_rows"],
+    )
+    assert model.n_iter_ == state["n_trees"] + n_new_trees
+    # early stopping is only off while the new rows are added
+    assert model.get_params()["early_stopping"] is True
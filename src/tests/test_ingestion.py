@@ -0,0 +1,85 @@
+"""Bulk ingestion of listing files into the table."""
+
+import pandas as pd
+import pytest
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import text
+
+from config import db_settings, get_engine
+from models.pipe.ingestion import ingest_file
+
+
+def table_rows(where: str = "1 = 1") -> pd.DataFrame:
+    with get_engine().connect() as conn:
+        return pd.read_sql(
+            text(
+                f"SELECT rowid, * FROM {db_settings.rent_apart_table_name} WHERE {where}"
+            ),
+            conn,
+        )
+
+
+@pytest.fixture
+def listings() -> pd.DataFrame:
+    """Five listings of the table under new, unique addresses."""
+    rows = table_rows("rowid <= 5").drop(columns="rowid")
+    rows["address"] = [f"Test street {i}" for i in range(len(rows))]
+    return rows
+
+
+def test_new_listings_are_inserted_and_resent_ones_replaced(listings, tmp_path):
+    path = tmp_path / "listings.csv"
+    listings.to_csv(path, index=False)
+    stats = ingest_file(path)
+    assert (stats["inserted"], stats["replaced"], stats["rejected"]) == (5, 0, 0)
+
+    listings["rent"] += 100
+    listings.to_csv(path, index=False)
+    stats = ingest_file(path, chunk_size=2)
+    assert (stats["inserted"], stats["replaced"]) == (5, 5)
+    stored = table_rows("address LIKE 'Test street %'")
+    assert len(stored) == 5
+    assert sorted(stored["rent"]) == sorted(listings["rent"])
+
+
+def test_addresses_are_indexed_once_for_the_upsert(listings, tmp_path):
+    path = tmp_path / "listings.csv"
+    listings.to_csv(path, index=False)
+    ingest_file(path)
+    ingest_file(path)
+    indexes = sa_inspect(get_engine()).get_indexes(db_settings.rent_apart_table_name)
+    assert [index["column_names"] for index in indexes].count(["address"]) == 1
+
+
+def test_invalid_rows_are_rejected_with_their_reason(listings, tmp_path):
+    listings = listings.astype({"area": object, "rooms": object})
+    listings.loc[0, "area"] = "abc"
+    listings.loc[1, "balcony"] = "Yes"
+    listings.loc[2, "garden"] = "big"
+    listings.loc[3, "rooms"] = 1.5
+    path = tmp_path / "listings.csv"
+    listings.to_csv(path, index=False)
+    rejects = tmp_path / "rejects.csv"
+
+    stats = ingest_file(path, rejects_path=rejects)
+    assert (stats["inserted"], stats["rejected"]) == (1, 4)
+    assert set(stats["rejected_by"]) == {
+        "area is not a number",
+        "balcony is not one of ['no', 'yes']",
+        "garden has no size and is not 'Not present'",
+        "rooms is not a whole number",
+    }
+    assert len(pd.read_csv(rejects)) == 4
+
+
+def test_chunk_without_valid_rows_is_counted_not_written(listings, tmp_path):
+    n_rows = len(table_rows())
+    listings = listings.astype({"area": object})
+    listings["area"] = "abc"
+    path = tmp_path / "listings.csv"
+    listings.to_csv(path, index=False)
+
+    stats = ingest_file(path, chunk_size=2)
+    assert (stats["read"], stats["inserted"], stats["rejected"]) == (5, 0, 5)
+    assert stats["rejected_by"] == {"area is not a number": 5}
+    assert len(table_rows()) == n_rows
@@ -0,0 +1,58 @@
+"""Logging modes of the inference hot path."""
+
+import sys
+
+import numpy as np
+import pytest
+from loguru import logger
+
+from config import configure_logging, log_request_sampled, logger_setting
+from config import logger as logger_module
+from models.model_inference import ModelInferenceService
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    """Log and metrics files of their own, the sinks removed afterwards."""
+    monkeypatch.setattr(logger_setting, "log_file", str(tmp_path / "app.log"))
+    monkeypatch.setattr(logger_setting, "metrics_file", str(tmp_path / "m.jsonl"))
+    monkeypatch.setattr(logger_module, "_request_sample_rate", 1.0)
+    logger.remove()
+    yield tmp_path / "app.log"
+    logger.remove()
+    logger.add(sys.stderr)
+
+
+def test_serving_mode_samples_the_requests(log_file, monkeypatch):
+    monkeypatch.setattr(logger_setting, "log_sample_rate", 0.0)
+    configure_logging(log_level="DEBUG", mode="serving")
+    assert not any(log_request_sampled() for _ in range(100))
+
+    monkeypatch.setattr(logger_setting, "log_sample_rate", 1.0)
+    configure_logging(log_level="DEBUG", mode="serving")
+    assert all(log_request_sampled() for _ in range(100))
+
+
+def test_every_request_is_logged_in_default_mode(log_file, built_model):
+    service = ModelInferenceService()
+    service.load_model()
+    row = np.zeros(service.model.n_features_in_).tolist()
+
+    configure_logging(log_level="DEBUG", mode="default")
+    assert all(log_request_sampled() for _ in range(100))
+    service.predict(row)
+    assert f"making prediction with model {service.model_id}" in log_file.read_text()
+
+
+def test_unsampled_requests_leave_no_record(log_file, built_model, monkeypatch):
+    service = ModelInferenceService()
+    service.load_model()
+    row = np.zeros(service.model.n_features_in_).tolist()
+
+    monkeypatch.setattr(logger_setting, "log_sample_rate", 0.0)
+    configure_logging(log_level="DEBUG", mode="serving")
+    service.predict(row)
+    logger.info("request done")
+    text = log_file.read_text()
+    assert "request done" in text
+    assert "making prediction" not in text
@@ -0,0 +1,138 @@
+"""Loading, reloading and serving the built model."""
+
+import os
+import pickle as pkl
+import time
+
+import numpy as np
+import pytest
+
+from config import model_setting
+from models.model_inference import ModelInferenceService
+from models.pipe import model as model_module
+from models.pipe.model import build_model
+
+
+@pytest.fixture
+def service(built_model, monkeypatch):
+    monkeypatch.setattr(model_setting, "prediction_cache_size", 16)
+    service = ModelInferenceService()
+    service.load_model()
+    return service
+
+
+def rewrite_model(model_dir) -> None:
+    """Write the model file again, as a new build would."""
+    path = model_dir / model_setting.model_name
+    model = pkl.loads(path.read_bytes())
+    path.write_bytes(pkl.dumps(model))
+    # a new artifact identity even on coarse file system clocks
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_cache_is_reset_when_a_new_model_is_swapped_in(service, built_model):
+    row = np.zeros(service.schema.n_features, dtype=np.float32)
+    first = service.predict(row.tolist())
+    np.testing.assert_array_equal(service.predict(row.tolist()), first)
+    assert len(service.cache) == 1
+    assert service.cache.hits == 1
+
+    old_id = service.model_id
+    rewrite_model(built_model)
+    assert service.reload_model()
+    assert service.model_id != old_id
+    assert service.version == 2
+    assert len(service.cache) == 0
+    assert service.cache.model_id == service.model_id
+
+    service.predict(row.tolist())
+    assert service.cache.misses == 2
+
+
+def test_failed_reload_keeps_the_current_model(service, built_model, monkeypatch):
+    monkeypatch.setattr(service, "model_name", "missing.pkl")
+    monkeypatch.setattr(model_setting, "model_name", "missing.pkl")
+    model_id = service.model_id
+    assert not service.reload_model()
+    assert service.model_id == model_id
+
+
+def test_watcher_reloads_a_rewritten_model(service, built_model):
+    service.start_watching(interval=0.05)
+    try:
+        rewrite_model(built_model)
+        deadline = time.monotonic() + 10
+        while service.version < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        service.stop_watching()
+    assert service.version == 2
+
+
+def test_build_writes_the_model_file_last(model_dir, record_saves):
+    calls = record_saves(model_module)
+    build_model()
+    assert set(calls) == {
+        "_save_preprocessor",
+        "_save_feature_schema",
+        "_save_variants",
+        "_save_model",
+    }
+    assert calls[-1] == "_save_model"
+    assert calls.count("_save_model") == 1
+
+
+def test_missing_variant_falls_back_to_the_full_model(built_model, monkeypatch):
+    monkeypatch.setattr(model_setting, "model_variant", "distilled")
+    service = ModelInferenceService()
+    assert service.model_name != model_setting.model_name
+    service.load_model()
+    assert model_setting.model_name in service.model_id
+
+
+def test_explanations_add_up_to_predictions(service):
+    rows = np.zeros((3, service.schema.n_features), dtype=np.float32)
+    explanation = service.explain(rows)
+    np.testing.assert_allclose(
+        explanation.values.sum(axis=1) + explanation.base_value,
+        service.predict_batch(rows),
+        rtol=1e-9,
+    )
+
+
+def test_explanations_do_not_depend_on_the_chunk_size(service):
+    rows = np.zeros((5, service.schema.n_features), dtype=np.float32)
+    rows[:, 0] = np.linspace(30, 150, 5)
+    whole = service.explain(rows)
+    chunked = service.explain(rows, chunk_size=2)
+    np.testing.assert_allclose(chunked.values, whole.values, rtol=1e-9)
+    np.testing.assert_array_equal(chunked.prediction, whole.prediction)
+
+
+def rows_of(service, n_rows: int) -> np.ndarray:
+    """Valid feature rows of listings differing in their area."""
+    rows = np.zeros((n_rows, service.schema.n_features), dtype=np.float32)
+    rows[:, 0] = np.linspace(30, 150, n_rows)
+    return rows
+
+
+def test_interval_is_the_spread_of_the_trees(service):
+    rows = rows_of(service, 5)
+    levels = [0.1, 0.5, 0.9]
+    interval = service.predict_interval(rows, quantiles=levels, chunk_size=2)
+    np.testing.assert_allclose(interval.mean, service.predict_batch(rows), rtol=1e-9)
+
+    trees = np.stack([tree.predict(rows) for tree in service.model.estimators_])
+    np.testing.assert_allclose(interval.std, trees.std(axis=0), rtol=1e-9)
+    for level in levels:
+        np.testing.assert_allclose(
+            interval.quantiles[level],
+            np.quantile(trees, level, axis=0),
+            rtol=1e-9,
+        )
+
+
+def test_quantile_outside_the_unit_interval_is_rejected(service):
+    with pytest.raises(ValueError, match="quantiles must be in"):
+        service.predict_interval(rows_of(service, 1), quantiles=[0.5, 1.5])
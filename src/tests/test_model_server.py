@@ -0,0 +1,120 @@
+"""HTTP handling of the prediction server."""
+
+import asyncio
+import json
+
+import pytest
+
+from models.model_inference import ModelInferenceService
+from models.model_server import PredictionServer, RequestError, _read_request
+
+
+@pytest.fixture(scope="module")
+def service(built_model) -> ModelInferenceService:
+    service = ModelInferenceService()
+    service.load_model()
+    return service
+
+
+def exchange(service: ModelInferenceService, raw: bytes) -> tuple[int, dict]:
+    """Send raw bytes on a fresh connection and read the response."""
+
+    async def run() -> bytes:
+        server = PredictionServer(service, max_body_bytes=1_000)
+        server.batcher.start()
+        listener = await asyncio.start_server(server._handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+        body = await reader.readexactly(length)
+        writer.close()
+        await writer.wait_closed()
+        # let the handler see the connection closed
+        await asyncio.sleep(0.01)
+        listener.close()
+        await listener.wait_closed()
+        await server.batcher.stop()
+        return head + body
+
+    response = asyncio.run(run())
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_predict(service):
+    features = dict.fromkeys(service.schema.names, 0)
+    body = json.dumps(features).encode()
+    status, answer = exchange(
+        service,
+        b"POST /predict HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body),
+    )
+    assert status == 200
+    assert answer["prediction"] == pytest.approx(
+        service.predict(features)[0],
+        rel=1e-9,
+    )
+
+
+@pytest.mark.parametrize(
+    ("raw", "status"),
+    [
+        (b"GARBAGE\r\n\r\n", 400),
+        (b"POST /predict HTTP/1.1\r\nContent-Length: abc\r\n\r\n", 400),
+        (b"POST /predict HTTP/1.1\r\nContent-Length: -1\r\n\r\n", 400),
+        (b"POST /predict HTTP/1.1\r\nContent-Length: 5000\r\n\r\n", 413),
+        (b"POST /predict HTTP/1.1\r\nContent-Length: 4\r\n\r\n[1]\n", 400),
+        (b"GET /nowhere HTTP/1.1\r\n\r\n", 404),
+        *(
+            (
+                b"POST /predict HTTP/1.1\r\nX-Deadline-Ms: %s\r\n"
+                b"Content-Length: 2\r\n\r\n{}" % deadline,
+                400,
+            )
+            for deadline in (b"nan", b"inf", b"0", b"-5", b"soon")
+        ),
+    ],
+)
+def test_bad_requests_get_an_error_status(service, raw, status):
+    assert exchange(service, raw)[0] == status
+
+
+def read(raw: bytes, limit: int = 2**16) -> tuple:
+    """Read one request from a stream holding `raw`."""
+
+    async def run() -> tuple:
+        reader = asyncio.StreamReader(limit=limit)
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await _read_request(
+            reader,
+            max_body_bytes=1_000,
+            max_headers=10,
+            max_header_bytes=1_000,
+        )
+
+    return asyncio.run(run())
+
+
+def test_headers_within_the_limits_are_read():
+    method, path, headers, _ = read(
+        b"GET / HTTP/1.1\r\n" + b"X-A: 1\r\n" * 10 + b"\r\n"
+    )
+    assert (method, path, headers) == ("GET", "/", {"x-a": "1"})
+
+
+@pytest.mark.parametrize(
+    ("raw", "limit", "status"),
+    [
+        (b"GET / HTTP/1.1\r\n" + b"X-A: 1\r\n" * 11 + b"\r\n", 2**16, 431),
+        (b"GET / HTTP/1.1\r\nX-A: " + b"a" * 1_000 + b"\r\n\r\n", 2**16, 431),
+        (b"GET / HTTP/1.1\r\nX-A: " + b"a" * 100 + b"\r\n\r\n", 64, 400),
+        (b"GET / HTTP/1.1" + b"a" * 100, 64, 400),
+    ],
+)
+def test_oversized_headers_are_refused(raw, limit, status):
+    with pytest.raises(RequestError) as error:
+        read(raw, limit)
+    assert error.value.status == status
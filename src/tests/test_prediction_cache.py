@@ -0,0 +1,70 @@
+"""In-process cache of model predictions."""
+
+import numpy as np
+
+from config import model_setting
+from models import prediction_cache
+from models.model_inference import ModelInferenceService
+from models.prediction_cache import PredictionCache
+
+
+def test_least_recently_used_prediction_is_evicted():
+    cache = PredictionCache(max_size=2)
+    first, second, third = (cache.key([i]) for i in range(3))
+    cache.put(first, 1.0)
+    cache.put(second, 2.0)
+    assert cache.get(first) == 1.0
+    cache.put(third, 3.0)
+
+    assert cache.get(second) is None
+    assert (cache.get(first), cache.get(third)) == (1.0, 3.0)
+    assert (len(cache), cache.evictions) == (2, 1)
+
+
+def test_predictions_expire_after_their_time_to_live(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(max_size=2, ttl=10)
+    cache.put(cache.key([1]), 1.0)
+    now[0] += 5
+    assert cache.get(cache.key([1])) == 1.0
+    now[0] += 10
+    assert cache.get(cache.key([1])) is None
+    assert (cache.expirations, len(cache)) == (1, 0)
+
+
+def test_equal_rows_share_a_key():
+    key = PredictionCache.key
+    assert key([85, 1]) == key([85.0, 1.0]) == key(np.array([85, 1], dtype=np.int64))
+    assert key([-0.0]) == key([0.0])
+    assert key([85, 1]) != key([85, 2])
+
+
+def test_cache_is_only_emptied_for_another_artifact():
+    cache = PredictionCache(max_size=2)
+    cache.reset("model-1")
+    cache.put(cache.key([1]), 1.0)
+    cache.reset("model-1")
+    assert len(cache) == 1
+    cache.reset("model-2")
+    assert len(cache) == 0
+
+
+def test_service_serves_repeated_rows_from_the_cache(built_model, monkeypatch):
+    service = ModelInferenceService()
+    service.load_model()
+    # listings differing in their area only
+    rows = np.zeros((4, service.model.n_features_in_))
+    rows[:, 0] = [40, 60, 80, 100]
+    expected = service.predict_batch(rows)
+
+    monkeypatch.setattr(model_setting, "prediction_cache_size", 16)
+    cached = ModelInferenceService()
+    cached.load_model()
+    np.testing.assert_array_equal(cached.predict(rows[0].tolist()), expected[:1])
+    np.testing.assert_array_equal(cached.predict(rows[0].tolist()), expected[:1])
+    assert (cached.cache.hits, cached.cache.misses) == (1, 1)
+
+    np.testing.assert_array_equal(cached.predict_batch(rows), expected)
+    stats = cached.cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 4, 4)
@@ -0,0 +1,54 @@
+"""Hyperparameter search strategies."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from config import model_setting
+from models.pipe.search import SEARCH_STRATEGIES, TimeBudgetSearchCV, make_search
+
+PARAM_GRID = {"n_estimators": [5, 15], "max_depth": [2, 4, None]}
+
+
+def forest() -> RandomForestRegressor:
+    return RandomForestRegressor(random_state=0)
+
+
+@pytest.mark.parametrize("strategy", SEARCH_STRATEGIES)
+def test_every_strategy_fits_a_best_model(strategy, regression_data):
+    X, y = regression_data
+    search = make_search(forest(), PARAM_GRID, strategy, cv=3, n_jobs=1).fit(X, y)
+    assert set(search.best_params_) <= set(PARAM_GRID)
+    assert np.isfinite(search.best_score_)
+    assert search.best_estimator_.predict(X).shape == y.shape
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError, match="unknown search strategy"):
+        make_search(forest(), PARAM_GRID, "bayesian")
+
+
+def test_time_budget_stops_after_the_first_batch(regression_data):
+    X, y = regression_data
+    search = TimeBudgetSearchCV(
+        forest(),
+        PARAM_GRID,
+        time_budget=1e-9,
+        batch_size=2,
+        random_state=0,
+        cv=3,
+    ).fit(X, y)
+    assert len(search.cv_results_["params"]) == 2
+
+
+def test_halving_on_trees_grows_the_forest_up_to_the_grid(
+    regression_data,
+    monkeypatch,
+):
+    monkeypatch.setattr(model_setting, "search_resource", "n_estimators")
+    X, y = regression_data
+    search = make_search(forest(), PARAM_GRID, "halving", cv=3, n_jobs=1).fit(X, y)
+    assert search.resource == "n_estimators"
+    assert "n_estimators" not in search.param_grid
+    n_resources = search.cv_results_["n_resources"]
+    assert min(n_resources) < max(n_resources) <= max(PARAM_GRID["n_estimators"])
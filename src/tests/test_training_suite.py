@@ -0,0 +1,80 @@
+"""Training benchmark suite: stage measurements and results comparison."""
+
+import json
+import sys
+
+import pytest
+from loguru import logger
+
+from benchmarks import training_suite
+from config import db_settings, model_setting
+from config.db import dispose_engines
+
+
+def results_file(path, wall_time: float, peak_rss_mb: float, commit: str):
+    """Write a results file holding one stage at one size."""
+    path.write_text(
+        json.dumps(
+            {
+                "environment": {"commit": commit},
+                "settings": {"search_strategy": "grid"},
+                "results": [
+                    {
+                        "rows": 10_000,
+                        "stage": "train_model",
+                        "wall_time": wall_time,
+                        "peak_rss_mb": peak_rss_mb,
+                    },
+                ],
+            },
+        ),
+    )
+    return path
+
+
+@pytest.mark.parametrize(
+    ("wall_time", "peak_rss_mb", "regressions"),
+    [
+        (1.1, 200, 0),  # within the threshold
+        (2.0, 200, 1),  # slower
+        (1.0, 400, 1),  # heavier
+        (0.01, 200, 0),  # faster
+    ],
+)
+def test_compare_counts_the_regressions(tmp_path, wall_time, peak_rss_mb, regressions):
+    base = results_file(tmp_path / "base.json", 1.0, 200, "abc")
+    new = results_file(tmp_path / "new.json", wall_time, peak_rss_mb, "def")
+    assert training_suite.compare(base, new, threshold=0.15) == regressions
+
+
+def test_noise_of_fast_stages_is_no_regression(tmp_path):
+    base = results_file(tmp_path / "base.json", 0.01, 20, "abc")
+    new = results_file(tmp_path / "new.json", 0.03, 30, "def")
+    assert training_suite.compare(base, new, threshold=0.15) == 0
+
+
+@pytest.fixture
+def restored_settings(monkeypatch):
+    """Undo the settings `measure` changes for its temporary table."""
+    for settings, name in [
+        (db_settings, "db_conn_str"),
+        (model_setting, "model_path"),
+        (model_setting, "feature_store_enabled"),
+        (model_setting, "cv_cache_enabled"),
+    ]:
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+    dispose_engines()
+    yield
+    dispose_engines()
+    logger.remove()
+    logger.add(sys.stderr)
+
+
+def test_measure_records_every_stage(tmp_path, restored_settings):
+    out = tmp_path / "part.json"
+    training_suite.measure(500, train=False, seed=0, out=out, settings={})
+    results = {result["stage"]: result for result in json.loads(out.read_text())}
+    assert set(results) == {"write_table", "prepare_data"}
+    assert results["write_table"]["stage_rows"] == 500
+    assert results["prepare_data"]["stage_rows"] == 500
+    assert all(result["wall_time"] > 0 for result in results.values())
@@ -0,0 +1,98 @@
+"""TreeSHAP values against their definition."""
+
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+from models.flat_forest import FlatForest
+from models.tree_shap import TreeExplainer
+
+
+def expected_output(forest: FlatForest, x: np.ndarray, known: set) -> float:
+    """Output of the forest with the features outside `known` marginalized
+    by the training cover of the branches (path-dependent TreeSHAP)."""
+
+    def walk(node: int) -> float:
+        left = forest.children_left[node]
+        if left == node:
+            return forest.value[node]
+        right = forest.children_right[node]
+        feature = forest.feature[node]
+        if feature in known:
+            return walk(left if x[feature] <= forest.threshold[node] else right)
+        cover = forest.cover
+        return (cover[left] * walk(left) + cover[right] * walk(right)) / cover[node]
+
+    outputs = [walk(root) for root in forest.roots]
+    return np.mean(outputs) if forest.average else forest.baseline + np.sum(outputs)
+
+
+def brute_force_shap(forest: FlatForest, x: np.ndarray) -> np.ndarray:
+    """Shapley values by enumerating every coalition of features."""
+    n = forest.n_features_in_
+    values = np.zeros(n)
+    for i in range(n):
+        others = [j for j in range(n) if j != i]
+        for size in range(n):
+            weight = factorial(size) * factorial(n - size - 1) / factorial(n)
+            for coalition in combinations(others, size):
+                known = set(coalition)
+                values[i] += weight * (
+                    expected_output(forest, x, known | {i})
+                    - expected_output(forest, x, known)
+                )
+    return values
+
+
+@pytest.fixture(
+    params=[
+        RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0),
+        HistGradientBoostingRegressor(max_iter=15, max_leaf_nodes=8, random_state=0),
+    ],
+    ids=["random_forest", "hist_gradient_boosting"],
+)
+def forest(request, regression_data):
+    X, y = regression_data
+    return FlatForest.from_estimator(request.param.fit(X, y))
+
+
+def test_contributions_add_up_to_prediction(forest, regression_data):
+    X, _ = regression_data
+    explainer = TreeExplainer(forest)
+    values = explainer.shap_values(X)
+    np.testing.assert_allclose(
+        values.sum(axis=1) + explainer.expected_value,
+        forest.predict(X),
+        rtol=1e-9,
+        atol=1e-9,
+    )
+
+
+def test_contributions_are_exact_shapley_values(forest, regression_data):
+    X, _ = regression_data
+    values = TreeExplainer(forest).shap_values(X[:5])
+    for row, row_values in zip(X[:5], values):
+        np.testing.assert_allclose(
+            row_values,
+            brute_force_shap(forest, row.astype(np.float64)),
+            rtol=1e-9,
+            atol=1e-9,
+        )
+
+
+def test_expected_value_is_the_mean_training_output(forest):
+    explainer = TreeExplainer(forest)
+    np.testing.assert_allclose(
+        explainer.expected_value,
+        expected_output(forest, np.zeros(forest.n_features_in_), set()),
+        rtol=1e-12,
+    )
+
+
+def test_forest_without_cover_is_rejected(forest):
+    forest.cover = None
+    with pytest.raises(ValueError, match="cover"):
+        TreeExplainer(forest)